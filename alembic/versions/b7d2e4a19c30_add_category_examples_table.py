@@ -0,0 +1,40 @@
+"""add category_examples table
+
+Revision ID: b7d2e4a19c30
+Revises: 5f36aec5e08c
+Create Date: 2025-11-12 18:20:41.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from solomia.models.food_category import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4a19c30'
+down_revision: Union[str, Sequence[str], None] = '5f36aec5e08c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('category_examples',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('example', sa.String(), nullable=False),
+    sa.Column('embedding', Vector(768), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['food_categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category_id', 'example')
+    )
+    op.create_index(op.f('ix_category_examples_category_id'), 'category_examples', ['category_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_category_examples_category_id'), table_name='category_examples')
+    op.drop_table('category_examples')
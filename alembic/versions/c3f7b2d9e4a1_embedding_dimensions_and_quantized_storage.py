@@ -0,0 +1,41 @@
+"""embedding dimensions and quantized storage
+
+Revision ID: c3f7b2d9e4a1
+Revises: a8d4e1f6c2b9
+Create Date: 2025-11-24 09:41:52.116830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f7b2d9e4a1'
+down_revision: Union[str, Sequence[str], None] = 'a8d4e1f6c2b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('food_categories', 'category_examples')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Any size: EMBEDDING_DIM picks it, and re-embedding moves rows over one batch at a time
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN embedding TYPE vector')
+        op.add_column(table, sa.Column('embedding_codes', sa.LargeBinary(), nullable=True))
+        op.add_column(table, sa.Column('embedding_scale', sa.REAL(), nullable=True))
+    # Quantized rows keep their vector in embedding_codes instead
+    op.alter_column('category_examples', 'embedding', nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fails if any row is quantized or not 768-dimensional: re-embed with the defaults first
+    op.alter_column('category_examples', 'embedding', nullable=False)
+    for table in TABLES:
+        op.drop_column(table, 'embedding_scale')
+        op.drop_column(table, 'embedding_codes')
+        op.execute(f'ALTER TABLE {table} ALTER COLUMN embedding TYPE vector(768)')
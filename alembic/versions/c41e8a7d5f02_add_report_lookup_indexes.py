@@ -0,0 +1,29 @@
+"""add report lookup indexes
+
+Revision ID: c41e8a7d5f02
+Revises: b7d2e4a19c30
+Create Date: 2025-11-14 19:02:11.804517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8a7d5f02'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e4a19c30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_reports_user_id_date', 'reports', ['user_id', 'date'], unique=False)
+    op.create_index(op.f('ix_report_items_report_id'), 'report_items', ['report_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_report_items_report_id'), table_name='report_items')
+    op.drop_index('ix_reports_user_id_date', table_name='reports')
@@ -0,0 +1,48 @@
+"""unique report per user and day
+
+Revision ID: d4e8a2c6f1b3
+Revises: c3f7b2d9e4a1
+Create Date: 2026-10-19 09:12:44.318502
+
+Concurrent reports could create two reports for the same user and day.
+Duplicates are merged into the earliest one (its items are moved over)
+before the constraint is added; the constraint includes ``date``, the
+partition key, as Postgres requires.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e8a2c6f1b3'
+down_revision: Union[str, Sequence[str], None] = 'c3f7b2d9e4a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DUPLICATES = """
+    SELECT id, date, first_value(id) OVER (PARTITION BY user_id, date ORDER BY created_at, id) AS keep
+    FROM reports
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"""
+        UPDATE report_items AS ri
+        SET report_id = d.keep
+        FROM ({DUPLICATES}) AS d
+        WHERE ri.report_id = d.id AND ri.report_date = d.date AND d.id <> d.keep
+    """)
+    op.execute(f"""
+        DELETE FROM reports AS r
+        USING ({DUPLICATES}) AS d
+        WHERE r.id = d.id AND r.date = d.date AND d.id <> d.keep
+    """)
+    op.create_unique_constraint('uq_reports_user_id_date', 'reports', ['user_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_reports_user_id_date', 'reports', type_='unique')
@@ -0,0 +1,30 @@
+"""extend reports index with id for keyset pagination
+
+Revision ID: d9b3f6c27a81
+Revises: c41e8a7d5f02
+Create Date: 2025-11-15 11:37:48.216904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3f6c27a81'
+down_revision: Union[str, Sequence[str], None] = 'c41e8a7d5f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (user_id, date, id) serves both the date-range scans and the (date, id) seek of the history pages
+    op.create_index('ix_reports_user_id_date_id', 'reports', ['user_id', 'date', 'id'], unique=False)
+    op.drop_index('ix_reports_user_id_date', table_name='reports')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_reports_user_id_date', 'reports', ['user_id', 'date'], unique=False)
+    op.drop_index('ix_reports_user_id_date_id', table_name='reports')
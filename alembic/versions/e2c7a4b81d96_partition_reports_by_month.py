@@ -0,0 +1,129 @@
+"""partition reports and report_items by month
+
+Revision ID: e2c7a4b81d96
+Revises: d9b3f6c27a81
+Create Date: 2025-11-16 16:12:05.471238
+
+Rebuilds both tables as range-partitioned parents (``reports`` on ``date``,
+``report_items`` on the new ``report_date`` column) and copies the rows over.
+The copy rewrites both tables: run it in a maintenance window.
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from solomia.core import partitions
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c7a4b81d96'
+down_revision: Union[str, Sequence[str], None] = 'd9b3f6c27a81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _rename_legacy(suffix: str) -> None:
+    op.execute(f"ALTER TABLE report_items RENAME TO report_items{suffix}")
+    op.execute(f"ALTER TABLE reports RENAME TO reports{suffix}")
+    # Index names are schema-wide, free them for the new tables
+    op.execute(f"ALTER INDEX reports_pkey RENAME TO reports{suffix}_pkey")
+    op.execute(f"ALTER INDEX report_items_pkey RENAME TO report_items{suffix}_pkey")
+    op.execute(f"ALTER INDEX ix_reports_user_id_date_id RENAME TO ix_reports{suffix}_user_id_date_id")
+    op.execute(f"ALTER INDEX ix_report_items_report_id RENAME TO ix_report_items{suffix}_report_id")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rename_legacy("_legacy")
+
+    op.execute("""
+        CREATE TABLE reports (
+            id UUID NOT NULL,
+            user_id UUID REFERENCES users (id) ON DELETE CASCADE,
+            date DATE NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    op.create_index('ix_reports_user_id_date_id', 'reports', ['user_id', 'date', 'id'], unique=False)
+
+    op.execute("""
+        CREATE TABLE report_items (
+            id UUID NOT NULL,
+            report_id UUID,
+            report_date DATE NOT NULL,
+            category_id INTEGER REFERENCES food_categories (id) ON DELETE SET NULL,
+            product_name VARCHAR NOT NULL,
+            amount_grams DOUBLE PRECISION,
+            PRIMARY KEY (id, report_date),
+            FOREIGN KEY (report_id, report_date) REFERENCES reports (id, date) ON DELETE CASCADE
+        ) PARTITION BY RANGE (report_date)
+    """)
+    op.create_index(op.f('ix_report_items_report_id'), 'report_items', ['report_id'], unique=False)
+
+    # One partition per month that has data, up to the months ahead, plus the defaults
+    first = op.get_bind().execute(sa.text("SELECT min(date) FROM reports_legacy")).scalar()
+    today = date.today()
+    month = partitions.month_start(min(first or today, today))
+    last = partitions.months_to_create(today)[-1]
+    for table in partitions.PARTITIONED_TABLES:
+        op.execute(partitions.default_partition_sql(table))
+    while month <= last:
+        for table in partitions.PARTITIONED_TABLES:
+            op.execute(partitions.create_partition_sql(table, month))
+        month = partitions.add_months(month, 1)
+
+    op.execute("""
+        INSERT INTO reports (id, user_id, date, created_at)
+        SELECT id, user_id, date, created_at FROM reports_legacy
+    """)
+    # Items without a report (report_id NULL) have no date to route them by and are dropped
+    op.execute("""
+        INSERT INTO report_items (id, report_id, report_date, category_id, product_name, amount_grams)
+        SELECT ri.id, ri.report_id, r.date, ri.category_id, ri.product_name, ri.amount_grams
+        FROM report_items_legacy AS ri
+        JOIN reports_legacy AS r ON r.id = ri.report_id
+    """)
+    op.drop_table('report_items_legacy')
+    op.drop_table('reports_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_legacy("_partitioned")
+
+    op.create_table('reports',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_reports_user_id_date_id', 'reports', ['user_id', 'date', 'id'], unique=False)
+    op.create_table('report_items',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('report_id', sa.UUID(), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('amount_grams', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['food_categories.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['report_id'], ['reports.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_report_items_report_id'), 'report_items', ['report_id'], unique=False)
+
+    op.execute("""
+        INSERT INTO reports (id, user_id, date, created_at)
+        SELECT id, user_id, date, created_at FROM reports_partitioned
+    """)
+    op.execute("""
+        INSERT INTO report_items (id, report_id, category_id, product_name, amount_grams)
+        SELECT id, report_id, category_id, product_name, amount_grams FROM report_items_partitioned
+    """)
+    # Dropping a partitioned parent drops its partitions
+    op.execute("DROP TABLE report_items_partitioned")
+    op.execute("DROP TABLE reports_partitioned")
@@ -0,0 +1,28 @@
+"""unique food category name
+
+Revision ID: f5a1c9e3b7d4
+Revises: e2c7a4b81d96
+Create Date: 2025-11-17 10:48:33.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a1c9e3b7d4'
+down_revision: Union[str, Sequence[str], None] = 'e2c7a4b81d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Seeding upserts by name; fails if the table already holds duplicate names
+    op.create_unique_constraint('uq_food_categories_name', 'food_categories', ['name'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_food_categories_name', 'food_categories', type_='unique')
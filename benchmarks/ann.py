@@ -0,0 +1,126 @@
+"""
+Recall and latency of the IVF example index against brute force.
+
+Builds :class:`solomia.services.ann_index.IVFIndex` over clustered synthetic
+embeddings (no database or network needed), then for every query compares
+the approximate top-k with the exact top-k over the same vectors. Writes one
+JSON line per (examples, n_probe) with latency percentiles for both searches,
+neighbour recall@k and how often the k-NN category vote agrees:
+
+    python -m benchmarks.ann --examples 10000 100000 1000000 --probes 4 8 16
+
+Compare two runs with ``python -m benchmarks.compare old.jsonl new.jsonl``.
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from benchmarks.run import git_commit
+from solomia.services.ann_index import IVFIndex, vote
+
+
+def clustered_embeddings(n_examples: int, n_categories: int, dim: int, noise: float, seed: int = 0):
+    """Examples scattered around one random center per category. Returns (vectors, categories, centers)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_categories, dim)).astype(np.float32)
+    categories = rng.integers(0, n_categories, n_examples)
+    vectors = np.empty((n_examples, dim), dtype=np.float32)
+    for start in range(0, n_examples, 65536):
+        chunk = categories[start:start + 65536]
+        vectors[start:start + len(chunk)] = centers[chunk] + noise * rng.standard_normal((len(chunk), dim))
+    return vectors, categories, centers
+
+
+def percentiles(timings: list[float]) -> dict:
+    arr = np.asarray(timings) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 4),
+        "p99_ms": round(float(np.percentile(arr, 99)), 4),
+    }
+
+
+def run_scale(n_examples: int, n_categories: int, dim: int, probes: list[int], queries: int, k: int,
+              noise: float) -> list[dict]:
+    vectors, categories, centers = clustered_embeddings(n_examples, n_categories, dim, noise)
+
+    start = time.perf_counter()
+    # Labels are example rows, so neighbour sets can be compared exactly
+    index = IVFIndex.build(vectors, np.arange(n_examples))
+    build_s = time.perf_counter() - start
+    del vectors
+
+    rng = np.random.default_rng(1)
+    query_categories = rng.integers(0, n_categories, queries)
+    query_vectors = centers[query_categories] + noise * rng.standard_normal((queries, dim)).astype(np.float32)
+
+    exact, exact_timings = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        exact.append(index.exact_search(query, k=k))
+        exact_timings.append(time.perf_counter() - start)
+
+    results = []
+    for n_probe in probes:
+        timings, recall, agreement = [], [], []
+        for query, (exact_rows, exact_scores) in zip(query_vectors, exact):
+            start = time.perf_counter()
+            rows, scores = index.search(query, k=k, n_probe=n_probe)
+            timings.append(time.perf_counter() - start)
+
+            recall.append(len(set(rows.tolist()) & set(exact_rows.tolist())) / k)
+            agreement.append(vote(categories[rows], scores)[0] == vote(categories[exact_rows], exact_scores)[0])
+
+        results.append({
+            "benchmark": "ann_search",
+            "examples": n_examples,
+            "categories": n_categories,
+            "dim": dim,
+            "n_lists": index.n_lists,
+            "n_probe": n_probe,
+            "k": k,
+            "queries": queries,
+            "build_s": round(build_s, 2),
+            **percentiles(timings),
+            "brute_force_p50_ms": percentiles(exact_timings)["p50_ms"],
+            "recall_at_k": round(float(np.mean(recall)), 4),
+            "vote_agreement": round(float(np.mean(agreement)), 4),
+        })
+    return results
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--categories", type=int, help="default: one category per 20 examples, at most 5000")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=0.6, help="spread of examples around their category")
+    parser.add_argument("--output", help="append JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "date": date.today().isoformat(),
+    }
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for n_examples in args.examples:
+            print(f"⏱️  {n_examples} examples", file=sys.stderr)
+            for record in run_scale(n_examples, args.categories or min(5000, max(1, n_examples // 20)), args.dim,
+                                    args.probes, args.queries, args.k, args.noise):
+                out.write(json.dumps({**meta, **record}) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files produced by ``benchmarks.run``.
+
+    python -m benchmarks.compare baseline.jsonl candidate.jsonl --tolerance 0.10
+
+Rows are matched on benchmark name and scale. Exits with status 1 when a p50
+or p99 latency, or the DB round trips, got worse by more than the tolerance.
+"""
+import argparse
+import json
+import sys
+
+SCALE_KEYS = ("benchmark", "categories", "examples", "report_size")
+METRICS = ("p50_ms", "p99_ms", "round_trips_per_op")
+
+
+def load(path: str) -> dict[tuple, dict]:
+    """Load results keyed by scale; later lines win over earlier ones."""
+    rows = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            rows[tuple(row.get(k) for k in SCALE_KEYS)] = row
+    return rows
+
+
+def compare(baseline: dict, candidate: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key, new in sorted(candidate.items(), key=lambda kv: str(kv[0])):
+        old = baseline.get(key)
+        if not old:
+            continue
+        label = " ".join(f"{k}={v}" for k, v in zip(SCALE_KEYS, key) if v is not None)
+        for metric in METRICS:
+            before, after = old.get(metric), new.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            marker = "🔴" if change > tolerance else "🟢"
+            print(f"{marker} {label:60s} {metric:18s} {before:10.2f} → {after:10.2f} ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"{label} {metric}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    regressions = compare(load(args.baseline), load(args.candidate), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) above {args.tolerance:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Accuracy, memory and latency of reduced and quantized embeddings against the full vectors.
+
+Every (dimension, storage) pair is compared with the full-size float32
+vectors on the same corpus and queries:
+
+* ``recall_at_k``: overlap of the k nearest examples with the full-precision ones;
+* ``vote_agreement``: how often the k-NN category vote picks the same category;
+* ``accuracy``: how often it picks the query's true category;
+* ``stored_bytes``: bytes per vector in Postgres (4 per dimension for pgvector,
+  2 for float16, 1 plus a 4-byte scale for int8);
+* ``index_mb``: the in-memory float32 matrix;
+* ``p50_ms``/``p99_ms``: brute-force scoring of one query.
+
+By default the corpus is synthetic: clustered vectors whose variance decays
+along the dimensions, the way Matryoshka embeddings concentrate it in the
+prefix. ``--from-db`` uses the learned example embeddings in the database
+instead, with the last ``--queries`` examples as queries:
+
+    python -m benchmarks.embeddings --dims 768 512 256 128 --storages vector float16 int8
+    python -m benchmarks.embeddings --from-db --output embeddings.jsonl
+
+Compare two runs with ``python -m benchmarks.compare old.jsonl new.jsonl``.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+from benchmarks.ann import clustered_embeddings, percentiles
+from benchmarks.run import git_commit
+from solomia.services import embedding_codec
+from solomia.services.ann_index import vote
+
+STORED_BYTES = {"vector": lambda dim: 4 * dim, "float16": lambda dim: 2 * dim, "int8": lambda dim: dim + 4}
+
+
+def matryoshka_embeddings(n_examples: int, n_categories: int, dim: int, noise: float, queries: int, seed: int = 0):
+    """
+    Synthetic corpus and queries whose information is front-loaded like Matryoshka embeddings.
+
+    Returns:
+        tuple: (corpus, corpus categories, queries, query categories).
+    """
+    vectors, categories, centers = clustered_embeddings(n_examples, n_categories, dim, noise, seed)
+    decay = (1.0 / np.sqrt(1.0 + np.arange(dim) / 32.0)).astype(np.float32)
+    rng = np.random.default_rng(seed + 1)
+    query_categories = rng.integers(0, n_categories, queries)
+    query_vectors = centers[query_categories] + noise * rng.standard_normal((queries, dim)).astype(np.float32)
+    return vectors * decay, categories, query_vectors * decay, query_categories
+
+
+async def database_embeddings(queries: int):
+    """Learned example embeddings from the database, split into corpus and queries."""
+    from solomia.core.db import get_read_session_factory, get_session_factory
+    from solomia.repository.category_repository import FoodCategoryRepository
+    from solomia.services.category_index import row_vector
+
+    rows = await FoodCategoryRepository(get_session_factory(), get_read_session_factory()).get_example_embeddings()
+    vectors = [(row["category_id"], row_vector(row)) for row in rows]
+    vectors = [(category_id, vector) for category_id, vector in vectors if vector is not None]
+    if len(vectors) <= queries:
+        raise SystemExit(f"❌ Only {len(vectors)} example embeddings, need more than --queries {queries}")
+    dim = min(len(vector) for _, vector in vectors)
+    matrix = embedding_codec.fit(np.stack([embedding_codec.fit(v, dim) for _, v in vectors]), dim)
+    categories = np.asarray([category_id for category_id, _ in vectors])
+    return matrix[:-queries], categories[:-queries], matrix[-queries:], categories[-queries:]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _top_k(matrix: np.ndarray, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
+
+
+def run(corpus: np.ndarray, categories: np.ndarray, queries: np.ndarray, query_categories: np.ndarray,
+        dims: list[int], storages: list[str], k: int) -> list[dict]:
+    full_dim = corpus.shape[1]
+    full = _normalize(corpus.astype(np.float32))
+    full_queries = _normalize(queries.astype(np.float32))
+    reference = [_top_k(full, query, k) for query in full_queries]
+
+    results = []
+    for dim in dims:
+        if dim > full_dim:
+            continue
+        reduced = embedding_codec.fit(full, dim)
+        reduced_queries = embedding_codec.fit(full_queries, dim)
+        for storage in storages:
+            if storage == "vector":
+                matrix = reduced
+            else:
+                matrix = embedding_codec.dequantize(*embedding_codec.quantize(reduced, storage))
+            matrix = _normalize(np.ascontiguousarray(matrix, dtype=np.float32))
+
+            timings, recall, agreement, correct = [], [], [], []
+            for query, true_category, (exact_rows, exact_scores) in zip(reduced_queries, query_categories, reference):
+                start = time.perf_counter()
+                rows, scores = _top_k(matrix, query, k)
+                timings.append(time.perf_counter() - start)
+
+                recall.append(len(set(rows.tolist()) & set(exact_rows.tolist())) / k)
+                winner = vote(categories[rows], scores)[0]
+                agreement.append(winner == vote(categories[exact_rows], exact_scores)[0])
+                correct.append(winner == true_category)
+
+            results.append({
+                "benchmark": "embedding_storage",
+                "examples": len(corpus),
+                "queries": len(queries),
+                "full_dim": full_dim,
+                "dim": dim,
+                "storage": storage,
+                "k": k,
+                "stored_bytes": STORED_BYTES[storage](dim),
+                "index_mb": round(matrix.nbytes / 2 ** 20, 2),
+                **percentiles(timings),
+                "recall_at_k": round(float(np.mean(recall)), 4),
+                "vote_agreement": round(float(np.mean(agreement)), 4),
+                "accuracy": round(float(np.mean(correct)), 4),
+            })
+    return results
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--examples", type=int, default=50000, help="synthetic corpus size")
+    parser.add_argument("--categories", type=int, default=500, help="synthetic categories")
+    parser.add_argument("--full-dim", type=int, default=768, help="synthetic full embedding size")
+    parser.add_argument("--noise", type=float, default=0.6, help="spread of examples around their category")
+    parser.add_argument("--from-db", action="store_true", help="use the learned example embeddings instead")
+    parser.add_argument("--dims", type=int, nargs="+", default=[768, 512, 256, 128])
+    parser.add_argument("--storages", nargs="+", choices=embedding_codec.STORAGES, default=list(embedding_codec.STORAGES))
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--output", help="append JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.from_db:
+        data = asyncio.run(database_embeddings(args.queries))
+    else:
+        data = matryoshka_embeddings(args.examples, args.categories, args.full_dim, args.noise, args.queries)
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "date": date.today().isoformat(),
+    }
+    print(f"⏱️  {len(data[0])} examples, {len(data[2])} queries", file=sys.stderr)
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in run(*data, args.dims, args.storages, args.k):
+            out.write(json.dumps({**meta, **record}) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
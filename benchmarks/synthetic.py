@@ -0,0 +1,225 @@
+"""
+Synthetic data and deterministic Gemini stand-ins for the benchmark suite.
+
+Every product and category name carries a key token (``k00042``). The fake
+embedder weights that token heavily, so a product is close to its category
+in embedding space without any network call, and the fake LLM can answer
+classification and parsing prompts by reading keys back out of the prompt.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+EMBEDDING_DIM = 768
+KEY_WEIGHT = 1.0
+NOISE_WEIGHT = 0.15
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_KEY_RE = re.compile(r"\b[ku]\d{5}\b")
+
+
+@dataclass
+class SyntheticCategory:
+    key: str
+    name: str
+    examples: list[str] = field(default_factory=list)
+
+
+@lru_cache(maxsize=65536)
+def _token_vector(token: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+    vec = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype(np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def fake_embed(text: str) -> np.ndarray:
+    """
+    Deterministic bag-of-tokens embedding.
+
+    Key tokens (``k00042``/``u00042``) dominate the vector, every other token
+    only adds a little noise, so cosine similarity tracks the category key.
+    """
+    vec = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in _TOKEN_RE.findall(text.lower()):
+        weight = KEY_WEIGHT if _KEY_RE.fullmatch(token) else NOISE_WEIGHT
+        vec += weight * _token_vector(token)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+async def fake_embedder(text: str) -> np.ndarray:
+    """Async drop-in for ``category_service.get_embedding``."""
+    return fake_embed(text)
+
+
+def category_key(index: int) -> str:
+    return f"k{index:05d}"
+
+
+def build_taxonomy(n_categories: int, n_examples: int) -> list[SyntheticCategory]:
+    """
+    Build ``n_categories`` categories sharing ``n_examples`` examples in total.
+
+    Args:
+        n_categories (int): Number of categories (10 .. 10k).
+        n_examples (int): Total number of examples across all categories (up to 1M).
+
+    Returns:
+        list[SyntheticCategory]: Categories with deterministic names and examples.
+    """
+    per_category = max(1, n_examples // n_categories)
+    categories = []
+    for i in range(n_categories):
+        key = category_key(i)
+        categories.append(SyntheticCategory(
+            key=key,
+            name=f"Category {key}",
+            examples=[f"{key} sample {j}" for j in range(per_category)],
+        ))
+    return categories
+
+
+def category_embedding(category: SyntheticCategory) -> np.ndarray:
+    """Embedding stored for a seeded category (name plus its key token)."""
+    return fake_embed(f"{category.name}: {category.key}")
+
+
+class ProductSampler:
+    """
+    Deterministic stream of product names for reports.
+
+    Three kinds of products are produced:
+        - ``exact``: an existing example, answered by ``get_by_example``;
+        - ``near``: a new name with a known key, answered by embeddings;
+        - ``unknown``: a key outside the taxonomy, forcing the LLM fallback.
+    """
+
+    def __init__(self, taxonomy: list[SyntheticCategory], seed: int = 0,
+                 exact_share: float = 0.5, unknown_share: float = 0.1):
+        self.taxonomy = taxonomy
+        self.rng = random.Random(seed)
+        self.exact_share = exact_share
+        self.unknown_share = unknown_share
+        self._counter = 0
+
+    def product(self) -> str:
+        self._counter += 1
+        roll = self.rng.random()
+        if roll < self.unknown_share:
+            return f"u{self._counter % 100000:05d} novel {self._counter}"
+        category = self.rng.choice(self.taxonomy)
+        if roll < self.unknown_share + self.exact_share:
+            return self.rng.choice(category.examples)
+        return f"{category.key} fresh {self._counter}"
+
+    def report(self, size: int) -> list[dict]:
+        return [
+            {"product_name": self.product(), "amount_grams": float(self.rng.randint(20, 300))}
+            for _ in range(size)
+        ]
+
+    def report_text(self, size: int) -> str:
+        return "\n".join(f"{p['product_name']} - {p['amount_grams']:.0f} г" for p in self.report(size))
+
+
+# =====================
+# FAKE GEMINI
+# =====================
+_NUMBERED_LINE_RE = re.compile(r"^(\d+):\s*(.+?)\s*$", re.MULTILINE)
+_REPORT_LINE_RE = re.compile(r"^(.+?)\s+-\s+(\d+(?:\.\d+)?)\s*г\s*$", re.MULTILINE)
+
+
+def _category_refs(categories_part: str) -> tuple[list[int], dict[str, int]]:
+    refs, by_key = [], {}
+    for ref, name in _NUMBERED_LINE_RE.findall(categories_part):
+        refs.append(int(ref))
+        keys = _KEY_RE.findall(name)
+        if keys:
+            by_key[keys[0]] = int(ref)
+    return refs, by_key
+
+
+def _fake_category(product: str, refs: list[int], by_key: dict[str, int]) -> int | None:
+    keys = _KEY_RE.findall(product)
+    key = keys[0] if keys else product
+    if key in by_key:
+        return by_key[key]
+    if not refs:
+        return None
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=4).digest()
+    return refs[int.from_bytes(digest, "little") % len(refs)]
+
+
+def fake_llm_answer(prompt: str) -> str:
+    """
+    Answer the prompts built by :mod:`solomia.services.prompts`.
+
+    Classification maps every product to the category with the same key or,
+    for unknown keys, to a category chosen by a stable hash of the key, in the
+    ``[{"p": ..., "c": ...}]`` shape of ``CLASSIFICATION_SCHEMA``.
+    Parsing turns ``"<product> - <grams> г"`` lines into ``REPORT_SCHEMA`` items,
+    plus ``category_id`` when the prompt lists categories (one-shot mode).
+    """
+    if "Report:" in prompt:
+        head, report = prompt.split("Report:", 1)
+        refs, by_key = _category_refs(head.partition("Categories:")[2])
+        items = []
+        for name, grams in _REPORT_LINE_RE.findall(report):
+            item = {"product_name": name.strip(), "amount_grams": float(grams)}
+            if "Categories:" in head:
+                item["category_id"] = _fake_category(name, refs, by_key)
+            items.append(item)
+        return json.dumps(items, ensure_ascii=False)
+
+    categories_part, _, products_part = prompt.partition("Products:")
+    refs, by_key = _category_refs(categories_part)
+    answer = [
+        {"p": int(position), "c": _fake_category(product, refs, by_key)}
+        for position, product in _NUMBERED_LINE_RE.findall(products_part)
+    ]
+    return json.dumps(answer, ensure_ascii=False)
+
+
+class FakeGenerativeModel:
+    """Stand-in for ``genai.GenerativeModel`` backed by :func:`fake_llm_answer`."""
+
+    def __init__(self, model_name: str = "fake", **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        prompt = str(prompt)
+        text = fake_llm_answer(prompt)
+        # Rough token estimate (about 4 characters per token) so token metrics move
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(text) // 4)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+def fake_embed_content(model: str, content: str | list[str], task_type: str | None = None, **kwargs) -> dict:
+    """Stand-in for ``genai.embed_content`` (a list of texts gets a list of vectors, like the real API)."""
+    if isinstance(content, list):
+        return {"embedding": [fake_embed(text).tolist() for text in content]}
+    return {"embedding": fake_embed(content).tolist()}
+
+
+@contextmanager
+def fake_gemini():
+    """Route every ``google.generativeai`` call in the process to the fakes."""
+    import google.generativeai as genai
+    from solomia.services import gemini
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.dict(os.environ, {"GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "fake"}))
+        stack.enter_context(mock.patch.dict(gemini._models, clear=True))
+        stack.enter_context(mock.patch.object(genai, "configure", lambda **kwargs: None))
+        stack.enter_context(mock.patch.object(genai, "GenerativeModel", FakeGenerativeModel))
+        stack.enter_context(mock.patch.object(genai, "embed_content", fake_embed_content))
+        yield
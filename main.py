@@ -1,9 +1,23 @@
 import asyncio
-from solomia.core.handlers import dp, bot
+from solomia.config import METRICS_HOST, METRICS_PORT
+from solomia.core.api import app, build_server
+from solomia.core.container import AppContainer
 
 async def main():
     print("🤖 Bot is starting...")
-    await dp.start_polling(bot)
+    container = AppContainer()
+    app.state.container = container
+
+    # /metrics and /ready are served while the container warms up
+    server = build_server(METRICS_HOST, METRICS_PORT)
+    server_task = asyncio.create_task(server.serve())
+    try:
+        await container.startup()
+        await container.dp.start_polling(container.bot)
+    finally:
+        await container.shutdown()
+        server.should_exit = True
+        await server_task
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -1,11 +1,8 @@
-import asyncio
-from solomia.core.db import engine
-from sqlalchemy import text
+from solomia.core.db import get_engine
 from solomia.services.category_service import find_best_category, classify_with_llm
+from solomia.core import profiling
 
 
-THRESHOLD = 0.75  # below this → product probably not found
-
 def clean_text(text: str) -> str:
     return text.encode("utf-8", "surrogatepass").decode("utf-8", "ignore")
 
@@ -20,16 +17,12 @@ async def main():
       break
 
     try:
-      async with engine.connect() as conn:
+      async with get_engine().connect() as conn:
         product = clean_text(product).strip()
         category, score, is_known = await find_best_category(conn, product)
 
       if not is_known:
-        async with engine.connect() as conn:
-          categories_res = await conn.execute(text("SELECT name FROM food_categories"))
-          categories = [row[0] for row in categories_res.all()]
-
-        predicted = await classify_with_llm(product, categories)
+        predicted = await classify_with_llm([product])
         print(f"LLM classified: {predicted}")
       else:
         print(f"✅ Категорія: {category} ({score:.2f})")
@@ -40,4 +33,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    profiling.run(main(), "classify_product")
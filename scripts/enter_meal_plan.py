@@ -1,9 +1,9 @@
-import asyncio
-from solomia.core.db import SessionFactory
+from solomia.core.db import get_session_factory
 
 from solomia.repository.user_repository import UserRepository
 from solomia.repository.category_repository import FoodCategoryRepository
 from solomia.models.category_to_user import CategoryToUser
+from solomia.core import profiling
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,7 +11,7 @@ from sqlalchemy.orm import selectinload
 
 async def show_user_plan(session: AsyncSession, telegram_id: str):
     """Показує категорії користувача з вагами"""
-    user_repo = UserRepository(SessionFactory)
+    user_repo = UserRepository(get_session_factory())
     user_id = await user_repo.get_id_by_telegram_id(telegram_id)
     if not user_id:
         print("❌ Користувач не знайдений.")
@@ -40,7 +40,7 @@ async def show_user_plan(session: AsyncSession, telegram_id: str):
 async def edit_user_plan(session: AsyncSession, user_id):
     """Редагує або додає ваги для всіх категорій"""
     # Отримуємо всі категорії з таблиці FoodCategory
-    category_repo = FoodCategoryRepository(SessionFactory)
+    category_repo = FoodCategoryRepository(get_session_factory())
     categories = await category_repo.get_all()  # очікується list[FoodCategory]
 
     # Отримуємо поточні значення користувача
@@ -78,7 +78,8 @@ async def edit_user_plan(session: AsyncSession, user_id):
 
 async def main():
     telegram_id = input("Введи telegram_id користувача: ").strip()
-    async with SessionFactory() as session:
+    session_factory = get_session_factory()
+    async with session_factory() as session:
         user_id = await show_user_plan(session, telegram_id)
         if not user_id:
             return
@@ -91,4 +92,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    profiling.run(main(), "enter_meal_plan")
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Replay a labeled product set against the classification cascade.
+
+For every combination of thresholds, reports how many products would still go
+to the LLM, how accurate the local decisions are, and the decision latency:
+
+    python -m scripts.evaluate_cascade labeled.csv \\
+        --min-score 0.7 0.75 0.8 --min-margin 0 0.02 0.05 --output cascade.jsonl
+
+The labeled file is a CSV with ``product_name,category`` columns (or JSON lines
+with the same keys). Product embeddings are fetched once and reused for every
+setting, so the reported latency is the local decision only; ``expected_ms``
+adds ``--llm-latency-ms`` for each LLM fallback.
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+
+from solomia.core import profiling
+from solomia.core.lazy import lazy_import
+from solomia.services import cascade
+from solomia.services.category_service import get_embedding, get_index
+
+np = lazy_import("numpy")
+
+
+def load_labeled(path: str) -> list[tuple[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [(row["product_name"].strip(), row["category"].strip()) for row in rows if row.get("product_name")]
+
+
+async def evaluate(labeled: list[tuple[str, str]], configs: list[cascade.CascadeConfig],
+                   llm_latency_ms: float, llm_accuracy: float) -> list[dict]:
+    """
+    Run every config over the labeled products.
+
+    Args:
+        labeled (list[tuple[str, str]]): (product name, expected category) pairs.
+        configs (list[cascade.CascadeConfig]): Threshold settings to compare.
+        llm_latency_ms (float): Assumed cost of one LLM fallback.
+        llm_accuracy (float): Assumed accuracy of LLM fallbacks, for ``expected_accuracy``.
+
+    Returns:
+        list[dict]: One summary per config.
+    """
+    index = await get_index()
+
+    embeddings = {}
+    for name, _ in labeled:
+        embeddings[name] = await get_embedding(name)
+
+    async def cached_embedder(text: str):
+        return embeddings[text]
+
+    results = []
+    for config in configs:
+        timings, sources = [], {}
+        correct = resolved = 0
+        for name, expected in labeled:
+            start = time.perf_counter()
+            decision = await cascade.decide(name, index, cached_embedder, config)
+            timings.append(time.perf_counter() - start)
+
+            sources[decision.source] = sources.get(decision.source, 0) + 1
+            if decision.resolved:
+                resolved += 1
+                correct += decision.category == expected
+
+        n = len(labeled)
+        llm_rate = (n - resolved) / n
+        decision_ms = np.asarray(timings) * 1000
+        results.append({
+            "config": config.label(),
+            "min_score": config.min_score,
+            "min_margin": config.min_margin,
+            "confident_score": config.confident_score,
+            "lexical": config.lexical,
+            "products": n,
+            "llm_rate": round(llm_rate, 4),
+            "local_accuracy": round(correct / resolved, 4) if resolved else None,
+            "local_errors": resolved - correct,
+            "expected_accuracy": round((correct + llm_accuracy * (n - resolved)) / n, 4),
+            "decision_p50_ms": round(float(np.percentile(decision_ms, 50)), 3),
+            "decision_p99_ms": round(float(np.percentile(decision_ms, 99)), 3),
+            "expected_ms": round(float(decision_ms.mean()) + llm_rate * llm_latency_ms, 1),
+            "sources": sources,
+        })
+    return results
+
+
+def print_table(results: list[dict]):
+    print(f"{'config':45s} {'LLM %':>6s} {'local acc':>9s} {'errors':>6s} {'exp acc':>7s} {'p50 ms':>7s} {'exp ms':>7s}")
+    for r in results:
+        local = f"{r['local_accuracy']:.3f}" if r["local_accuracy"] is not None else "-"
+        print(f"{r['config']:45s} {r['llm_rate'] * 100:6.1f} {local:>9s} {r['local_errors']:6d} "
+              f"{r['expected_accuracy']:7.3f} {r['decision_p50_ms']:7.3f} {r['expected_ms']:7.1f}")
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("labeled", help="CSV or JSON lines with product_name and category")
+    parser.add_argument("--min-score", type=float, nargs="+", default=[0.7, 0.75, 0.8, 0.85])
+    parser.add_argument("--min-margin", type=float, nargs="+", default=[0.0, 0.02, 0.05])
+    parser.add_argument("--confident-score", type=float, nargs="+", default=[1.01])
+    parser.add_argument("--no-lexical", action="store_true", help="also evaluate without the lexical stage")
+    parser.add_argument("--skip-known", action="store_true",
+                        help="drop products that are already exact examples (they always resolve)")
+    parser.add_argument("--llm-latency-ms", type=float, default=2500.0)
+    parser.add_argument("--llm-accuracy", type=float, default=1.0)
+    parser.add_argument("--output", help="append JSON lines here")
+    args = parser.parse_args(argv)
+
+    labeled = load_labeled(args.labeled)
+    if args.skip_known:
+        index = await get_index()
+        labeled = [(name, category) for name, category in labeled if index.by_example(name) is None]
+    if not labeled:
+        print("❌ No labeled products to evaluate.")
+        return
+
+    configs = [
+        cascade.CascadeConfig(min_score=s, min_margin=m, confident_score=c, lexical=lexical)
+        for s, m, c, lexical in itertools.product(
+            args.min_score, args.min_margin, args.confident_score, [True, False] if args.no_lexical else [True]
+        )
+    ]
+    print(f"🔍 Evaluating {len(configs)} settings on {len(labeled)} products...", file=sys.stderr)
+    results = await evaluate(labeled, configs, args.llm_latency_ms, args.llm_accuracy)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as out:
+            for record in results:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    profiling.run(main(), "evaluate_cascade")
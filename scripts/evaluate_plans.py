@@ -0,0 +1,68 @@
+"""
+Evaluate every user's intake against their plan, in batches.
+
+Meant for the nightly job: writes one JSON line per (user, period) with the
+per-category eaten/planned ratio and how many days were under, balanced or
+over plan:
+
+    python -m scripts.evaluate_plans --period week --end 2025-11-16 --output weekly.jsonl
+    python -m scripts.evaluate_plans --period month --output monthly.jsonl
+
+Each batch of ``--batch-size`` users costs three queries, independent of the
+number of days.
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from solomia.core import profiling, tracing
+from solomia.core.db import get_read_session_factory, get_session_factory
+from solomia.repository.plan_repository import PlanRepository
+from solomia.services import plan_evaluation
+
+
+def period_range(period: str, end: date) -> tuple[date, date]:
+    """The week (Monday..end) or month (1st..end) that ``end`` falls in."""
+    if period == "week":
+        return end - timedelta(days=end.weekday()), end
+    if period == "month":
+        return end.replace(day=1), end
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--period", choices=["week", "month"], default="week")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="last day (default: today)")
+    parser.add_argument("--start", type=date.fromisoformat,
+                        help="first day (default: start of the period containing --end)")
+    parser.add_argument("--batch-size", type=int, default=plan_evaluation.BATCH_SIZE)
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    args = parser.parse_args(argv)
+
+    start, end = period_range(args.period, args.end)
+    start = args.start or start
+    if start > end:
+        parser.error("--start is after --end")
+
+    tracing.init_tracing("solomia-evaluate-plans")
+    repo = PlanRepository(get_session_factory(), get_read_session_factory())
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    users = 0
+    try:
+        async for evaluation in plan_evaluation.iter_evaluations(repo, start, end, args.batch_size):
+            with tracing.stage("summarize", users=len(evaluation.user_ids)):
+                for record in evaluation.summary(args.period):
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            users += len(evaluation.user_ids)
+            print(f"📊 {users} users evaluated", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        tracing.shutdown_tracing()
+    print(f"✅ Done: {users} users, {start} – {end}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    profiling.run(main(), "evaluate_plans")
@@ -0,0 +1,234 @@
+"""
+Bulk export and import of food logs.
+
+Export streams reports joined with their items through a server-side cursor,
+so memory stays flat however much history there is:
+
+    python -m scripts.food_logs export logs.csv --start 2024-01-01
+    python -m scripts.food_logs export logs.parquet --telegram-id 12345678     # needs pyarrow
+
+Import loads logs from other trackers (CSV or Parquet with a date, a product
+name and an optional amount in grams per row). Distinct products are
+classified through the batch path (local cascade, then the LLM in batches),
+and rows are bulk-loaded with COPY, one transaction per ``--batch-size`` rows:
+
+    python -m scripts.food_logs import history.csv --telegram-id 12345678 \\
+        --date-column Date --product-column Food --amount-column Grams --date-format %d.%m.%Y
+
+Without ``--telegram-id`` every row needs a ``telegram_id`` column (as in the
+export), so an export can be imported into another database as is. If an
+import fails, the batches already loaded stay; the output says how many rows
+that is, so the rest of the file can be imported on its own.
+"""
+import argparse
+import csv
+import sys
+from datetime import date, datetime
+from typing import AsyncIterator, Iterator
+
+from solomia.core import profiling
+from solomia.core.db import get_read_session_factory, get_session_factory
+from solomia.repository.log_repository import EXPORT_COLUMNS, LogRepository
+from solomia.repository.user_repository import UserRepository
+from solomia.services import category_service
+
+BATCH_SIZE = 5000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise SystemExit("❌ Parquet support needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _format(path: str, fmt: str | None) -> str:
+    return fmt or ("parquet" if path.endswith(".parquet") else "csv")
+
+
+# =====================
+# EXPORT
+# =====================
+async def export_logs(path: str, fmt: str, start: date, end: date, telegram_id: str | None = None,
+                      batch_size: int = BATCH_SIZE) -> int:
+    """
+    Write food logs to CSV or Parquet, one streamed batch at a time.
+
+    Returns:
+        int: Rows written.
+    """
+    session_factory, read_session_factory = get_session_factory(), get_read_session_factory()
+    user_id = None
+    if telegram_id:
+        user_id = await UserRepository(session_factory, read_session_factory).get_id_by_telegram_id(telegram_id)
+        if user_id is None:
+            raise SystemExit(f"❌ No user with telegram id {telegram_id}")
+
+    logs = LogRepository(session_factory, read_session_factory)
+    rows = 0
+    if fmt == "parquet":
+        pa = _pyarrow()
+        schema = pa.schema([
+            ("telegram_id", pa.string()), ("date", pa.date32()), ("product_name", pa.string()),
+            ("amount_grams", pa.float64()), ("category_id", pa.int32()), ("category", pa.string()),
+        ])
+        with pa.parquet.ParquetWriter(path, schema) as writer:
+            async for columns in logs.stream_log_columns(start, end, user_id, batch_size):
+                # one row group per batch
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+                rows += len(columns["telegram_id"])
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_COLUMNS)
+            async for batch in logs.stream_logs(start, end, user_id, batch_size):
+                writer.writerows(batch)
+                rows += len(batch)
+    return rows
+
+
+# =====================
+# IMPORT
+# =====================
+def read_rows(path: str, fmt: str, batch_size: int = BATCH_SIZE) -> Iterator[list[dict]]:
+    """Read an input file in batches of dicts (column name -> value)."""
+    if fmt == "parquet":
+        pa = _pyarrow()
+        for record_batch in pa.parquet.ParquetFile(path).iter_batches(batch_size):
+            yield record_batch.to_pylist()
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        batch = []
+        for row in csv.DictReader(f):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def parse_date(value, date_format: str | None) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    return datetime.strptime(value, date_format).date() if date_format else date.fromisoformat(value[:10])
+
+
+def parse_amount(value) -> float | None:
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace(",", "."))
+    except ValueError:
+        return None
+
+
+async def prepare_batches(raw_batches: Iterator[list[dict]], args, stats: dict) -> AsyncIterator[list[tuple]]:
+    """
+    Turn raw input rows into ``LogRepository.IMPORT_COLUMNS`` tuples.
+
+    Users are resolved in one query per batch, distinct products are
+    classified once for the whole import, and rows that cannot be used are
+    counted in ``stats`` instead of failing the import.
+    """
+    users = UserRepository(get_session_factory())
+    user_ids: dict[str, str | None] = {}
+    categories: dict[str, int | None] = {}
+    index = await category_service.get_index()
+
+    for raw in raw_batches:
+        rows = []
+        for row in raw:
+            name = str(row.get(args.product_column) or "").strip().lower()
+            telegram_id = args.telegram_id or str(row.get("telegram_id") or "").strip()
+            try:
+                day = parse_date(row.get(args.date_column), args.date_format)
+            except (TypeError, ValueError):
+                day = None
+            if not name or not telegram_id or day is None:
+                stats["skipped"] += 1
+                continue
+            rows.append((telegram_id, day, name, parse_amount(row.get(args.amount_column))))
+
+        missing_users = {r[0] for r in rows} - user_ids.keys()
+        if missing_users:
+            found = await users.get_ids_by_telegram_ids(list(missing_users))
+            user_ids.update({telegram_id: found.get(telegram_id) for telegram_id in missing_users})
+
+        new_products = list(dict.fromkeys(r[2] for r in rows if r[2] not in categories))
+        if new_products:
+            classified = await category_service.classify_products(new_products, use_llm=not args.no_llm)
+            categories.update({
+                name: index.id_by_name(category) if category else None for name, category in classified.items()
+            })
+            stats["products"] += len(new_products)
+
+        batch = []
+        for telegram_id, day, name, amount in rows:
+            user_id = user_ids[telegram_id]
+            if user_id is None:
+                stats["unknown_users"] += 1
+                continue
+            batch.append((user_id, day, name, amount, categories.get(name)))
+        stats["rows"] += len(batch)
+        print(f"📥 {stats['rows']} rows staged, {stats['products']} distinct products", file=sys.stderr)
+        yield batch
+
+
+async def import_logs(args) -> dict:
+    stats = {"rows": 0, "skipped": 0, "unknown_users": 0, "products": 0}
+    raw_batches = read_rows(args.path, _format(args.path, args.format), args.batch_size)
+    repo = LogRepository(get_session_factory())
+    reports = items = 0
+    # Each batch is classified before its transaction opens: no connection waits on the LLM
+    async for batch in prepare_batches(raw_batches, args, stats):
+        if batch:
+            created, inserted = await repo.bulk_import(batch)
+            reports, items = reports + created, items + inserted
+            print(f"💾 {items} items committed", file=sys.stderr)
+    return {**stats, "reports_created": reports, "items_inserted": items}
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="stream logs to CSV or Parquet")
+    export.add_argument("path")
+    export.add_argument("--format", choices=["csv", "parquet"], help="default: from the file extension")
+    export.add_argument("--telegram-id", help="only this user (default: everyone)")
+    export.add_argument("--start", type=date.fromisoformat, default=date.min)
+    export.add_argument("--end", type=date.fromisoformat, default=date.max)
+    export.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    load = commands.add_parser("import", help="bulk-load logs from CSV or Parquet")
+    load.add_argument("path")
+    load.add_argument("--format", choices=["csv", "parquet"], help="default: from the file extension")
+    load.add_argument("--telegram-id", help="owner of every row (default: the telegram_id column)")
+    load.add_argument("--date-column", default="date")
+    load.add_argument("--product-column", default="product_name")
+    load.add_argument("--amount-column", default="amount_grams")
+    load.add_argument("--date-format", help="strptime format (default: ISO 8601)")
+    load.add_argument("--no-llm", action="store_true", help="leave products the cascade cannot place unclassified")
+    load.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        rows = await export_logs(args.path, _format(args.path, args.format), args.start, args.end,
+                                 args.telegram_id, args.batch_size)
+        print(f"✅ Exported {rows} rows to {args.path}")
+    else:
+        result = await import_logs(args)
+        print(f"✅ Imported {result['items_inserted']} items into {result['reports_created']} new reports "
+              f"({result['products']} distinct products, {result['skipped']} unreadable rows, "
+              f"{result['unknown_users']} rows of unknown users)")
+
+
+if __name__ == "__main__":
+    profiling.run(main(), "food_logs")
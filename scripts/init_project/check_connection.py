@@ -1,5 +1,5 @@
-import asyncio
 from solomia.core.db import test_connection
+from solomia.core import profiling
 
 if __name__ == "__main__":
-    asyncio.run(test_connection())
+    profiling.run(test_connection(), "check_connection")
@@ -1,13 +1,13 @@
-import asyncio
-from solomia.core.db import Base, engine
+from solomia.core.db import Base, get_engine
 from solomia.models.food_category import FoodCategory  # щоб таблиця була зареєстрована
+from solomia.core import profiling
 
 async def init_models():
     print("Creating tables...")
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         # ❗️важливо — обгортка run_sync викликає sync create_all всередині async engine
         await conn.run_sync(Base.metadata.create_all)
     print("✅ Done.")
 
 if __name__ == "__main__":
-    asyncio.run(init_models())
+    profiling.run(init_models(), "db_init")
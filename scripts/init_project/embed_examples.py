@@ -0,0 +1,48 @@
+import argparse
+
+from solomia.core import profiling
+from solomia.core.db import get_session_factory
+from solomia.repository.category_repository import FoodCategoryRepository
+from solomia.services import gemini
+
+# =====================
+# BACKFILL EXAMPLE EMBEDDINGS
+# =====================
+async def embed_examples(batch_size: int = 1000):
+    """
+    Embed every ``food_categories.examples`` entry that has no row in ``category_examples`` yet.
+
+    Examples are embedded as queries ("retrieval_query"), the same way products
+    are embedded at classification time, so nearest-neighbour scores compare
+    like with like.
+
+    Args:
+        batch_size (int): Examples embedded (in batch requests) and inserted per round trip.
+    """
+    if not gemini.has_credentials():
+        raise ValueError("⚠️ Please set GOOGLE_API_KEY in your environment!")
+
+    repo = FoodCategoryRepository(get_session_factory())
+    total = 0
+    while True:
+        pending = await repo.get_examples_without_embedding(limit=batch_size)
+        if not pending:
+            break
+
+        vectors = await gemini.embed_many([row["example"] for row in pending], task_type="retrieval_query")
+        rows = [
+            {"category_id": row["category_id"], "example": row["example"], "embedding": vector}
+            for row, vector in zip(pending, vectors)
+        ]
+        await repo.insert_example_embeddings(rows)
+        total += len(rows)
+        print(f"✅ Embedded {total} examples")
+
+    print(f"🎉 Done, {total} new example embeddings.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill per-example embeddings for nearest-neighbour search")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    profiling.run(embed_examples(args.batch_size), "embed_examples")
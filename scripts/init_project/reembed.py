@@ -0,0 +1,71 @@
+"""
+Re-embed every category and learned example with the current embedding settings.
+
+Run it after changing ``EMBEDDING_DIM`` (Matryoshka output size) or
+``EMBEDDING_STORAGE`` (pgvector, float16 or int8 codes), with the same
+settings the bot uses:
+
+    EMBEDDING_DIM=256 EMBEDDING_STORAGE=int8 python -m scripts.init_project.reembed
+
+Rows are updated by id in batches, so the bot can keep running: until a row
+is rewritten it keeps its old vector, and the index truncates mixed sizes to
+the smallest one. Each batch notifies the workers to reload their index.
+"""
+import argparse
+
+from solomia.core import profiling
+from solomia.core.db import get_session_factory
+from solomia.repository.category_repository import FoodCategoryRepository
+from solomia.services import embedding_codec, gemini
+from solomia.services.category_service import category_text
+
+BATCH_SIZE = 1000
+
+
+async def reembed(batch_size: int = BATCH_SIZE, concurrency: int = gemini.EMBED_CONCURRENCY):
+    """
+    Re-embed categories (from their name and examples) and every learned example.
+
+    Args:
+        batch_size (int): Examples embedded and written per round trip.
+        concurrency (int): Embedding requests in flight.
+    """
+    if not gemini.has_credentials():
+        raise ValueError("⚠️ Please set GOOGLE_API_KEY in your environment!")
+    if embedding_codec.EMBEDDING_STORAGE not in embedding_codec.STORAGES:
+        raise ValueError(f"⚠️ EMBEDDING_STORAGE must be one of {embedding_codec.STORAGES}")
+    print(f"🧮 Embedding size: {embedding_codec.EMBEDDING_DIM or 'full'}, storage: {embedding_codec.EMBEDDING_STORAGE}")
+
+    repo = FoodCategoryRepository(get_session_factory())
+
+    # Same text and task type as category_service.generate_category_embedding
+    categories = [row for row in await repo.get_all_with_embeddings() if row["examples"]]
+    vectors = await gemini.embed_many(
+        [category_text(row["name"], list(row["examples"])) for row in categories],
+        task_type="retrieval_query", concurrency=concurrency,
+    )
+    await repo.update_category_embeddings([(row["id"], vector) for row, vector in zip(categories, vectors)])
+    print(f"✅ Re-embedded {len(categories)} categories")
+
+    total, after = 0, 0
+    while True:
+        page = await repo.get_example_page(after, batch_size)
+        if not page:
+            break
+        vectors = await gemini.embed_many([example for _, example in page], task_type="retrieval_query",
+                                          concurrency=concurrency)
+        await repo.update_example_embeddings([(example_id, vector) for (example_id, _), vector in zip(page, vectors)])
+        total += len(page)
+        after = page[-1][0]
+        print(f"✅ Re-embedded {total} examples")
+
+    print(f"🎉 Done, {len(categories)} categories and {total} examples re-embedded.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=gemini.EMBED_CONCURRENCY,
+                        help="embedding requests in flight")
+    args = parser.parse_args()
+    profiling.run(reembed(args.batch_size, args.concurrency), "reembed")
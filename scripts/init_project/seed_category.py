@@ -1,22 +1,33 @@
-import asyncio
-import os
-import functools
-import google.generativeai as genai
-from sqlalchemy import text
+"""
+Seed or update the category taxonomy.
 
-from solomia.models.food_category import FoodCategory
-from solomia.core.db import Base, engine
+The taxonomy comes from a file, or from the built-in starter set when no file is
+given:
 
-# =====================
-# CONFIG
-# =====================
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GOOGLE_API_KEY:
-    raise ValueError("⚠️ Please set GOOGLE_API_KEY in your environment!")
+    python -m scripts.init_project.seed_category                           # built-in categories
+    python -m scripts.init_project.seed_category taxonomy.json             # [{"name": ..., "examples": [...]}] or {name: [...]}
+    python -m scripts.init_project.seed_category taxonomy.csv --replace    # name,example rows (or name,examples with "|")
+
+The file is diffed against ``food_categories`` in one query. Only new
+categories, categories with new examples, and categories without an
+embedding are embedded, in batched requests with bounded concurrency. The
+result is written with multi-row upserts in one transaction. By default,
+examples already in the table (including ones learned from the LLM) are
+kept and the file's examples are added to them. ``--replace`` makes the
+table match the file.
+"""
+import argparse
+import csv
+import json
 
-# Ініціалізація Gemini клієнта
-genai.configure(api_key=GOOGLE_API_KEY)
-embedding_model = "models/text-embedding-004"
+from solomia.core import profiling
+from solomia.core.db import get_session_factory
+from solomia.core.lazy import lazy_import
+from solomia.repository.category_repository import FoodCategoryRepository
+from solomia.services import gemini
+from solomia.services.category_service import category_text
+
+np = lazy_import("numpy")
 
 # =====================
 # CATEGORIES
@@ -37,62 +48,114 @@ CATEGORIES = [
 
 
 # =====================
-# EMBEDDING FUNCTION
+# TAXONOMY FILES
 # =====================
-async def embed_text_async(text: str):
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        None,
-        functools.partial(
-            genai.embed_content,
-            model=embedding_model,
-            content=text,
-            task_type="retrieval_document"
-        )
-    )
+def _add(taxonomy: dict[str, list[str]], name: str, examples):
+    name = (name or "").strip()
+    if not name:
+        return
+    current = taxonomy.setdefault(name, [])
+    for example in examples:
+        example = (example or "").strip()
+        if example and example not in current:
+            current.append(example)
+
+
+def load_taxonomy(path: str) -> dict[str, list[str]]:
+    """
+    Read a taxonomy file.
+
+    JSON: a list of ``{"name", "examples"}`` objects or a ``{name: [examples]}``
+    object. CSV: ``name,example`` rows (one example per row), or a ``name,examples``
+    column with examples separated by ``|`` or ``;``.
+
+    Returns:
+        dict[str, list[str]]: Category name -> examples, duplicates removed, file order kept.
+    """
+    taxonomy: dict[str, list[str]] = {}
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+            items = data.items() if isinstance(data, dict) else ((c["name"], c.get("examples", [])) for c in data)
+            for name, examples in items:
+                _add(taxonomy, name, examples)
+        else:
+            for row in csv.DictReader(f):
+                if "examples" in row:
+                    examples = (row["examples"] or "").replace(";", "|").split("|")
+                else:
+                    examples = [row.get("example")]
+                _add(taxonomy, row.get("name") or row.get("category"), examples)
+    return taxonomy
+
+
+def diff_taxonomy(wanted: dict[str, list[str]], existing: dict[str, tuple[list[str], bool]],
+                  replace: bool = False) -> dict[str, list[str]]:
+    """
+    Categories that need to be (re)written, with their final examples.
+
+    Args:
+        wanted (dict[str, list[str]]): Taxonomy from the file.
+        existing (dict[str, tuple[list[str], bool]]): ``FoodCategoryRepository.get_taxonomy()``.
+        replace (bool): Use the file's examples as they are instead of adding them to the table's.
+
+    Returns:
+        dict[str, list[str]]: Name -> examples for new categories, categories whose
+        examples change, and categories without an embedding.
+    """
+    changed = {}
+    for name, examples in wanted.items():
+        if not examples:
+            continue
+        if name not in existing:
+            changed[name] = examples
+            continue
+        current, embedded = existing[name]
+        final = examples if replace else current + [e for e in examples if e not in current]
+        if final != current or not embedded:
+            changed[name] = final
+    return changed
 
 
 # =====================
 # SEED FUNCTION
 # =====================
-async def seed_categories():
-    async with engine.connect() as conn:
-        await conn.execution_options(isolation_level="AUTOCOMMIT")
-        
-        for name, examples in CATEGORIES:
-            # Перевіряємо, чи вже існує категорія
-            res = await conn.execute(
-                text("SELECT id FROM food_categories WHERE name = :name"),
-                {"name": name}
-            )
-            if res.scalar_one_or_none():
-                print(f"⏭️  Category '{name}' already exists, skipping.")
-                continue
-
-            # Генеруємо embedding
-            text_input = f"{name}: {', '.join(examples)}"
-            result = await embed_text_async(text_input)
-            embedding = result["embedding"]
-            embedding_str = "[" + ", ".join(str(x) for x in embedding) + "]"
-
-            # Додаємо новий запис
-            await conn.execute(
-                text("""
-                    INSERT INTO food_categories (name, examples, embedding)
-                    VALUES (:name, :examples, :embedding)
-                """),
-                {
-                    "name": name,
-                    "examples": examples,  # якщо JSONB — працює
-                    "embedding": embedding_str
-                }
-            )
-            print(f"✅ Added '{name}'")
-
-        # commit автоматично робиться в кінці `engine.begin()`
-
-    print("🎉 All categories seeded successfully!")
+async def seed_categories(path: str | None = None, replace: bool = False, concurrency: int = gemini.EMBED_CONCURRENCY,
+                          dry_run: bool = False):
+    if not dry_run and not gemini.has_credentials():
+        raise ValueError("⚠️ Please set GOOGLE_API_KEY in your environment!")
+
+    wanted = load_taxonomy(path) if path else {name: examples for name, examples in CATEGORIES}
+    repo = FoodCategoryRepository(get_session_factory())
+    existing = await repo.get_taxonomy()
+    changed = diff_taxonomy(wanted, existing, replace)
+
+    new = sum(name not in existing for name in changed)
+    print(f"📚 {len(wanted)} categories in the taxonomy: {new} new, {len(changed) - new} to update, "
+          f"{len(wanted) - len(changed)} unchanged.")
+    if not changed or dry_run:
+        return
+
+    # Same text and task type as category_service.generate_category_embedding, so seeded and
+    # regenerated category embeddings are comparable
+    names = list(changed)
+    vectors = await gemini.embed_many(
+        [category_text(name, changed[name]) for name in names], task_type="retrieval_query", concurrency=concurrency
+    )
+    print(f"🧮 Embedded {len(vectors)} categories")
+
+    written = await repo.upsert_categories(
+        [(name, changed[name], np.asarray(vector, dtype=np.float32)) for name, vector in zip(names, vectors)]
+    )
+    print(f"🎉 {written} categories written. Run scripts.init_project.embed_examples for per-example embeddings.")
 
 
 if __name__ == "__main__":
-    asyncio.run(seed_categories())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="JSON or CSV taxonomy (default: the built-in categories)")
+    parser.add_argument("--replace", action="store_true", help="make each category's examples match the file")
+    parser.add_argument("--concurrency", type=int, default=gemini.EMBED_CONCURRENCY,
+                        help="embedding requests in flight")
+    parser.add_argument("--dry-run", action="store_true", help="only print the diff")
+    args = parser.parse_args()
+    profiling.run(seed_categories(args.path, args.replace, args.concurrency, args.dry_run), "seed_category")
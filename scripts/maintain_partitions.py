@@ -0,0 +1,66 @@
+"""
+Keep the monthly partitions of ``reports`` and ``report_items`` in shape.
+
+Creates partitions for the current month and ``--months-ahead`` following ones,
+then (with ``--retain-months``) detaches months older than the retention window
+and moves them to the archive schema, or drops them with ``--drop``:
+
+    python -m scripts.maintain_partitions --months-ahead 3
+    python -m scripts.maintain_partitions --retain-months 24            # archive older months
+    python -m scripts.maintain_partitions --retain-months 24 --dry-run
+
+Run it from cron, e.g. daily; every step is idempotent.
+"""
+import argparse
+from datetime import date
+
+from solomia.core import partitions, profiling
+from solomia.core.db import dispose_engine, get_engine, transaction
+
+
+async def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=partitions.MONTHS_AHEAD)
+    parser.add_argument("--retain-months", type=int, default=partitions.RETAIN_MONTHS,
+                        help="months kept attached, including the current one (0 = keep all)")
+    parser.add_argument("--archive-schema", default=partitions.ARCHIVE_SCHEMA)
+    parser.add_argument("--drop", action="store_true", help="drop old partitions instead of archiving them")
+    parser.add_argument("--today", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--dry-run", action="store_true", help="only print what would change")
+    args = parser.parse_args(argv)
+
+    try:
+        async with get_engine().connect() as conn:
+            if args.dry_run:
+                for table in partitions.PARTITIONED_TABLES:
+                    existing = await partitions.list_partitions(conn, table)
+                    missing = [m for m in partitions.months_to_create(args.today, args.months_ahead) if m not in existing]
+                    old = partitions.months_to_archive(list(existing), args.today, args.retain_months)
+                    print(f"{table}: {len(existing)} monthly partitions")
+                    for month in missing:
+                        print(f"   ➕ would create {partitions.partition_name(table, month)}")
+                    for month in old:
+                        print(f"   📦 would {'drop' if args.drop else 'archive'} {existing[month]}")
+                return
+
+            async with transaction(conn):
+                created, skipped = await partitions.ensure_partitions(conn, args.today, args.months_ahead)
+            for name in created:
+                print(f"➕ Created {name}")
+            for name in skipped:
+                print(f"⚠️ Skipped {name}: its rows are in the default partition, move them out first")
+
+            # One transaction: a month's items and reports are archived together or not at all
+            async with transaction(conn):
+                archived = await partitions.archive_partitions(
+                    conn, args.today, args.retain_months, drop=args.drop, schema=args.archive_schema
+                )
+            for name in archived:
+                print(f"📦 {'Dropped' if args.drop else f'Archived to {args.archive_schema}:'} {name}")
+            print("✅ Partitions are up to date.")
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    profiling.run(main(), "maintain_partitions")
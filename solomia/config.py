@@ -3,4 +3,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-BOT_TOKEN = os.getenv("BOT_TOKEN")
\ No newline at end of file
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+
+# /metrics endpoint served next to the bot
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8000"))
+
+# Telegram ids allowed to run admin commands (/profile), comma-separated
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip()}
+
+# Report pipeline: "one_shot" (local pre-parse, then at most one combined LLM call)
+# or "two_step" (LLM parse, then LLM classification of the misses)
+REPORT_PIPELINE = os.getenv("REPORT_PIPELINE", "one_shot")
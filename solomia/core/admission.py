@@ -0,0 +1,186 @@
+"""
+Admission control: per-user rate limits, a budget of in-flight LLM calls and
+queue-length thresholds.
+
+Under a mealtime spike the bot should answer most people fast and some people
+later, rather than everyone slowly. Three gates do that:
+
+* :class:`RateLimiter` — a token bucket per user; messages beyond it are dropped
+  (``AdmissionMiddleware``).
+* :class:`LLMBudget` — at most ``LLM_MAX_IN_FLIGHT`` generation calls run at
+  once and at most ``LLM_MAX_QUEUED`` wait for a slot, each for at most
+  ``LLM_MAX_WAIT`` seconds. Callers beyond that get :class:`Overloaded` right
+  away and degrade (embedding-only classification) or defer.
+* :class:`DeferredQueue` — a bounded queue of work done in the background once
+  the budget allows, e.g. reports answered with "processing, will reply shortly".
+
+Everything shed, deferred or degraded is counted in ``metrics.SHED_REQUESTS``.
+"""
+import asyncio
+import contextvars
+import os
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Hashable
+
+from solomia.core import metrics
+
+USER_RATE_PER_MINUTE = float(os.getenv("ADMISSION_USER_RATE_PER_MINUTE", "20"))  # 0 disables the rate limit
+USER_BURST = int(os.getenv("ADMISSION_USER_BURST", "5"))
+MAX_UPDATES_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_UPDATES_IN_FLIGHT", "200"))
+LLM_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_LLM_MAX_IN_FLIGHT", "8"))  # 0 disables the budget
+LLM_MAX_QUEUED = int(os.getenv("ADMISSION_LLM_MAX_QUEUED", "16"))
+LLM_MAX_WAIT = float(os.getenv("ADMISSION_LLM_MAX_WAIT", "10"))
+DEFERRED_MAX_QUEUED = int(os.getenv("ADMISSION_DEFERRED_MAX_QUEUED", "500"))
+DEFERRED_WORKERS = int(os.getenv("ADMISSION_DEFERRED_WORKERS", "2"))
+
+# True while a deferred job runs: it may wait for an LLM slot as long as it takes
+_background = contextvars.ContextVar("admission_background", default=False)
+
+
+class Overloaded(Exception):
+    """The LLM budget cannot take another call now; degrade or defer instead."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"overloaded: {reason}")
+        self.reason = reason
+
+
+class RateLimiter:
+    """
+    Token bucket per key.
+
+    Each key holds up to ``burst`` tokens and regains ``rate_per_minute`` of them
+    per minute; a call takes one. Only the ``max_keys`` most recently seen keys
+    are tracked, a forgotten key starts again with a full bucket.
+    """
+
+    def __init__(self, rate_per_minute: float = USER_RATE_PER_MINUTE, burst: int = USER_BURST,
+                 max_keys: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def allow(self, key: Hashable) -> bool:
+        """Take a token for ``key``; False if its bucket is empty."""
+        if self.rate <= 0:
+            return True
+        now = self._clock()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+class LLMBudget:
+    """Bounds LLM calls in flight and the number (and patience) of callers waiting for a slot."""
+
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, max_queued: int = LLM_MAX_QUEUED,
+                 max_wait: float = LLM_MAX_WAIT):
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(max(max_in_flight, 1))
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one LLM slot for the ``with`` block.
+
+        Raises:
+            Overloaded: No slot is free and the wait queue is full, or the wait
+                took longer than ``max_wait``. Deferred jobs are never rejected.
+        """
+        if self.max_in_flight <= 0:
+            yield
+            return
+
+        background = _background.get()
+        if self._semaphore.locked():
+            if not background and self.queued >= self.max_queued:
+                metrics.SHED_REQUESTS.inc(reason="llm_queue_full")
+                raise Overloaded("llm_queue_full")
+            self.queued += 1
+            try:
+                with metrics.LLM_QUEUE_WAIT.time():
+                    await asyncio.wait_for(self._semaphore.acquire(), None if background else self.max_wait)
+            except asyncio.TimeoutError:
+                metrics.SHED_REQUESTS.inc(reason="llm_wait_timeout")
+                raise Overloaded("llm_wait_timeout") from None
+            finally:
+                self.queued -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+class DeferredQueue:
+    """Bounded queue of background jobs, run by a few worker tasks with no LLM queue limit."""
+
+    def __init__(self, max_queued: int = DEFERRED_MAX_QUEUED, workers: int = DEFERRED_WORKERS):
+        self.max_queued = max_queued
+        self.workers = workers
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.max_queued)
+        self._tasks = [asyncio.create_task(self._work(), name=f"deferred-{i}") for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: Callable[[], Awaitable]) -> bool:
+        """
+        Queue a job.
+
+        Returns:
+            bool: False if the queue is full or not running; the caller should shed the request.
+        """
+        if not self._tasks:
+            return False
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            token = _background.set(True)
+            try:
+                await job()
+            except Exception as e:
+                print(f"❌ Deferred job failed: {type(e).__name__}: {e}")
+                print(traceback.format_exc())
+            finally:
+                _background.reset(token)
+                self._queue.task_done()
+
+
+llm_budget = LLMBudget()
+deferred = DeferredQueue()
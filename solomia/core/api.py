@@ -0,0 +1,35 @@
+import contextlib
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from solomia.core import metrics
+
+app = FastAPI(title="Solomia")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/ready")
+async def readiness():
+    """200 once the app container finished warming up, 503 before that and during shutdown."""
+    container = getattr(app.state, "container", None)
+    status = container.status() if container else {"ready": False}
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+class EmbeddedServer(uvicorn.Server):
+    """uvicorn server running next to the bot; signals are left to aiogram's polling loop."""
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+
+def build_server(host: str, port: int) -> EmbeddedServer:
+    return EmbeddedServer(uvicorn.Config(app, host=host, port=port, log_level="warning"))
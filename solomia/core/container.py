@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+
+from solomia.config import BOT_TOKEN
+from solomia.core import admission, tracing
+
+POOL_WARM_CONNECTIONS = int(os.getenv("POOL_WARM_CONNECTIONS", "2"))
+FSM_STORAGE = os.getenv("FSM_STORAGE", "postgres")  # or "memory": per process, lost on restart
+CATEGORY_LISTEN = os.getenv("CATEGORY_LISTEN", "1") != "0"  # apply other workers' category writes live
+
+
+class AppContainer:
+    """
+    Owns the process-wide services and their lifecycle.
+
+    ``startup()`` builds everything in dependency order and warms it up so the
+    first user after a deploy does not pay for it: database engine and a few
+    pooled connections, repositories, the category index and name cache, the
+    Gemini model objects, and finally the bot and dispatcher. ``ready`` flips
+    to True once all of that succeeded; ``shutdown()`` releases it in reverse.
+    """
+
+    def __init__(self, pool_warm_connections: int = POOL_WARM_CONNECTIONS, warm_llm: bool = True):
+        self.pool_warm_connections = pool_warm_connections
+        self.warm_llm = warm_llm
+        self.engine = None
+        self.session_factory = None
+        self.read_session_factory = None
+        self.category_repo = None
+        self.user_repo = None
+        self.report_repo = None
+        self.report_item_repo = None
+        self.plan_repo = None
+        self.fsm_repo = None
+        self.category_listener = None
+        self.bot = None
+        self.dp = None
+        self.ready = False
+        self.warmup_timings: dict[str, float] = {}
+
+    async def _step(self, name: str, coro_or_fn):
+        start = time.perf_counter()
+        with tracing.span(f"startup.{name}"):
+            result = coro_or_fn()
+            if asyncio.iscoroutine(result):
+                result = await result
+        self.warmup_timings[name] = time.perf_counter() - start
+        print(f"🔥 {name}: {self.warmup_timings[name] * 1000:.0f} ms")
+        return result
+
+    async def startup(self):
+        tracing.init_tracing()
+        await self._step("database", self._start_database)
+        await self._step("repositories", self._build_repositories)
+        if CATEGORY_LISTEN:
+            # before loading the index, so no change between the load and LISTEN is missed
+            await self._step("category_listener", self._start_category_listener)
+        await self._step("category_index", self._load_category_index)
+        if self.warm_llm:
+            await self._step("llm", self._warm_llm)
+        await self._step("bot", self._build_bot)
+        admission.deferred.start()
+        self.ready = True
+
+    async def shutdown(self):
+        from solomia.core import db
+
+        self.ready = False
+        await admission.deferred.stop()
+        if self.category_listener is not None:
+            await self.category_listener.stop()
+        if self.dp is not None:
+            # flushes FSM writes still waiting in the write-behind buffer
+            await self.dp.storage.close()
+        if self.bot is not None:
+            await self.bot.session.close()
+        await db.dispose_engine()
+        tracing.shutdown_tracing()
+
+    # ---- steps ----
+    async def _start_database(self):
+        from sqlalchemy import text
+        from solomia.core import db
+
+        self.engine = db.get_engine()
+        self.session_factory = db.get_session_factory()
+        # The primary's factory when DB_REPLICA_HOST is not set
+        self.read_session_factory = db.get_read_session_factory()
+        if self.pool_warm_connections <= 0:
+            return
+
+        async def ping():
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                # hold the connection until every ping has one, so the pool opens N of them
+                await barrier.wait()
+
+        barrier = asyncio.Barrier(self.pool_warm_connections)
+        await asyncio.gather(*(ping() for _ in range(self.pool_warm_connections)))
+
+    def _build_repositories(self):
+        from solomia.repository.category_repository import FoodCategoryRepository
+        from solomia.repository.fsm_repository import FsmStateRepository
+        from solomia.repository.plan_repository import PlanRepository
+        from solomia.repository.report_item_repository import ReportItemRepository
+        from solomia.repository.report_repository import ReportRepository
+        from solomia.repository.user_repository import UserRepository
+        from solomia.services import category_service
+
+        self.category_repo = FoodCategoryRepository(self.session_factory, self.read_session_factory)
+        self.user_repo = UserRepository(self.session_factory, self.read_session_factory)
+        self.report_repo = ReportRepository(self.session_factory, self.read_session_factory)
+        self.report_item_repo = ReportItemRepository(self.session_factory, self.read_session_factory)
+        self.plan_repo = PlanRepository(self.session_factory, self.read_session_factory)
+        self.fsm_repo = FsmStateRepository(self.session_factory)
+        category_service.repo = self.category_repo
+
+    async def _load_category_index(self):
+        from solomia.services import category_service
+
+        index = await category_service.get_index(refresh=True)
+        print(f"   {len(index)} categories loaded")
+
+    async def _start_category_listener(self):
+        from solomia.core import notifications
+        from solomia.services import category_service
+
+        self.category_listener = notifications.Listener(
+            self.engine, notifications.CATEGORY_CHANNEL, category_service.apply_change
+        )
+        self.category_listener.start()
+        await asyncio.wait_for(self.category_listener.connected.wait(), 10)
+
+    async def _warm_llm(self):
+        from solomia.services import gemini
+
+        await asyncio.get_running_loop().run_in_executor(None, gemini.warm_up)
+
+    def _build_bot(self):
+        from aiogram import Bot
+        from solomia.core.fsm_storage import PostgresStorage
+        from solomia.core.handlers import build_dispatcher
+
+        self.bot = Bot(token=BOT_TOKEN)
+        storage = PostgresStorage(self.fsm_repo) if FSM_STORAGE == "postgres" else None
+        self.dp = build_dispatcher(storage=storage, container=self)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "warmup_ms": {name: round(t * 1000, 1) for name, t in self.warmup_timings.items()},
+        }
+
@@ -1,48 +1,179 @@
 import os
-import ssl
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from contextlib import asynccontextmanager
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy import text
 from dotenv import load_dotenv
 
-load_dotenv()
+from solomia.core import sql_tracker
 
-USER = os.getenv("DB_USER")
-PASSWORD = os.getenv("DB_PASSWORD")
-HOST = os.getenv("DB_HOST")
-PORT = os.getenv("DB_PORT")
-DBNAME = os.getenv("DB_NAME")
+Base = declarative_base()
 
-DATABASE_URL = f"postgresql+asyncpg://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+# Created on first use by get_engine() / get_session_factory() and their read_* twins
+_engine = None
+_session_factory = None
+_read_engine = None
+_read_session_factory = None
 
-Base = declarative_base()
+# The application engine runs in autocommit mode: every statement commits on
+# its own and ``begin()`` does not open a transaction on the server. Work that
+# must commit as a whole switches its connection to this level first.
+TRANSACTION_ISOLATION = "READ COMMITTED"
+
+
+def database_url() -> str:
+    load_dotenv()
+
+    user = os.getenv("DB_USER")
+    password = os.getenv("DB_PASSWORD")
+    host = os.getenv("DB_HOST")
+    port = os.getenv("DB_PORT")
+    dbname = os.getenv("DB_NAME")
+
+    return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{dbname}"
+
+
+def replica_url() -> str | None:
+    """
+    URL of the read replica, or None when ``DB_REPLICA_HOST`` is not set.
+
+    ``DB_REPLICA_PORT``, ``DB_REPLICA_USER``, ``DB_REPLICA_PASSWORD`` and
+    ``DB_REPLICA_NAME`` default to the primary's settings.
+    """
+    load_dotenv()
+
+    host = os.getenv("DB_REPLICA_HOST")
+    if not host:
+        return None
+    user = os.getenv("DB_REPLICA_USER") or os.getenv("DB_USER")
+    password = os.getenv("DB_REPLICA_PASSWORD") or os.getenv("DB_PASSWORD")
+    port = os.getenv("DB_REPLICA_PORT") or os.getenv("DB_PORT")
+    dbname = os.getenv("DB_REPLICA_NAME") or os.getenv("DB_NAME")
+
+    return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{dbname}"
+
+
+def build_engine(url: str | None = None):
+    """Build the application engine (asyncpg, SSL without verification, autocommit)."""
+    import ssl
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    engine = create_async_engine(
+        url or database_url(),
+        echo=False,
+        future=True,
+        isolation_level="AUTOCOMMIT",
+        pool_pre_ping=True,
+        connect_args={
+            "statement_cache_size": 0,
+            "ssl": ssl_context,
+        },
+    )
+    sql_tracker.install(engine)
+    return engine
+
+
+def build_session_factory(engine):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    return sessionmaker(
+        bind=engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+
+
+def get_engine():
+    """Return the process-wide engine, creating it on first call."""
+    global _engine
+    if _engine is None:
+        _engine = build_engine()
+    return _engine
+
+
+def get_session_factory():
+    """Return the process-wide session factory, creating it on first call."""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = build_session_factory(get_engine())
+    return _session_factory
+
+
+def get_read_engine():
+    """Return the replica engine, or the primary one when no replica is configured."""
+    global _read_engine
+    if _read_engine is None:
+        url = replica_url()
+        _read_engine = build_engine(url) if url else get_engine()
+    return _read_engine
+
+
+def get_read_session_factory():
+    """Return the session factory for reads (see ``BaseRepository.read_session``)."""
+    global _read_session_factory
+    if _read_session_factory is None:
+        read_engine = get_read_engine()
+        _read_session_factory = get_session_factory() if read_engine is get_engine() else build_session_factory(read_engine)
+    return _read_session_factory
+
+
+def use_engine(engine, read_engine=None):
+    """Point the process-wide engines and session factories at existing engines (benchmarks, tests)."""
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    sql_tracker.install(engine)
+    _engine = engine
+    _session_factory = build_session_factory(engine)
+    if read_engine is None:
+        _read_engine, _read_session_factory = engine, _session_factory
+    else:
+        sql_tracker.install(read_engine)
+        _read_engine, _read_session_factory = read_engine, build_session_factory(read_engine)
+
+
+@asynccontextmanager
+async def transaction(conn):
+    """
+    Run the block's statements on ``conn`` as one transaction: all committed or none.
+
+    Args:
+        conn (AsyncConnection): Connection from the autocommit engine, with no transaction in progress.
+
+    Yields:
+        AsyncConnection: The same connection, inside the transaction.
+    """
+    await conn.execution_options(isolation_level=TRANSACTION_ISOLATION)
+    async with conn.begin():
+        yield conn
+
+
+async def dispose_engine():
+    """Close all pooled connections and forget the engines."""
+    global _engine, _session_factory, _read_engine, _read_session_factory
+    if _read_engine is not None and _read_engine is not _engine:
+        await _read_engine.dispose()
+    if _engine is not None:
+        await _engine.dispose()
+    _engine, _session_factory, _read_engine, _read_session_factory = None, None, None, None
+
+
+def __getattr__(name: str):
+    # Backwards-compatible lazy module attributes
+    if name == "engine":
+        return get_engine()
+    if name == "SessionFactory":
+        return get_session_factory()
+    if name == "DATABASE_URL":
+        return database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-ssl_context = ssl.create_default_context()
-ssl_context.check_hostname = False
-ssl_context.verify_mode = ssl.CERT_NONE
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    isolation_level="AUTOCOMMIT",
-    pool_pre_ping=True,
-    connect_args={
-        "statement_cache_size": 0, 
-        "ssl": ssl_context,
-    },
-)
-
-SessionFactory = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
 
 async def test_connection():
     try:
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             result = await conn.execute(text("SELECT version();"))
             version = list(result)[0][0]
             print(f"Connected successfully! PostgreSQL version: {version}")
     except Exception as e:
-        print(f"Connection failed: {e}")
\ No newline at end of file
+        print(f"Connection failed: {e}")
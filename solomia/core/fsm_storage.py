@@ -0,0 +1,167 @@
+"""
+aiogram FSM storage in Postgres, with a per-process read cache and write-behind.
+
+aiogram's default ``MemoryStorage`` loses every conversation on restart and
+cannot be shared between bot workers. :class:`PostgresStorage` keeps state
+and data in the ``fsm_states`` table instead:
+
+* Reads are served from an LRU cache of recently used keys; an entry is
+  trusted for ``FSM_CACHE_TTL`` seconds, then re-read from the database, so
+  another worker's change shows up at most that late. ``FSM_CACHE_TTL=0``
+  reads through on every cache miss of a key this process did not write.
+* Writes land in the cache at once and are flushed in batches, every
+  ``FSM_FLUSH_INTERVAL`` seconds or as soon as ``FSM_FLUSH_BATCH`` keys are
+  waiting, in one transaction per flush. ``close()`` flushes what is left.
+
+A key written by this process is read back from its pending writes, never
+from the database, so a conversation always sees its own last step. With
+several workers, route a chat's updates to one worker (or keep the TTL short)
+so two workers do not advance the same conversation from different states.
+"""
+import asyncio
+import copy
+import os
+import time
+import traceback
+from collections import OrderedDict
+from typing import Any, Callable, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from solomia.core import metrics
+
+FSM_CACHE_TTL = float(os.getenv("FSM_CACHE_TTL", "30"))
+FSM_CACHE_SIZE = int(os.getenv("FSM_CACHE_SIZE", "10000"))
+FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL", "0.5"))
+FSM_FLUSH_BATCH = int(os.getenv("FSM_FLUSH_BATCH", "200"))
+
+Entry = tuple[str | None, dict]  # (state, data)
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM storage shared through Postgres.
+
+    Args:
+        repo: Anything with ``get_state(key)`` and ``save_states({key: (state, data)})``,
+            normally a :class:`solomia.repository.fsm_repository.FsmStateRepository`.
+    """
+
+    def __init__(self, repo, cache_ttl: float = FSM_CACHE_TTL, cache_size: int = FSM_CACHE_SIZE,
+                 flush_interval: float = FSM_FLUSH_INTERVAL, flush_batch: int = FSM_FLUSH_BATCH,
+                 key_builder: KeyBuilder | None = None, clock: Callable[[], float] = time.monotonic):
+        self.repo = repo
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._clock = clock
+        self._cache: OrderedDict[str, tuple[Entry, float]] = OrderedDict()
+        self._pending: dict[str, Entry] = {}   # written, not flushed yet
+        self._flushing: dict[str, Entry] = {}  # being written by the current flush
+        self._flush_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    # ---- BaseStorage ----
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        _, data = await self._get(key)
+        self._put(key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state, _ = await self._get(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise TypeError(f"Data must be a dict, got {type(data).__name__}")
+        state, _ = await self._get(key)
+        self._put(key, state, copy.deepcopy(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data = await self._get(key)
+        return copy.deepcopy(data)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    # ---- cache ----
+    async def _get(self, key: StorageKey) -> Entry:
+        name = self.key_builder.build(key)
+        entry = self._pending.get(name) or self._flushing.get(name)
+        if entry is not None:
+            return entry
+
+        cached = self._cache.get(name)
+        if cached is not None and self._clock() - cached[1] < self.cache_ttl:
+            self._cache.move_to_end(name)
+            metrics.FSM_CACHE.inc(result="hit")
+            return cached[0]
+
+        metrics.FSM_CACHE.inc(result="miss")
+        entry = await self.repo.get_state(name) or (None, {})
+        # a write may have landed while the row was on its way
+        entry = self._pending.get(name) or self._flushing.get(name) or entry
+        self._remember(name, entry)
+        return entry
+
+    def _remember(self, name: str, entry: Entry):
+        self._cache.pop(name, None)
+        self._cache[name] = (entry, self._clock())
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _put(self, key: StorageKey, state: str | None, data: dict):
+        name = self.key_builder.build(key)
+        entry = (state, data)
+        self._remember(name, entry)
+        self._pending[name] = entry
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="fsm-flush")
+        if len(self._pending) >= self.flush_batch:
+            self._wake.set()
+
+    # ---- write-behind ----
+    async def flush(self) -> int:
+        """
+        Write every pending key now.
+
+        Returns:
+            int: Keys written.
+
+        Raises:
+            Exception: Whatever the repository raised; the keys stay pending for the next flush.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await self.repo.save_states(self._flushing)
+            except Exception:
+                # writes made during the flush are newer than the failed batch
+                self._pending = {**self._flushing, **self._pending}
+                raise
+            finally:
+                written, self._flushing = len(self._flushing), {}
+            metrics.FSM_FLUSHED.observe(written)
+            return written
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ FSM state flush failed: {type(e).__name__}: {e}")
+                print(traceback.format_exc())
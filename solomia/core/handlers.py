@@ -1,16 +1,227 @@
-from aiogram import Bot, Dispatcher, types
-from aiogram.filters import Command
-from aiogram.types import Message
+from datetime import date, timedelta
 
-from solomia.config import BOT_TOKEN
+from aiogram import Dispatcher, F, Router, types
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+from solomia.config import ADMIN_IDS
+from solomia.core import admission, metrics, tracing
+from solomia.core.middlewares import AdmissionMiddleware, MetricsMiddleware, ProfilingMiddleware, UnitOfWorkMiddleware
+from solomia.core.profiling import profiler
+from solomia.services import category_service, history, plan_evaluation, report_pipeline
 
-@dp.message(Command("start"))
-async def cmd_start(message: Message):
-    await message.answer("Hi, I'm alive! 👋")
+router = Router()
 
-@dp.message()
-async def echo(message: Message):
-    await message.answer(f"You said: {message.text}")
\ No newline at end of file
+REPORT_FAILED_TEXT = "❌ Не вдалося обробити звіт, надішли його ще раз."
+
+
+@router.message(Command("start"))
+async def cmd_start(message: Message, container):
+    """/start — register the user; after that any text message is a food report."""
+    created = await container.user_repo.register_user(str(message.from_user.id), message.from_user.full_name)
+    greeting = "Привіт! 👋" if created else "З поверненням! 👋"
+    await message.answer(f"{greeting} Надсилай, що їси, звичайним текстом, наприклад: «200 г кефіру, 80 г гречки».\n"
+                         "/status — сьогодні проти плану, /history — попередні звіти.")
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject):
+    """/profile on [N] | off — admin-only switch for the sampling profiler."""
+    if not message.from_user or message.from_user.id not in ADMIN_IDS:
+        return
+
+    args = (command.args or "").split()
+    if args and args[0] == "on":
+        every = int(args[1]) if len(args) > 1 and args[1].isdigit() else None
+        profiler.enable(every)
+    elif args and args[0] == "off":
+        profiler.disable()
+
+    state = "on" if profiler.enabled else "off"
+    await message.answer(f"🔬 Profiling {state}: every {profiler.every} update(s) → {profiler.output_dir}/")
+
+HISTORY_CALLBACK = "history:"
+MESSAGE_LIMIT = 4096  # Telegram's maximum message length
+ROLLUP_BUCKETS = {"week": 8, "month": 6}  # how many periods /history week|month shows
+
+
+async def _category_namer():
+    index = await category_service.get_index()
+    return lambda category_id: (index.name_by_id(category_id) if category_id is not None else None) or "❔ без категорії"
+
+
+async def _history_page(container, user_id, cursor: str | None = None) -> tuple[str, InlineKeyboardMarkup | None]:
+    page = await history.get_page(container.report_repo, user_id, cursor=cursor)
+    if not page.reports:
+        return "📭 Звітів ще немає.", None
+
+    name = await _category_namer()
+    lines = []
+    for report in page.reports:
+        lines.append(f"📅 {report.date:%d.%m.%Y}")
+        lines += [
+            f"  • {item['product_name']} — {item['amount_grams'] or 0:.0f} г ({name(item['category_id'])})"
+            for item in report.items
+        ]
+    keyboard = None
+    if page.next_cursor:
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[[
+            InlineKeyboardButton(text="Далі ▶", callback_data=HISTORY_CALLBACK + page.next_cursor)
+        ]])
+    return _clip("\n".join(lines)), keyboard
+
+
+async def _history_rollup(container, user_id, bucket: str) -> str:
+    end = date.today()
+    if bucket == "week":
+        start = end - timedelta(days=end.weekday() + 7 * (ROLLUP_BUCKETS["week"] - 1))
+    else:
+        start = end.replace(day=1)
+        for _ in range(ROLLUP_BUCKETS["month"] - 1):
+            start = (start - timedelta(days=1)).replace(day=1)
+
+    series = await history.rollup(container.report_repo, user_id, start, end, bucket)
+    if not series:
+        return "📭 За цей період звітів немає."
+
+    name = await _category_namer()
+    lines = []
+    for period, totals in series.items():
+        lines.append(f"📅 {period:%d.%m.%Y}")
+        lines += [
+            f"  • {name(category_id)}: {grams:.0f} г"
+            for category_id, grams in sorted(totals.items(), key=lambda kv: -kv[1])
+        ]
+    return _clip("\n".join(lines))
+
+
+def _clip(text: str) -> str:
+    return text if len(text) <= MESSAGE_LIMIT else text[:MESSAGE_LIMIT - 1] + "…"
+
+
+@router.message(Command("history"))
+async def cmd_history(message: Message, command: CommandObject, container):
+    """/history [week|month] — reports page by page, or per-category totals per week/month."""
+    user_id = await container.user_repo.get_id_by_telegram_id(str(message.from_user.id))
+    if user_id is None:
+        await message.answer("Спершу зареєструйся: /start")
+        return
+
+    bucket = (command.args or "").strip().lower()
+    if bucket in ROLLUP_BUCKETS:
+        await message.answer(await _history_rollup(container, user_id, bucket))
+    else:
+        text, keyboard = await _history_page(container, user_id)
+        await message.answer(text, reply_markup=keyboard)
+
+
+@router.callback_query(F.data.startswith(HISTORY_CALLBACK))
+async def history_next_page(callback: CallbackQuery, container):
+    user_id = await container.user_repo.get_id_by_telegram_id(str(callback.from_user.id))
+    try:
+        text, keyboard = await _history_page(container, user_id, callback.data.removeprefix(HISTORY_CALLBACK))
+    except ValueError:
+        await callback.answer("Посилання застаріло, надішли /history ще раз")
+        return
+    await callback.message.answer(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+@router.message(Command("status"))
+async def cmd_status(message: Message, container):
+    """/status — today's intake per category against the user's plan."""
+    user_id = await container.user_repo.get_id_by_telegram_id(str(message.from_user.id))
+    if user_id is None:
+        await message.answer("Спершу зареєструйся: /start")
+        return
+
+    today = date.today()
+    evaluation = await plan_evaluation.evaluate(container.plan_repo, [user_id], today, today)
+    results = evaluation.day_results(user_id, today)
+    if not results:
+        await message.answer("📭 На сьогодні ще нічого оцінити.")
+        return
+
+    name = await _category_namer()
+    lines = ["📊 Сьогодні:"]
+    for r in results:
+        if r["status"] == "unplanned":
+            lines.append(f"  • {name(r['category_id'])}: {r['eaten']:.0f} г (поза планом)")
+        else:
+            lines.append(f"  • {name(r['category_id'])}: {r['eaten']:.0f} / {r['planned']:.0f} г → "
+                         f"{plan_evaluation.STATUS_TEXT[r['status']]}")
+    await message.answer(_clip("\n".join(lines)))
+
+
+def _report_text(products: list[dict]) -> str:
+    if not products:
+        return "🤔 Не знайшла в звіті жодного продукту."
+    lines = ["✅ Записала:"]
+    lines += [
+        f"  • {item['product_name']} — {item['amount_grams'] or 0:.0f} г ({item['category']})"
+        for item in products
+    ]
+    return _clip("\n".join(lines))
+
+
+async def _save_and_confirm(message: Message, products: list[dict], container):
+    try:
+        with tracing.stage("save", items=len(products)):
+            await report_pipeline.save_report(products, str(message.from_user.id),
+                                              container.user_repo, container.report_repo)
+    except Exception:
+        await message.answer(REPORT_FAILED_TEXT)
+        raise
+    await message.answer(_report_text(products))
+
+
+async def _deferred_report(message: Message, container):
+    try:
+        products = await report_pipeline.process_report(message.text)
+    except Exception:
+        await message.answer(REPORT_FAILED_TEXT)
+        raise
+    await _save_and_confirm(message, products, container)
+
+
+@router.message(F.text & ~F.text.startswith("/"))
+async def on_report(message: Message, container):
+    """Any other text is a food report: parse, classify, save and confirm."""
+    user_id = await container.user_repo.get_id_by_telegram_id(str(message.from_user.id))
+    if user_id is None:
+        await message.answer("Спершу зареєструйся: /start")
+        return
+
+    try:
+        products = await report_pipeline.process_report(message.text)
+    except admission.Overloaded:
+        # The report needs the LLM and the budget is gone: answer now, parse when there is room
+        if admission.deferred.submit(lambda: _deferred_report(message, container)):
+            metrics.SHED_REQUESTS.inc(reason="deferred")
+            await message.answer("⏳ Обробляю звіт, відповім трохи згодом.")
+        else:
+            metrics.SHED_REQUESTS.inc(reason="deferred_queue_full")
+            await message.answer(AdmissionMiddleware.OVERLOADED_TEXT)
+        return
+    except Exception:
+        # LLMOutputError, database errors: the user still gets an answer
+        await message.answer(REPORT_FAILED_TEXT)
+        raise
+    await _save_and_confirm(message, products, container)
+
+
+def build_dispatcher(storage: BaseStorage | None = None, **workflow_data) -> Dispatcher:
+    """
+    Dispatcher with the bot's middlewares and handlers; ``workflow_data`` is injected into handlers.
+
+    ``storage`` holds FSM state (aiogram's in-memory storage when None).
+    """
+    dp = Dispatcher(storage=storage, **workflow_data)
+    dp.update.outer_middleware(MetricsMiddleware())
+    dp.update.outer_middleware(ProfilingMiddleware())
+    dp.update.outer_middleware(UnitOfWorkMiddleware())
+    admission_middleware = AdmissionMiddleware()
+    dp.message.outer_middleware(admission_middleware)
+    dp.callback_query.outer_middleware(admission_middleware)
+    dp.include_router(router)
+    return dp
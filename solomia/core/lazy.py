@@ -0,0 +1,28 @@
+import importlib
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """
+    Import module ``name`` on first attribute access instead of now.
+
+    Used for heavy dependencies (NumPy, the Gemini SDK) so that importing a
+    service module stays cheap for entry points that never call into it.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+
+    parent, _, child = name.rpartition(".")
+    if parent:
+        setattr(importlib.import_module(parent), child, module)
+    return module
@@ -0,0 +1,189 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A deliberately small subset of the Prometheus client model: counters and
+histograms with labels, a global registry and :func:`render` for the
+``/metrics`` endpoint. Everything runs on the event loop thread, so no
+locking is done.
+"""
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+TOKEN_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000)
+
+REGISTRY: list["_Metric"] = []
+
+
+def _format_labels(label_names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self) -> list[str]:
+        return self._header(self.name)
+
+    def _header(self, name: str) -> list[str]:
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def total(self) -> float:
+        """Sum over every label combination."""
+        return sum(self._values.values())
+
+    def render(self) -> list[str]:
+        lines = self._header(f"{self.name}_total")
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}_total{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * len(self.buckets)
+            self._sums[key] = 0.0
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for key in sorted(self._counts):
+            cumulative = 0
+            for bound, count in zip(self.buckets, self._counts[key]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format (0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# =====================
+# HOT-PATH METRICS
+# =====================
+GEMINI_LATENCY = Histogram(
+    "solomia_gemini_request_seconds", "Latency of Gemini API calls.", ("operation",)
+)
+GEMINI_REQUESTS = Counter(
+    "solomia_gemini_requests", "Gemini API calls by outcome.", ("operation", "status")
+)
+GEMINI_TOKENS = Histogram(
+    "solomia_gemini_tokens", "Tokens per Gemini call, prompt and response.", ("operation", "kind"),
+    buckets=TOKEN_BUCKETS,
+)
+EMBEDDING_CACHE = Counter(
+    "solomia_embedding_cache", "Product embedding cache lookups.", ("result",)
+)
+DB_STATEMENTS = Counter(
+    "solomia_db_statements", "SQL statements sent to the database."
+)
+DB_STATEMENTS_PER_UPDATE = Histogram(
+    "solomia_db_statements_per_update", "SQL statements issued while handling one update.",
+    buckets=COUNT_BUCKETS,
+)
+UPDATE_LATENCY = Histogram(
+    "solomia_update_seconds", "Time spent handling one Telegram update.", ("event",)
+)
+CLASSIFICATION_SOURCE = Counter(
+    "solomia_classifications", "Products classified, by the step that resolved them.", ("source",)
+)
+STAGE_LATENCY = Histogram(
+    "solomia_stage_seconds", "Time spent in each report pipeline stage.", ("stage",)
+)
+LOOP_LAG = Histogram(
+    "solomia_event_loop_lag_seconds", "How late the event loop woke up a sleeping task.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+DEDUPLICATED = Counter(
+    "solomia_deduplicated_calls", "Calls answered by an identical in-flight call or the negative cache.",
+    ("operation", "reason"),
+)
+SHED_REQUESTS = Counter(
+    "solomia_shed_requests", "Requests rejected, deferred or degraded by admission control.", ("reason",)
+)
+LLM_QUEUE_WAIT = Histogram(
+    "solomia_llm_queue_wait_seconds", "Time LLM calls waited for a slot in the in-flight budget."
+)
+FSM_CACHE = Counter(
+    "solomia_fsm_cache", "FSM state lookups served from the process cache or the database.", ("result",)
+)
+FSM_FLUSHED = Histogram(
+    "solomia_fsm_flushed_keys", "FSM keys written per write-behind flush.", buckets=COUNT_BUCKETS
+)
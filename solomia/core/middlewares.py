@@ -0,0 +1,105 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from solomia.core import admission, metrics, profiling, sql_tracker, tracing, unit_of_work
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Times every update and counts the SQL statements it issued."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        start = time.perf_counter()
+        with tracing.span("telegram.update", event=event_type), sql_tracker.track("telegram.update") as stats:
+            try:
+                return await handler(event, data)
+            finally:
+                metrics.UPDATE_LATENCY.observe(time.perf_counter() - start, event=event_type)
+                metrics.DB_STATEMENTS_PER_UPDATE.observe(stats.statements)
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """Handles every update in its own unit of work, so its reads see its writes."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with unit_of_work.unit_of_work():
+            return await handler(event, data)
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """Runs every Nth update under the sampling profiler when profiling is on."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not profiling.profiler.should_sample():
+            return await handler(event, data)
+
+        name = f"update-{event.update_id}" if isinstance(event, Update) else type(event).__name__
+        with profiling.profiler.session(name):
+            return await handler(event, data)
+
+
+class AdmissionMiddleware(BaseMiddleware):
+    """
+    Sheds messages and callbacks beyond a user's rate limit or the in-flight threshold.
+
+    A rate-limited user is told once and then ignored until their bucket
+    refills; under overload everyone gets a short "busy" answer instead of a
+    slow one.
+    """
+
+    RATE_LIMITED_TEXT = "🐢 Забагато повідомлень, зачекай хвилинку."
+    OVERLOADED_TEXT = "⏳ Зараз дуже багато запитів, спробуй за кілька хвилин."
+
+    def __init__(self, limiter: admission.RateLimiter | None = None,
+                 max_in_flight: int = admission.MAX_UPDATES_IN_FLIGHT):
+        self.limiter = limiter or admission.RateLimiter()
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._warned: set[int] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is not None:
+            if not self.limiter.allow(user.id):
+                metrics.SHED_REQUESTS.inc(reason="rate_limited")
+                if user.id not in self._warned:
+                    if len(self._warned) >= self.limiter.max_keys:
+                        self._warned.clear()
+                    self._warned.add(user.id)
+                    await event.answer(self.RATE_LIMITED_TEXT)
+                return None
+            self._warned.discard(user.id)
+
+        if self.in_flight >= self.max_in_flight:
+            metrics.SHED_REQUESTS.inc(reason="overloaded")
+            await event.answer(self.OVERLOADED_TEXT)
+            return None
+
+        self.in_flight += 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
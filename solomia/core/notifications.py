@@ -0,0 +1,120 @@
+"""
+Cross-process change notifications over Postgres ``LISTEN``/``NOTIFY``.
+
+Writers call :func:`notify` inside their transaction
+(``BaseRepository.transaction``), so the event is delivered when (and only
+if) the transaction commits. The engine runs in autocommit mode: on a plain
+session the event would go out at once, before the rest of the write. Every process runs a
+:class:`Listener` on the primary that hands the events of other processes to
+a handler; a process's own events are skipped, it has already applied its
+writes locally.
+
+Payloads are small JSON objects (``kind`` plus ids): ``NOTIFY`` payloads are
+limited to 8000 bytes, so vectors are never sent, the handler reads what it
+needs by id. If the listening connection drops, events may have been missed:
+the handler is called with ``{"kind": "reset"}`` after reconnecting.
+"""
+import asyncio
+import json
+import traceback
+import uuid
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+
+CATEGORY_CHANNEL = "food_categories"
+RECONNECT_DELAY = 1.0  # seconds, doubled up to 30 while the database is unreachable
+
+# Identifies this process in the events it sends
+ORIGIN = uuid.uuid4().hex
+
+
+async def notify(session, channel: str, kind: str, **fields):
+    """Queue an event on ``channel``; it is sent when the session's transaction commits (at once under autocommit)."""
+    payload = json.dumps({"origin": ORIGIN, "kind": kind, **fields}, ensure_ascii=False)
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+def parse(payload: str) -> dict | None:
+    """The event in ``payload``, or None if it is malformed or came from this process."""
+    try:
+        event = json.loads(payload)
+    except json.JSONDecodeError:
+        print(f"⚠️ Malformed notification payload: {payload[:200]!r}")
+        return None
+    if not isinstance(event, dict) or event.get("origin") == ORIGIN:
+        return None
+    return event
+
+
+class Listener:
+    """
+    Background task that ``LISTEN``s on a channel and applies events one at a time, in order.
+
+    Args:
+        engine: Async engine of the primary (replicas do not see ``NOTIFY``).
+        channel (str): Channel name.
+        handler: Coroutine function called with each event dict.
+    """
+
+    def __init__(self, engine, channel: str, handler: Callable[[dict], Awaitable]):
+        self.engine = engine
+        self.channel = channel
+        self.handler = handler
+        self._events: asyncio.Queue[dict] = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self.connected = asyncio.Event()
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._listen(), name=f"listen-{self.channel}"),
+            asyncio.create_task(self._apply(), name=f"apply-{self.channel}"),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _receive(self, connection, pid: int, channel: str, payload: str):
+        event = parse(payload)
+        if event is not None:
+            self._events.put_nowait(event)
+
+    async def _listen(self):
+        delay, first = RECONNECT_DELAY, True
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    await raw.add_listener(self.channel, self._receive)
+                    if not first:
+                        # events sent while we were away are lost
+                        self._events.put_nowait({"kind": "reset"})
+                    first, delay = False, RECONNECT_DELAY
+                    self.connected.set()
+                    try:
+                        while not raw.is_closed():
+                            await asyncio.sleep(RECONNECT_DELAY)
+                    finally:
+                        self.connected.clear()
+                        if not raw.is_closed():
+                            await raw.remove_listener(self.channel, self._receive)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Listening on {self.channel} failed ({type(e).__name__}: {e}), retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def _apply(self):
+        while True:
+            event = await self._events.get()
+            try:
+                await self.handler(event)
+            except Exception as e:
+                print(f"❌ Applying {self.channel} event {event.get('kind')} failed: {type(e).__name__}: {e}")
+                print(traceback.format_exc())
@@ -0,0 +1,195 @@
+"""
+Monthly range partitions of the report tables.
+
+``reports`` is partitioned by ``date`` and ``report_items`` by ``report_date``
+(a copy of its report's date), one partition per calendar month named
+``<table>_y2025m11``, plus a ``<table>_default`` partition that catches rows
+outside every monthly range. Queries that filter on the date columns touch only
+the matching months, and vacuum works month by month.
+
+``python -m scripts.maintain_partitions`` creates partitions ahead of time and
+detaches months older than the retention period, moving them to the
+``PARTITION_ARCHIVE_SCHEMA`` schema (or dropping them).
+"""
+import os
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+# Parent first: report_items references reports
+PARTITIONED_TABLES = {"reports": "date", "report_items": "report_date"}
+
+MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+RETAIN_MONTHS = int(os.getenv("PARTITION_RETAIN_MONTHS", "0"))  # 0 = keep every month attached
+ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def parse_partition_name(table: str, name: str) -> date | None:
+    """Month of a partition created by :func:`partition_name`, or None for anything else."""
+    match = re.fullmatch(rf"{re.escape(table)}_y(\d{{4}})m(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def default_partition_sql(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def months_to_create(today: date, months_ahead: int = MONTHS_AHEAD) -> list[date]:
+    """The current month and ``months_ahead`` following ones."""
+    current = month_start(today)
+    return [add_months(current, i) for i in range(months_ahead + 1)]
+
+
+def months_to_archive(existing: list[date], today: date, retain_months: int = RETAIN_MONTHS) -> list[date]:
+    """
+    Attached months that fall entirely before the retention window.
+
+    Args:
+        existing (list[date]): Months with an attached partition.
+        today (date): Reference day.
+        retain_months (int): Months kept attached, including the current one; 0 keeps everything.
+
+    Returns:
+        list[date]: Months to detach, oldest first.
+    """
+    if retain_months <= 0:
+        return []
+    cutoff = add_months(month_start(today), -(retain_months - 1))
+    return sorted(month for month in existing if month < cutoff)
+
+
+def create_initial_partitions(conn, table: str, today: date | None = None):
+    """Default partition plus the current and upcoming months (sync connection, e.g. in DDL events)."""
+    conn.execute(text(default_partition_sql(table)))
+    for month in months_to_create(today or date.today()):
+        conn.execute(text(create_partition_sql(table, month)))
+
+
+async def list_partitions(conn, table: str) -> dict[date, str]:
+    """Attached monthly partitions of ``table``: month -> partition name."""
+    result = await conn.execute(
+        text("""
+            SELECT c.relname
+            FROM pg_inherits AS i
+            JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:table AS regclass)
+        """),
+        {"table": table},
+    )
+    months = {}
+    for (name,) in result.all():
+        month = parse_partition_name(table, name)
+        if month:
+            months[month] = name
+    return months
+
+
+async def ensure_partitions(conn, today: date, months_ahead: int = MONTHS_AHEAD) -> tuple[list[str], list[str]]:
+    """
+    Create the monthly partitions of every report table up to ``months_ahead``.
+
+    Returns:
+        tuple[list[str], list[str]]: Created partitions and skipped ones (see :func:`ensure_months`).
+    """
+    return await ensure_months(conn, months_to_create(today, months_ahead))
+
+
+async def ensure_months(conn, months) -> tuple[list[str], list[str]]:
+    """
+    Create the partitions of the given months in every report table, if missing.
+
+    A month whose rows already landed in the default partition cannot be
+    created (Postgres would have to move them); it is skipped and reported.
+
+    Args:
+        conn: Async connection or session. Statements run as it runs them: on the
+            autocommit engine each one commits on its own unless the caller opened a
+            real transaction (:func:`solomia.core.db.transaction`).
+        months (Iterable[date]): Months to cover (any day of the month).
+
+    Returns:
+        tuple[list[str], list[str]]: Created partitions and skipped ones.
+    """
+    months = sorted({month_start(month) for month in months})
+    created, skipped = [], []
+    for table, column in PARTITIONED_TABLES.items():
+        existing = await list_partitions(conn, table)
+        for month in months:
+            if month in existing:
+                continue
+            in_default = await conn.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {column} >= :start AND {column} < :end)"),
+                {"start": month, "end": add_months(month, 1)},
+            )
+            if in_default.scalar():
+                skipped.append(partition_name(table, month))
+                continue
+            await conn.execute(text(create_partition_sql(table, month)))
+            created.append(partition_name(table, month))
+    return created, skipped
+
+
+async def archive_partitions(conn, today: date, retain_months: int = RETAIN_MONTHS, drop: bool = False,
+                             schema: str = ARCHIVE_SCHEMA) -> list[str]:
+    """
+    Detach months older than the retention window, then move them to ``schema`` or drop them.
+
+    ``report_items`` partitions go first, and the detached copy loses its
+    foreign key to ``reports`` so the matching ``reports`` month can be
+    detached after it.
+
+    Run it inside :func:`solomia.core.db.transaction`. On the autocommit engine
+    each step would commit on its own, and a failure partway could leave a
+    partition detached but still in ``public``, where :func:`list_partitions`
+    no longer finds it.
+
+    Returns:
+        list[str]: Detached partitions.
+    """
+    detached = []
+    if not drop:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+
+    for table in reversed(PARTITIONED_TABLES):
+        existing = await list_partitions(conn, table)
+        for month in months_to_archive(list(existing), today, retain_months):
+            name = existing[month]
+            await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            parents = ", ".join(f"CAST('{parent}' AS regclass)" for parent in PARTITIONED_TABLES)
+            foreign_keys = await conn.execute(
+                text(f"""
+                    SELECT conname FROM pg_constraint
+                    WHERE conrelid = CAST(:name AS regclass) AND contype = 'f' AND confrelid IN ({parents})
+                """),
+                {"name": name},
+            )
+            for (constraint,) in foreign_keys.all():
+                await conn.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+
+            if drop:
+                await conn.execute(text(f"DROP TABLE {name}"))
+            else:
+                await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+            detached.append(name)
+    return detached
@@ -0,0 +1,213 @@
+"""
+Opt-in sampling profiler for bot updates and CLI scripts.
+
+Enabled with ``SOLOMIA_PROFILE=1`` (or ``/profile on`` from an admin). A
+background thread samples the event loop thread every few milliseconds and
+attributes each stack to the asyncio task that is running at that moment,
+so concurrent updates do not pollute each other's profiles. For every
+profiled update or script run it writes to ``SOLOMIA_PROFILE_DIR``:
+
+    <name>.collapsed   collapsed stacks, ready for flamegraph.pl / speedscope
+    <name>.json        duration, sample count, event-loop lag, top frames
+
+Environment:
+    SOLOMIA_PROFILE              1 to enable at startup
+    SOLOMIA_PROFILE_EVERY        profile every Nth update (default 1)
+    SOLOMIA_PROFILE_INTERVAL_MS  sampling interval (default 5)
+    SOLOMIA_PROFILE_DIR          output directory (default ./profiles)
+"""
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from solomia.core import metrics
+
+LOOP_LAG_INTERVAL = 0.1
+
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """Samples and timings collected for one update or script run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.stacks: Counter[str] = Counter()
+        self.max_loop_lag = 0.0
+
+    def add(self, stack: str):
+        self.stacks[stack] += 1
+
+    def dump(self, directory: str) -> str:
+        """Write the collapsed stacks and a JSON summary; returns the file stem."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        stem = os.path.join(directory, f"{stamp}-{_SAFE_NAME_RE.sub('_', self.name)}")
+
+        with open(f"{stem}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self_time: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += count
+        with open(f"{stem}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "name": self.name,
+                "duration_ms": round(self.duration * 1000, 3),
+                "samples": sum(self.stacks.values()),
+                "max_loop_lag_ms": round(self.max_loop_lag * 1000, 3),
+                "top_self": self_time.most_common(20),
+            }, f, ensure_ascii=False, indent=2)
+        return stem
+
+
+class Profiler:
+    """
+    Process-wide profiling switch, sampler thread and loop-lag monitor.
+
+    Use the module-level :data:`profiler` instance.
+    """
+
+    def __init__(self, enabled: bool = False, every: int = 1, interval: float = 0.005,
+                 output_dir: str = "profiles"):
+        self.enabled = enabled
+        self.every = max(1, every)
+        self.interval = interval
+        self.output_dir = output_dir
+        self._seen = 0
+        self._sessions: dict[object, ProfileSession] = {}
+        self._loop = None
+        self._loop_thread_id = None
+        self._sampler: threading.Thread | None = None
+        self._lag_task: asyncio.Task | None = None
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            enabled=os.getenv("SOLOMIA_PROFILE", "").lower() in ("1", "true", "yes", "on"),
+            every=int(os.getenv("SOLOMIA_PROFILE_EVERY", "1")),
+            interval=float(os.getenv("SOLOMIA_PROFILE_INTERVAL_MS", "5")) / 1000,
+            output_dir=os.getenv("SOLOMIA_PROFILE_DIR", "profiles"),
+        )
+
+    # ---- switches ----
+    def enable(self, every: int | None = None):
+        self.enabled = True
+        if every:
+            self.every = max(1, every)
+
+    def disable(self):
+        self.enabled = False
+
+    def should_sample(self) -> bool:
+        """True for every Nth call while profiling is enabled."""
+        if not self.enabled:
+            return False
+        self._seen += 1
+        return self._seen % self.every == 0
+
+    # ---- sessions ----
+    @contextmanager
+    def session(self, name: str):
+        """
+        Profile the current asyncio task for the duration of the ``with`` block.
+
+        Must be entered from a coroutine running on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        self._attach(loop)
+        task = asyncio.current_task()
+        session = ProfileSession(name)
+        self._sessions[task] = session
+        try:
+            yield session
+        finally:
+            session.duration = time.perf_counter() - session.started
+            self._sessions.pop(task, None)
+            session.dump(self.output_dir)
+
+    def _attach(self, loop):
+        if self._loop is not loop:
+            self._loop = loop
+            self._loop_thread_id = threading.get_ident()
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_forever, name="solomia-profiler", daemon=True)
+            self._sampler.start()
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = loop.create_task(self._monitor_loop_lag())
+
+    def _sample_forever(self):
+        current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+        while True:
+            time.sleep(self.interval)
+            if not self._sessions:
+                if not self.enabled:
+                    return
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = _collapse(frame)
+            if current_tasks is not None:
+                session = self._sessions.get(current_tasks.get(self._loop))
+                if session is not None:
+                    session.add(stack)
+            else:
+                # No way to tell tasks apart: charge every active session.
+                for session in list(self._sessions.values()):
+                    session.add(stack)
+
+    async def _monitor_loop_lag(self):
+        """Measure how late the loop wakes us up; lateness = time blocked by other code."""
+        while self.enabled or self._sessions:
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            lag = max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL)
+            metrics.LOOP_LAG.observe(lag)
+            for session in list(self._sessions.values()):
+                session.max_loop_lag = max(session.max_loop_lag, lag)
+
+
+profiler = Profiler.from_env()
+
+
+def run(coro, name: str | None = None):
+    """
+    ``asyncio.run`` for script entry points, profiled when ``SOLOMIA_PROFILE`` is on.
+
+    Args:
+        coro: The script's main coroutine.
+        name (str | None): Profile name (defaults to the coroutine name).
+    """
+    if not profiler.enabled:
+        return asyncio.run(coro)
+
+    async def profiled():
+        with profiler.session(name or coro.__qualname__):
+            return await coro
+
+    return asyncio.run(profiled())
@@ -0,0 +1,116 @@
+"""
+Coalescing of concurrent identical calls, and a short-lived negative cache.
+
+``SingleFlight`` hands the first caller for a key an owned future and every
+concurrent caller for the same key the same future, so expensive work
+(embedding, LLM classification) runs once per key at a time. Results are not
+cached: once the call finishes, the next caller starts a new one.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_key(text: str) -> str:
+    """Key for product-like strings: lowercase, trimmed, single spaces."""
+    return _WHITESPACE_RE.sub(" ", text.strip().lower())
+
+
+class SingleFlight:
+    """In-flight call registry keyed by a hashable key."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def claim(self, key: Hashable) -> tuple[asyncio.Future, bool]:
+        """
+        Join the in-flight call for ``key`` or become its owner.
+
+        Args:
+            key (Hashable): Call key.
+
+        Returns:
+            tuple[asyncio.Future, bool]: The shared future and whether the caller owns it.
+            The owner must settle it with :meth:`resolve` or :meth:`fail`.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            return future, False
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        return future, True
+
+    def resolve(self, key: Hashable, value: Any):
+        future = self._calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def fail(self, key: Hashable, exc: BaseException):
+        future = self._calls.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run ``fn()`` once for all concurrent callers with the same key.
+
+        The call runs in its own task, so cancelling the caller that started it
+        does not cancel it for the others.
+
+        Returns:
+            tuple[Any, bool]: The result and whether it came from another caller's call.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+
+        task = self._calls[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved when nobody was left waiting
+
+
+class NegativeCache:
+    """Keys remembered as "no answer" for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expires: dict[Hashable, float] = {}
+
+    def add(self, key: Hashable):
+        if len(self._expires) >= self.max_size:
+            self._evict()
+        self._expires[key] = time.monotonic() + self.ttl
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires = self._expires.get(key)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._expires[key]
+            return False
+        return True
+
+    def discard(self, key: Hashable):
+        self._expires.pop(key, None)
+
+    def clear(self):
+        self._expires.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        self._expires = {k: t for k, t in self._expires.items() if t >= now}
+        while len(self._expires) >= self.max_size:
+            self._expires.pop(next(iter(self._expires)))
@@ -0,0 +1,135 @@
+"""
+SQL statement accounting per logical operation.
+
+:func:`install` hooks an engine's cursor events once; :func:`track` then
+counts statements, round trips and DB time for everything the current task
+runs inside the ``with`` block, and can enforce a statement budget:
+
+    # user lookup, report upsert, one multi-row insert of the items
+    with sql_tracker.track("save 20-item report", max_statements=3) as stats:
+        await save_report(items)
+
+Operations nest, so a request-level operation also sees the statements of
+the repository calls inside it. Identical statements repeated many times in
+one operation are reported as N+1 candidates.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from solomia.core import metrics
+
+N_PLUS_ONE_THRESHOLD = 5
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class StatementBudgetExceeded(AssertionError):
+    """Raised when an operation issues more statements than it declared."""
+
+
+class OperationStats:
+    """Statement counters for one tracked operation."""
+
+    def __init__(self, name: str, parent: "OperationStats | None" = None):
+        self.name = name
+        self.parent = parent
+        self.statements = 0
+        self.round_trips = 0
+        self.db_time = 0.0
+        self.by_statement: Counter[str] = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statements executed at least ``threshold`` times: likely N+1 loops."""
+        return [(sql, n) for sql, n in self.by_statement.most_common() if n >= threshold]
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.name}: {self.statements} statements, {self.round_trips} round trips, "
+            f"{self.db_time * 1000:.1f} ms in DB"
+        ]
+        for sql, n in self.by_statement.most_common(10):
+            lines.append(f"  {n:4d} × {sql[:160]}")
+        return "\n".join(lines)
+
+
+_current: ContextVar[OperationStats | None] = ContextVar("sql_operation", default=None)
+
+
+def _normalize(statement: str) -> str:
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("sql_tracker_start", []).append(time.perf_counter())
+    metrics.DB_STATEMENTS.inc()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["sql_tracker_start"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    count = len(parameters) if executemany and parameters else 1
+    sql = _normalize(statement)
+    while stats is not None:
+        stats.round_trips += 1
+        stats.statements += count
+        stats.db_time += elapsed
+        stats.by_statement[sql] += count
+        stats = stats.parent
+
+
+def _handle_error(context):
+    starts = context.connection.info.get("sql_tracker_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def install(engine):
+    """Attach the tracker to an engine (``Engine`` or ``AsyncEngine``). Idempotent."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def track(name: str, max_statements: int | None = None, max_round_trips: int | None = None,
+          n_plus_one_threshold: int | None = None):
+    """
+    Track the statements issued by the current task inside the ``with`` block.
+
+    Args:
+        name (str): Logical operation name, used in failure messages.
+        max_statements (int | None): Statement budget; exceeding it raises.
+        max_round_trips (int | None): Round-trip budget; exceeding it raises.
+        n_plus_one_threshold (int | None): Raise if one statement repeats this often.
+
+    Yields:
+        OperationStats: Live counters for the operation.
+
+    Raises:
+        StatementBudgetExceeded: When a declared budget is exceeded.
+    """
+    stats = OperationStats(name, _current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+    problems = []
+    if max_statements is not None and stats.statements > max_statements:
+        problems.append(f"{stats.statements} statements > budget {max_statements}")
+    if max_round_trips is not None and stats.round_trips > max_round_trips:
+        problems.append(f"{stats.round_trips} round trips > budget {max_round_trips}")
+    if n_plus_one_threshold is not None and stats.repeated(n_plus_one_threshold):
+        problems.append(f"N+1 pattern (a statement ran ≥ {n_plus_one_threshold} times)")
+    if problems:
+        raise StatementBudgetExceeded(f"{'; '.join(problems)}\n{stats.summary()}")
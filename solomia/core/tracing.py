@@ -0,0 +1,87 @@
+"""
+Trace spans for the bot and the report pipeline.
+
+Spans are exported through OpenTelemetry when it is installed
+(``pip install opentelemetry-sdk opentelemetry-exporter-otlp-proto-http``) and
+``OTEL_EXPORTER_OTLP_ENDPOINT`` points at a collector, e.g. a local
+otel-collector or Jaeger on ``http://localhost:4318``. Otherwise :func:`span`
+still counts DB statements and :func:`stage` still feeds the stage histogram,
+so call sites never need to check whether tracing is enabled.
+"""
+import os
+from contextlib import contextmanager
+
+from solomia.core import metrics, sql_tracker
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+_provider = None
+_tracer = None
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def init_tracing(service_name: str = "solomia") -> bool:
+    """
+    Configure span export to the OTLP collector from the environment.
+
+    Returns:
+        bool: True if spans will be exported, False if tracing stays local.
+    """
+    global _provider, _tracer
+    if otel_trace is None or not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return False
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    otel_trace.set_tracer_provider(_provider)
+    _tracer = otel_trace.get_tracer("solomia")
+    return True
+
+
+def shutdown_tracing():
+    """Flush pending spans to the collector."""
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+    _provider, _tracer = None, None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Open a span around the ``with`` block.
+
+    The span gets a ``db.statements`` attribute with the number of SQL
+    statements issued inside it. Yields an object with ``set_attribute``.
+    """
+    with sql_tracker.track(name) as stats:
+        if _tracer is None:
+            yield _NOOP_SPAN
+            return
+        with _tracer.start_as_current_span(name, attributes=attributes) as current:
+            try:
+                yield current
+            finally:
+                current.set_attribute("db.statements", stats.statements)
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Span plus ``solomia_stage_seconds`` timing for one pipeline stage (parse/classify/save)."""
+    with metrics.STAGE_LATENCY.time(stage=name), span(f"report.{name}", **attributes) as current:
+        yield current
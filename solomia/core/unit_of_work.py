@@ -0,0 +1,47 @@
+"""
+Read-your-writes scope for replica routing.
+
+Repositories send reads to the replica session factory when one is
+configured. Inside :func:`unit_of_work`, once anything has been written, the
+following reads go to the primary instead, so they see the unit's own writes
+regardless of replication lag. Outside a unit of work reads always go to the
+replica. Each Telegram update runs in its own unit of work.
+"""
+import contextvars
+from contextlib import contextmanager
+
+
+class _State:
+    __slots__ = ("written",)
+
+    def __init__(self):
+        self.written = False
+
+
+_current: contextvars.ContextVar[_State | None] = contextvars.ContextVar("unit_of_work", default=None)
+
+
+@contextmanager
+def unit_of_work():
+    """Open a unit of work; nested blocks join the outer one."""
+    if _current.get() is not None:
+        yield
+        return
+    token = _current.set(_State())
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def mark_written():
+    """Record that the current unit of work wrote to the primary (no-op outside one)."""
+    state = _current.get()
+    if state is not None:
+        state.written = True
+
+
+def reads_from_primary() -> bool:
+    """True if the current unit of work has written, so reads must go to the primary."""
+    state = _current.get()
+    return state is not None and state.written
@@ -3,5 +3,7 @@ from .user import User
 from .reports import Report
 from .reports_item import ReportItem
 from .category_to_user import CategoryToUser
+from .category_example import CategoryExample
+from .fsm_state import FsmState
 
-__all__ = ["FoodCategory", "User", "Report", "ReportItem", "CategoryToUser"]
\ No newline at end of file
+__all__ = ["FoodCategory", "User", "Report", "ReportItem", "CategoryToUser", "CategoryExample", "FsmState"]
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, LargeBinary, REAL, String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from solomia.core.db import Base
+from solomia.models.food_category import Vector
+
+
+class CategoryExample(Base):
+    """One learned example of a category with its own embedding (for nearest-neighbour search)."""
+
+    __tablename__ = "category_examples"
+    __table_args__ = (UniqueConstraint("category_id", "example"),)
+
+    id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, ForeignKey("food_categories.id", ondelete="CASCADE"), nullable=False, index=True)
+    example = Column(String, nullable=False)
+    # pgvector, or int8/float16 codes with a scale (see solomia.services.embedding_codec)
+    embedding = Column(Vector())
+    embedding_codes = Column(LargeBinary)
+    embedding_scale = Column(REAL)
+
+    category = relationship("FoodCategory")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, LargeBinary, REAL, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.types import UserDefinedType
 from sqlalchemy.orm import relationship
@@ -7,20 +7,25 @@ from solomia.core.db import Base
 
 
 class Vector(UserDefinedType):
-    def __init__(self, dimensions):
+    def __init__(self, dimensions: int | None = None):
         self.dimensions = dimensions
 
     def get_col_spec(self):
-        return f"vector({self.dimensions})"
+        # without dimensions the column takes any size (EMBEDDING_DIM is configurable)
+        return f"vector({self.dimensions})" if self.dimensions else "vector"
 
 
 class FoodCategory(Base):
     __tablename__ = "food_categories"
+    __table_args__ = (UniqueConstraint("name", name="uq_food_categories_name"),)
 
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     examples = Column(ARRAY(String))
-    embedding = Column(Vector(768))
+    embedding = Column(Vector())
+    # quantized alternative to ``embedding``, see solomia.services.embedding_codec
+    embedding_codes = Column(LargeBinary)
+    embedding_scale = Column(REAL)
 
     users = relationship("User",secondary="category_to_user",viewonly=True)
     user_links = relationship("CategoryToUser", back_populates="category", cascade="all, delete-orphan")
\ No newline at end of file
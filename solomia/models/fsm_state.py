@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from solomia.core.db import Base
+
+
+class FsmState(Base):
+    """Conversation (aiogram FSM) state of one chat/user, shared by every bot worker."""
+
+    __tablename__ = "fsm_states"
+
+    key = Column(String, primary_key=True)  # DefaultKeyBuilder key: fsm:<chat_id>:<user_id>:<destiny>
+    state = Column(String, nullable=True)
+    data = Column(JSONB, nullable=False, server_default="{}")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
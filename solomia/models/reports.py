@@ -1,18 +1,35 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID 
-from sqlalchemy import Column, ForeignKey, Date, DateTime
+from sqlalchemy import Column, ForeignKey, Date, DateTime, Index, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from solomia.core.db import Base
+from solomia.core import partitions
 
 
 class Report(Base):
+    """Daily report; range-partitioned by month on ``date`` (see :mod:`solomia.core.partitions`)."""
+
     __tablename__ = "reports"
+    __table_args__ = (
+        Index("ix_reports_user_id_date_id", "user_id", "date", "id"),
+        # one report per user and day; includes the partition key, as Postgres requires
+        UniqueConstraint("user_id", "date", name="uq_reports_user_id_date"),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"))
-    date = Column(Date, nullable=False)
+    # part of the primary key: a partitioned table's keys must include the partition column
+    date = Column(Date, primary_key=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", back_populates="reports")
     items = relationship("ReportItem", back_populates="report", cascade="all, delete-orphan")
+
+
+# create_all() only creates the partitioned parent; give it somewhere to put rows
+event.listen(
+    Report.__table__, "after_create",
+    lambda target, conn, **kw: partitions.create_initial_partitions(conn, "reports"),
+)
@@ -1,18 +1,32 @@
 import uuid
 from sqlalchemy.dialects.postgresql import UUID 
-from sqlalchemy import Column, Integer, Float, String, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, Date, ForeignKey, ForeignKeyConstraint, event
 from sqlalchemy.orm import relationship
 from solomia.core.db import Base
+from solomia.core import partitions
 
 
 class ReportItem(Base):
+    """Report line; range-partitioned by month on ``report_date``, a copy of its report's date."""
+
     __tablename__ = "report_items"
+    __table_args__ = (
+        ForeignKeyConstraint(["report_id", "report_date"], ["reports.id", "reports.date"], ondelete="CASCADE"),
+        {"postgresql_partition_by": "RANGE (report_date)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    report_id = Column(UUID, ForeignKey("reports.id", ondelete="CASCADE"))
+    report_id = Column(UUID, index=True)
+    report_date = Column(Date, primary_key=True, nullable=False)
     category_id = Column(Integer, ForeignKey("food_categories.id", ondelete="SET NULL"))
     product_name = Column(String, nullable=False)
     amount_grams = Column(Float, nullable=True)
 
     report = relationship("Report", back_populates="items")
     category = relationship("FoodCategory")
+
+
+event.listen(
+    ReportItem.__table__, "after_create",
+    lambda target, conn, **kw: partitions.create_initial_partitions(conn, "report_items"),
+)
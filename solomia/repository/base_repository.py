@@ -1,35 +1,79 @@
-from contextlib import AbstractAsyncContextManager
-from typing import Callable, Type, TypeVar, Generic, Any, Sequence
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import AsyncIterator, Callable, Type, TypeVar, Generic, Any, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from solomia.core import unit_of_work
+from solomia.core.db import TRANSACTION_ISOLATION
+
 T = TypeVar("T")
 
+SessionFactory = Callable[..., AbstractAsyncContextManager[AsyncSession]]
+
 class BaseRepository(Generic[T]):
-    """Generic async repository for SQLAlchemy models."""
+    """
+    Generic async repository for SQLAlchemy models.
+
+    Writes go through ``session_factory`` (the primary). Queries that tolerate
+    replication lag use :meth:`read_session`, which goes to
+    ``read_session_factory`` (a replica, when one is configured) unless the
+    current unit of work has already written.
+    """
 
-    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]], model: Type[T]):
+    def __init__(self, session_factory: SessionFactory, model: Type[T], read_session_factory: SessionFactory | None = None):
         self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
         self.model = model
 
+    def read_session(self) -> AbstractAsyncContextManager[AsyncSession]:
+        """Session for reads: the replica, or the primary after a write in the current unit of work."""
+        if unit_of_work.reads_from_primary():
+            return self.session_factory()
+        return self.read_session_factory()
+
+    def write_session(self) -> AbstractAsyncContextManager[AsyncSession]:
+        """Session on the primary; later reads in the current unit of work follow it there."""
+        unit_of_work.mark_written()
+        return self.session_factory()
+
+    @asynccontextmanager
+    async def transaction(self, read: bool = False) -> AsyncIterator[AsyncSession]:
+        """
+        Session whose statements commit together when the block ends, or not at all.
+
+        The engine runs in autocommit mode, so a plain session commits every
+        statement on its own. Use this for multi-statement writes, temporary
+        tables and server-side cursors, and do not call ``commit()`` inside.
+
+        Args:
+            read (bool): Open it on :meth:`read_session` instead of the primary (long read-only cursors).
+
+        Yields:
+            AsyncSession: Session inside the transaction.
+        """
+        async with (self.read_session() if read else self.write_session()) as session:
+            await session.connection(execution_options={"isolation_level": TRANSACTION_ISOLATION})
+            yield session
+            await session.commit()
+
     async def get_all(self) -> Sequence[T]:
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             res = await session.execute(select(self.model))
             return res.scalars().all()
 
     async def get_by_id(self, obj_id: Any) -> T | None:
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             return await session.get(self.model, obj_id)
 
     async def add(self, obj: T) -> T:
-        async with self.session_factory() as session:
+        async with self.write_session() as session:
             session.add(obj)
             await session.commit()
             await session.refresh(obj)
             return obj
 
     async def delete(self, obj: T) -> None:
-        async with self.session_factory() as session:
+        async with self.write_session() as session:
             await session.delete(obj)
             await session.commit()
@@ -1,20 +1,39 @@
-from typing import Callable
+import json
+from typing import TYPE_CHECKING, Callable
 from contextlib import AbstractAsyncContextManager
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-import numpy as np
 
+from solomia.core import notifications
 from solomia.models.food_category import FoodCategory
 from solomia.repository.base_repository import BaseRepository
+from solomia.services import embedding_codec
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class FoodCategoryRepository(BaseRepository[FoodCategory]):
-    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
-        super().__init__(session_factory, FoodCategory)
+    """
+    Categories, their examples and embeddings.
+
+    Every write runs in one transaction (:meth:`transaction`) together with a
+    ``NOTIFY`` on :data:`notifications.CATEGORY_CHANNEL`. Other processes hear
+    about a change only after it commits, and update their in-memory index
+    (see ``category_service.apply_change``).
+
+    Embeddings are written in the ``EMBEDDING_STORAGE`` format: the pgvector
+    ``embedding`` column, or quantized ``embedding_codes`` (+ ``embedding_scale``);
+    reads return all three columns (see :mod:`solomia.services.embedding_codec`).
+    """
+
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, FoodCategory, read_session_factory)
 
     async def get_id_by_name(self, category_name: str) -> int | None:
         """Return category id by its name."""
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             res = await session.execute(
                 text("SELECT id FROM food_categories WHERE name = :name"),
                 {"name": category_name.strip()},
@@ -23,7 +42,7 @@ class FoodCategoryRepository(BaseRepository[FoodCategory]):
             return row[0] if row else None
 
     async def get_by_example(self, example_name: str):
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             res = await session.execute(
                 text("SELECT id, name FROM food_categories WHERE :pname = ANY(examples)"),
                 {"pname": example_name},
@@ -31,15 +50,98 @@ class FoodCategoryRepository(BaseRepository[FoodCategory]):
             return res.mappings().first()
 
     async def get_all_with_embeddings(self):
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             res = await session.execute(
-                text("SELECT id, name, examples, embedding FROM food_categories")
+                text("SELECT id, name, examples, embedding, embedding_codes, embedding_scale FROM food_categories")
             )
             return res.mappings().all()
-        
+
+    async def get_table_version(self) -> str:
+        """
+        Fingerprint of ``food_categories`` content, computed server side.
+
+        Changes whenever a category is added, renamed, or gets new examples or a
+        new embedding, and whenever example embeddings are added; used to decide
+        whether a cached index snapshot is stale.
+        """
+        async with self.read_session() as session:
+            res = await session.execute(
+                text("""
+                    SELECT count(*) AS n,
+                           md5(coalesce(string_agg(
+                               md5(id::text || name || coalesce(examples::text, '') || coalesce(embedding::text, '')
+                                   || coalesce(md5(embedding_codes), '')),
+                               '' ORDER BY id), '')) AS digest,
+                           (SELECT count(*) || ':' || coalesce(max(id), 0) FROM category_examples) AS examples
+                    FROM food_categories
+                """)
+            )
+            row = res.mappings().first()
+            return f"{row['n']}-{row['digest']}-{row['examples']}"
+
+    async def get_taxonomy(self) -> dict[str, tuple[list[str], bool]]:
+        """
+        Return every category's examples and whether it has an embedding, in one query.
+
+        Returns:
+            dict[str, tuple[list[str], bool]]: Name -> (examples, has embedding).
+        """
+        async with self.read_session() as session:
+            res = await session.execute(
+                text("""
+                    SELECT name, examples, embedding IS NOT NULL OR embedding_codes IS NOT NULL AS embedded
+                    FROM food_categories
+                """)
+            )
+            return {row["name"]: (list(row["examples"] or []), row["embedded"]) for row in res.mappings().all()}
+
+    async def upsert_categories(self, rows: list[tuple[str, list[str], "np.ndarray"]], chunk_size: int = 1000) -> int:
+        """
+        Insert or update categories by name with multi-row upserts in one transaction.
+
+        Each chunk of ``chunk_size`` rows is one ``INSERT ... SELECT FROM unnest(...)
+        ON CONFLICT (name) DO UPDATE`` statement; examples travel as JSON arrays
+        because Postgres arrays cannot be ragged. A failure leaves the table as it
+        was, and the ``reload`` notification goes out only with the commit.
+
+        Args:
+            rows (list[tuple[str, list[str], np.ndarray]]): (name, examples, embedding).
+            chunk_size (int): Rows per statement.
+
+        Returns:
+            int: Rows written.
+        """
+        async with self.transaction() as session:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                encoded = [embedding_codec.encode(embedding) for _, _, embedding in chunk]
+                await session.execute(
+                    text("""
+                        INSERT INTO food_categories (name, examples, embedding, embedding_codes, embedding_scale)
+                        SELECT t.name,
+                               ARRAY(SELECT jsonb_array_elements_text(CAST(t.examples AS jsonb))),
+                               CAST(t.embedding AS vector), t.codes, t.scale
+                        FROM unnest(CAST(:names AS text[]), CAST(:examples AS text[]), CAST(:embeddings AS text[]),
+                                    CAST(:codes AS bytea[]), CAST(:scales AS real[]))
+                             AS t(name, examples, embedding, codes, scale)
+                        ON CONFLICT (name) DO UPDATE
+                        SET examples = EXCLUDED.examples, embedding = EXCLUDED.embedding,
+                            embedding_codes = EXCLUDED.embedding_codes, embedding_scale = EXCLUDED.embedding_scale
+                    """),
+                    {
+                        "names": [name for name, _, _ in chunk],
+                        "examples": [json.dumps(examples, ensure_ascii=False) for _, examples, _ in chunk],
+                        "embeddings": [e.embedding for e in encoded],
+                        "codes": [e.codes for e in encoded],
+                        "scales": [e.scale for e in encoded],
+                    },
+                )
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "reload")
+        return len(rows)
+
     async def get_examples_by_id(self, category_id: int) -> list[str]:
         """Return all examples for the given category id."""
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             res = await session.execute(
                 text("SELECT examples FROM food_categories WHERE id = :id"),
                 {"id": category_id},
@@ -47,20 +149,65 @@ class FoodCategoryRepository(BaseRepository[FoodCategory]):
             row = res.first()
             return row[0] if row else []
 
-    async def insert_category(self, name: str, examples: list[str], embedding: np.ndarray):
-        emb_str = "[" + ", ".join(str(x) for x in embedding) + "]"
-        async with self.session_factory() as session:
+    async def insert_category(self, name: str, examples: list[str], embedding: "np.ndarray"):
+        async with self.transaction() as session:
             await session.execute(
                 text("""
-                    INSERT INTO food_categories (name, examples, embedding)
-                    VALUES (:name, :examples, :embedding)
+                    INSERT INTO food_categories (name, examples, embedding, embedding_codes, embedding_scale)
+                    VALUES (:name, :examples, :embedding, :codes, :scale)
                 """),
-                {"name": name, "examples": examples, "embedding": emb_str},
+                {"name": name, "examples": examples, **embedding_codec.encode(embedding)._asdict()},
             )
-            await session.commit()
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "reload")
 
-    async def append_example(self, category_id: int, new_example: str):
-        async with self.session_factory() as session:
+    async def get_example_embeddings(self):
+        """Return (category_id, embedding) for every learned example."""
+        async with self.read_session() as session:
+            res = await session.execute(
+                text("""
+                    SELECT category_id, embedding, embedding_codes, embedding_scale
+                    FROM category_examples
+                    ORDER BY id
+                """)
+            )
+            return res.mappings().all()
+
+    async def get_examples_without_embedding(self, limit: int = 1000):
+        """Return (category_id, example) pairs from ``food_categories.examples`` not yet in ``category_examples``."""
+        async with self.read_session() as session:
+            res = await session.execute(
+                text("""
+                    SELECT c.id AS category_id, e.example
+                    FROM food_categories c
+                    CROSS JOIN LATERAL unnest(c.examples) AS e(example)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM category_examples ce
+                        WHERE ce.category_id = c.id AND ce.example = e.example
+                    )
+                    LIMIT :limit
+                """),
+                {"limit": limit},
+            )
+            return res.mappings().all()
+
+    async def insert_example_embeddings(self, rows: list[dict]):
+        """Insert ``{"category_id", "example", "embedding"}`` rows into ``category_examples`` (one round trip)."""
+        if not rows:
+            return
+        async with self.transaction() as session:
+            await session.execute(
+                text("""
+                    INSERT INTO category_examples (category_id, example, embedding, embedding_codes, embedding_scale)
+                    VALUES (:category_id, :example, :embedding, :codes, :scale)
+                    ON CONFLICT (category_id, example) DO NOTHING
+                """),
+                [{**row, **embedding_codec.encode(row["embedding"])._asdict()} for row in rows],
+            )
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "reload")
+
+    async def append_example(self, category_id: int, new_example: str, embedding: "np.ndarray | None" = None):
+        """Append an example to the category and, when given, store its embedding for nearest-neighbour search."""
+        async with self.transaction() as session:
             await session.execute(
                 text("""
                     UPDATE food_categories
@@ -69,17 +216,91 @@ class FoodCategoryRepository(BaseRepository[FoodCategory]):
                 """),
                 {"id": category_id, "example": new_example},
             )
-            await session.commit()
+            if embedding is not None:
+                await session.execute(
+                    text("""
+                        INSERT INTO category_examples (category_id, example, embedding, embedding_codes, embedding_scale)
+                        VALUES (:id, :example, :embedding, :codes, :scale)
+                        ON CONFLICT (category_id, example) DO NOTHING
+                    """),
+                    {"id": category_id, "example": new_example, **embedding_codec.encode(embedding)._asdict()},
+                )
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "example",
+                                       category_id=category_id, example=new_example)
 
-    async def update_embedding(self, category_id: int, embedding: np.ndarray):
-        emb_str = "[" + ", ".join(str(x) for x in embedding) + "]"
-        async with self.session_factory() as session:
+    async def update_embedding(self, category_id: int, embedding: "np.ndarray"):
+        async with self.transaction() as session:
             await session.execute(
                 text("""
                     UPDATE food_categories
-                    SET embedding = :embedding
+                    SET embedding = :embedding, embedding_codes = :codes, embedding_scale = :scale
                     WHERE id = :id
                 """),
-                {"id": category_id, "embedding": emb_str},
+                {"id": category_id, **embedding_codec.encode(embedding)._asdict()},
+            )
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "embedding", category_id=category_id)
+
+    async def get_example_page(self, after_id: int = 0, limit: int = 1000) -> list[tuple[int, str]]:
+        """Return (id, example) of learned examples with ids above ``after_id``, in id order (keyset pagination)."""
+        async with self.read_session() as session:
+            res = await session.execute(
+                text("SELECT id, example FROM category_examples WHERE id > :after ORDER BY id LIMIT :limit"),
+                {"after": after_id, "limit": limit},
+            )
+            return [tuple(row) for row in res.all()]
+
+    async def update_category_embeddings(self, rows: list[tuple[int, "np.ndarray"]]):
+        """Replace the embeddings of many categories by id, in one statement."""
+        await self._update_embeddings("food_categories", rows)
+
+    async def update_example_embeddings(self, rows: list[tuple[int, "np.ndarray"]]):
+        """Replace the embeddings of many learned examples by id, in one statement."""
+        await self._update_embeddings("category_examples", rows)
+
+    async def _update_embeddings(self, table: str, rows: list[tuple[int, "np.ndarray"]]):
+        if not rows:
+            return
+        encoded = [embedding_codec.encode(embedding) for _, embedding in rows]
+        async with self.transaction() as session:
+            await session.execute(
+                text(f"""
+                    UPDATE {table} AS dst
+                    SET embedding = CAST(t.embedding AS vector), embedding_codes = t.codes, embedding_scale = t.scale
+                    FROM unnest(CAST(:ids AS integer[]), CAST(:embeddings AS text[]),
+                                CAST(:codes AS bytea[]), CAST(:scales AS real[]))
+                         AS t(id, embedding, codes, scale)
+                    WHERE dst.id = t.id
+                """),
+                {
+                    "ids": [row_id for row_id, _ in rows],
+                    "embeddings": [e.embedding for e in encoded],
+                    "codes": [e.codes for e in encoded],
+                    "scales": [e.scale for e in encoded],
+                },
+            )
+            await notifications.notify(session, notifications.CATEGORY_CHANNEL, "reload")
+
+    async def get_category_embedding(self, category_id: int) -> "np.ndarray | None":
+        """Return the category's embedding as a float32 vector, or None. Reads the primary."""
+        # Called on change notifications, which can arrive before a replica has the row
+        async with self.session_factory() as session:
+            res = await session.execute(
+                text("SELECT embedding, embedding_codes, embedding_scale FROM food_categories WHERE id = :id"),
+                {"id": category_id},
+            )
+            row = res.first()
+            return embedding_codec.decode(*row) if row else None
+
+    async def get_example_embedding(self, category_id: int, example: str) -> "np.ndarray | None":
+        """Return the embedding stored for one example of the category, or None. Reads the primary."""
+        async with self.session_factory() as session:
+            res = await session.execute(
+                text("""
+                    SELECT embedding, embedding_codes, embedding_scale
+                    FROM category_examples
+                    WHERE category_id = :id AND example = :example
+                """),
+                {"id": category_id, "example": example},
             )
-            await session.commit()
+            row = res.first()
+            return embedding_codec.decode(*row) if row else None
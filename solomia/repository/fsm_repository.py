@@ -0,0 +1,73 @@
+import json
+from typing import Callable
+from contextlib import AbstractAsyncContextManager
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from solomia.models.fsm_state import FsmState
+from solomia.repository.base_repository import BaseRepository
+
+
+class FsmStateRepository(BaseRepository[FsmState]):
+    """Conversation state rows behind :class:`solomia.core.fsm_storage.PostgresStorage`."""
+
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, FsmState, read_session_factory)
+
+    async def get_state(self, key: str) -> tuple[str | None, dict] | None:
+        """
+        Fetch the state and data stored under a key.
+
+        Args:
+            key (str): Storage key.
+
+        Returns:
+            tuple[str | None, dict] | None: ``(state, data)``, or None if nothing is stored.
+        """
+        # Always the primary: a lagging replica would hand back a step the user already left
+        async with self.session_factory() as session:
+            result = await session.execute(
+                text("SELECT state, data FROM fsm_states WHERE key = :key"),
+                {"key": key},
+            )
+            row = result.first()
+            if not row:
+                return None
+            state, data = row
+            return state, json.loads(data) if isinstance(data, str) else data
+
+    async def save_states(self, states: dict[str, tuple[str | None, dict]]) -> None:
+        """
+        Write many keys in one transaction: one multi-row upsert, one delete.
+
+        Keys with no state and no data are deleted rather than stored, so the
+        table only holds conversations that are in progress. Both statements
+        commit together, so a failed flush can be retried as a whole.
+
+        Args:
+            states (dict[str, tuple[str | None, dict]]): Key -> ``(state, data)``.
+        """
+        kept = {key: value for key, value in states.items() if value[0] is not None or value[1]}
+        cleared = [key for key in states if key not in kept]
+        async with self.transaction() as session:
+            if kept:
+                await session.execute(
+                    text("""
+                        INSERT INTO fsm_states (key, state, data, updated_at)
+                        SELECT t.key, t.state, CAST(t.data AS jsonb), NOW()
+                        FROM unnest(CAST(:keys AS text[]), CAST(:states AS text[]), CAST(:data AS text[]))
+                             AS t(key, state, data)
+                        ON CONFLICT (key) DO UPDATE
+                        SET state = EXCLUDED.state, data = EXCLUDED.data, updated_at = EXCLUDED.updated_at
+                    """),
+                    {
+                        "keys": list(kept),
+                        "states": [state for state, _ in kept.values()],
+                        "data": [json.dumps(data, ensure_ascii=False) for _, data in kept.values()],
+                    },
+                )
+            if cleared:
+                await session.execute(
+                    text("DELETE FROM fsm_states WHERE key = ANY(CAST(:keys AS text[]))"),
+                    {"keys": cleared},
+                )
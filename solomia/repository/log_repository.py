@@ -0,0 +1,123 @@
+from typing import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from solomia.core import partitions
+from solomia.models.reports_item import ReportItem
+from solomia.repository.base_repository import BaseRepository
+from solomia.repository.records import LogRecord, to_columns
+
+EXPORT_COLUMNS = list(LogRecord._fields)
+IMPORT_COLUMNS = ["user_id", "date", "product_name", "amount_grams", "category_id"]
+
+
+class LogRepository(BaseRepository[ReportItem]):
+    """Bulk movement of food logs (reports joined with their items) in and out of the database."""
+
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, ReportItem, read_session_factory)
+
+    async def stream_logs(self, start: date, end: date, user_id: str | None = None,
+                          batch_size: int = 5000) -> AsyncIterator[list[LogRecord]]:
+        """
+        Stream food log rows through a server-side cursor, ``batch_size`` rows at a time.
+
+        The cursor lives in a transaction, as Postgres requires.
+
+        Args:
+            start (date): First day, inclusive.
+            end (date): Last day, inclusive.
+            user_id (str | None): Only this user's logs; all users when None.
+            batch_size (int): Rows fetched per round trip.
+
+        Yields:
+            list[LogRecord]: Rows ordered by user, date and product.
+        """
+        async with self.transaction(read=True) as session:
+            result = await session.stream(
+                text("""
+                    SELECT u.telegram_id, r.date, ri.product_name, ri.amount_grams,
+                           ri.category_id, fc.name AS category
+                    FROM report_items AS ri
+                    JOIN reports AS r ON r.id = ri.report_id AND r.date = ri.report_date
+                    JOIN users AS u ON u.id = r.user_id
+                    LEFT JOIN food_categories AS fc ON fc.id = ri.category_id
+                    WHERE r.date BETWEEN :start AND :end
+                      AND ri.report_date BETWEEN :start AND :end
+                      AND (CAST(:user_id AS uuid) IS NULL OR r.user_id = CAST(:user_id AS uuid))
+                    ORDER BY u.telegram_id, r.date, ri.product_name
+                """).execution_options(yield_per=batch_size),
+                {"start": start, "end": end, "user_id": user_id},
+            )
+            async for rows in result.partitions(batch_size):
+                yield list(map(LogRecord._make, rows))
+
+    async def stream_log_columns(self, start: date, end: date, user_id: str | None = None,
+                                 batch_size: int = 5000) -> AsyncIterator[dict[str, list]]:
+        """
+        Same rows as :meth:`stream_logs`, one batch of columns at a time.
+
+        Yields:
+            dict[str, list]: :data:`EXPORT_COLUMNS` -> the batch's values.
+        """
+        async for batch in self.stream_logs(start, end, user_id, batch_size):
+            yield to_columns(batch, EXPORT_COLUMNS)
+
+    async def bulk_import(self, rows: list[tuple]) -> tuple[int, int]:
+        """
+        Load one batch of food log rows with ``COPY`` and turn them into reports and items set-wise.
+
+        The rows are copied into a temporary staging table; then one statement
+        creates the missing ``(user, date)`` reports and one inserts every
+        item. Monthly partitions are created for historical months first, so
+        old logs do not pile up in the default partition. The batch is one
+        transaction; prepare the next one (classification, user lookups)
+        outside it, so no connection is held during network calls.
+
+        Args:
+            rows (list[tuple]): :data:`IMPORT_COLUMNS` tuples.
+
+        Returns:
+            tuple[int, int]: Reports created and items inserted.
+        """
+        async with self.transaction() as session:
+            await session.execute(text("""
+                CREATE TEMP TABLE import_logs (
+                    user_id UUID NOT NULL,
+                    date DATE NOT NULL,
+                    product_name VARCHAR NOT NULL,
+                    amount_grams DOUBLE PRECISION,
+                    category_id INTEGER
+                ) ON COMMIT DROP
+            """))
+            connection = await session.connection()
+            raw = (await connection.get_raw_connection()).driver_connection
+            await raw.copy_records_to_table("import_logs", records=rows, columns=IMPORT_COLUMNS)
+
+            months = await session.execute(
+                text("SELECT DISTINCT CAST(date_trunc('month', date) AS date) FROM import_logs")
+            )
+            await partitions.ensure_months(session, [row[0] for row in months.all()])
+
+            reports = await session.execute(text("""
+                INSERT INTO reports (id, user_id, date, created_at)
+                SELECT gen_random_uuid(), s.user_id, s.date, NOW()
+                FROM (SELECT DISTINCT user_id, date FROM import_logs) AS s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM reports AS r WHERE r.user_id = s.user_id AND r.date = s.date
+                )
+            """))
+            items = await session.execute(text("""
+                INSERT INTO report_items (id, report_id, report_date, category_id, product_name, amount_grams)
+                SELECT gen_random_uuid(), r.id, s.date, s.category_id, s.product_name, s.amount_grams
+                FROM import_logs AS s
+                JOIN (
+                    SELECT DISTINCT ON (user_id, date) id, user_id, date
+                    FROM reports
+                    WHERE (user_id, date) IN (SELECT DISTINCT user_id, date FROM import_logs)
+                    ORDER BY user_id, date, created_at
+                ) AS r ON r.user_id = s.user_id AND r.date = s.date
+            """))
+            return reports.rowcount, items.rowcount
@@ -0,0 +1,89 @@
+from typing import Callable, Sequence
+from contextlib import AbstractAsyncContextManager
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from solomia.models.category_to_user import CategoryToUser
+from solomia.repository.base_repository import BaseRepository
+
+
+class PlanRepository(BaseRepository[CategoryToUser]):
+    """Set-based reads of plans and eaten totals for many users at once."""
+
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, CategoryToUser, read_session_factory)
+
+    async def get_planned_user_ids(self, after=None, limit: int = 1000) -> list:
+        """
+        Page through users that have a plan, in id order (keyset pagination).
+
+        Args:
+            after (UUID | None): Last id of the previous page.
+            limit (int): Page size.
+
+        Returns:
+            list: Up to ``limit`` user ids greater than ``after``.
+        """
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT DISTINCT user_id
+                    FROM category_to_user
+                    WHERE amount_grams > 0
+                      AND (CAST(:after AS uuid) IS NULL OR user_id > CAST(:after AS uuid))
+                    ORDER BY user_id
+                    LIMIT :limit
+                """),
+                {"after": after, "limit": limit},
+            )
+            return [row[0] for row in result.all()]
+
+    async def get_plans(self, user_ids: Sequence) -> list[tuple]:
+        """
+        Fetch the planned daily grams of every category for a batch of users.
+
+        Args:
+            user_ids (Sequence): User UUIDs.
+
+        Returns:
+            list[tuple]: ``(user_id, category_id, amount_grams)`` rows with a positive amount.
+        """
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT user_id, category_id, amount_grams
+                    FROM category_to_user
+                    WHERE user_id = ANY(:user_ids) AND amount_grams > 0
+                """),
+                {"user_ids": list(user_ids)},
+            )
+            return result.all()
+
+    async def get_daily_totals(self, user_ids: Sequence, start: date, end: date) -> list[tuple]:
+        """
+        Sum eaten grams per user, day and category over a date range.
+
+        Args:
+            user_ids (Sequence): User UUIDs.
+            start (date): First day, inclusive.
+            end (date): Last day, inclusive.
+
+        Returns:
+            list[tuple]: ``(user_id, date, category_id, total_grams)`` rows.
+        """
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT r.user_id, r.date, ri.category_id, SUM(ri.amount_grams) AS total_grams
+                    FROM report_items ri
+                    JOIN reports r ON r.id = ri.report_id AND r.date = ri.report_date
+                    WHERE r.user_id = ANY(:user_ids)
+                      AND r.date BETWEEN :start AND :end
+                      AND ri.report_date BETWEEN :start AND :end
+                      AND ri.category_id IS NOT NULL
+                    GROUP BY r.user_id, r.date, ri.category_id
+                """),
+                {"user_ids": list(user_ids), "start": start, "end": end},
+            )
+            return result.all()
@@ -0,0 +1,90 @@
+"""
+Plain records returned by the raw-SQL repositories.
+
+The repositories write and read with ``text()`` statements, so there is no
+session state worth keeping: a detached ORM instance would only carry
+instrumentation and relationship machinery around. Rows are returned as
+named tuples instead: immutable, without a per-instance ``__dict__``, and
+built straight from the driver's row tuples with ``_make`` (no intermediate
+mapping per row). Field order matches the ``SELECT``/``RETURNING`` list of
+the statement that produces them.
+
+Bulk paths can go one step further and hand out columns instead of rows
+(:func:`to_columns`), which is what Parquet writers and NumPy want.
+"""
+import uuid
+from datetime import date, datetime
+from typing import Iterable, NamedTuple, Sequence
+
+
+class UserRecord(NamedTuple):
+    id: uuid.UUID
+    telegram_id: str
+    name: str
+    birth_year: int | None
+
+
+class ReportRecord(NamedTuple):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    date: date
+    created_at: datetime
+
+
+class ReportItemRecord(NamedTuple):
+    id: uuid.UUID
+    report_id: uuid.UUID
+    report_date: date
+    category_id: int | None
+    product_name: str
+    amount_grams: float | None
+
+
+class DayItem(NamedTuple):
+    """An item of one day's report, as the bot lists it."""
+    id: uuid.UUID
+    product_name: str
+    amount_grams: float | None
+    category_id: int | None
+
+
+class HistoryReport(NamedTuple):
+    """A report of a history page; ``items`` are dicts with ``product_name``, ``amount_grams`` and ``category_id``."""
+    id: uuid.UUID
+    date: date
+    created_at: datetime
+    items: list[dict]
+
+
+class RollupRow(NamedTuple):
+    bucket: date
+    category_id: int | None
+    total_grams: float | None
+    days: int
+
+
+class LogRecord(NamedTuple):
+    """A food log row, in export column order."""
+    telegram_id: str
+    date: date
+    product_name: str
+    amount_grams: float | None
+    category_id: int | None
+    category: str | None
+
+
+def to_columns(rows: Iterable[Sequence], fields: Sequence[str]) -> dict[str, list]:
+    """
+    Transpose row tuples into columns.
+
+    Args:
+        rows (Iterable[Sequence]): Rows with one value per field, in field order.
+        fields (Sequence[str]): Column names.
+
+    Returns:
+        dict[str, list]: Column name -> values, every list as long as ``rows``.
+    """
+    columns = list(zip(*rows))
+    if not columns:
+        return {field: [] for field in fields}
+    return {field: list(values) for field, values in zip(fields, columns)}
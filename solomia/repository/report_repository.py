@@ -1,17 +1,20 @@
+import json
 from typing import Callable
 from contextlib import AbstractAsyncContextManager
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from solomia.models.reports import Report
 from solomia.repository.base_repository import BaseRepository
+from solomia.repository.records import HistoryReport, ReportRecord, RollupRow
 from datetime import date
 
 
 class ReportRepository(BaseRepository[Report]):
-    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
-        super().__init__(session_factory, Report)
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, Report, read_session_factory)
 
-    async def insert_report(self, user_id: str, report_date) -> Report:
+    async def insert_report(self, user_id: str, report_date) -> ReportRecord:
         """
         Create a new report record for a given user.
 
@@ -20,9 +23,9 @@ class ReportRepository(BaseRepository[Report]):
             report_date (date): Date of the report.
 
         Returns:
-            Report: The created Report instance.
+            ReportRecord: The created report.
         """
-        async with self.session_factory() as session:
+        async with self.write_session() as session:
             result = await session.execute(
                 text("""
                     INSERT INTO reports (id, user_id, date, created_at)
@@ -32,17 +35,57 @@ class ReportRepository(BaseRepository[Report]):
                 {"user_id": user_id, "date": report_date},
             )
 
-            row = result.mappings().first()
+            row = result.first()
             await session.commit()
+            return ReportRecord._make(row)
+
+    async def save_report(self, user_id: str, report_date: date,
+                          items: list[tuple[str, float | None, int | None]]) -> ReportRecord:
+        """
+        Add items to the user's report for the day, creating the report if needed, in one transaction.
 
-            return Report(
-                id=row["id"],
-                user_id=row["user_id"],
-                date=row["date"],
-                created_at=row["created_at"],
+        The report is upserted on ``(user_id, date)``, so concurrent reports of
+        the same day share one report, and all items go in one multi-row
+        ``INSERT``: two statements whatever the item count.
+
+        Args:
+            user_id (str): UUID of the user.
+            report_date (date): Date of the report.
+            items (list[tuple[str, float | None, int | None]]): (product name, grams, category id).
+
+        Returns:
+            ReportRecord: The day's report.
+        """
+        async with self.transaction() as session:
+            result = await session.execute(
+                text("""
+                    INSERT INTO reports (id, user_id, date, created_at)
+                    VALUES (gen_random_uuid(), :user_id, :date, NOW())
+                    ON CONFLICT (user_id, date) DO UPDATE SET user_id = EXCLUDED.user_id
+                    RETURNING id, user_id, date, created_at
+                """),
+                {"user_id": user_id, "date": report_date},
             )
+            report = ReportRecord._make(result.first())
+            if items:
+                values = ", ".join(
+                    f"(gen_random_uuid(), :report_id, :report_date, :category_id_{i}, :product_name_{i}, :amount_grams_{i})"
+                    for i in range(len(items))
+                )
+                params = {"report_id": report.id, "report_date": report.date}
+                for i, (product_name, amount_grams, category_id) in enumerate(items):
+                    params.update({f"product_name_{i}": product_name, f"amount_grams_{i}": amount_grams,
+                                   f"category_id_{i}": category_id})
+                await session.execute(
+                    text(f"""
+                        INSERT INTO report_items (id, report_id, report_date, category_id, product_name, amount_grams)
+                        VALUES {values}
+                    """),
+                    params,
+                )
+            return report
 
-    async def get_report_by_date(self, user_id: str, report_date: date) -> Report | None:
+    async def get_report_by_date(self, user_id: str, report_date: date) -> ReportRecord | None:
         """
         Fetch the report for a given user and date.
 
@@ -51,8 +94,9 @@ class ReportRepository(BaseRepository[Report]):
             report_date (date): Date to fetch.
 
         Returns:
-            Report | None: Report object if found, otherwise None.
+            ReportRecord | None: The report if found, otherwise None.
         """
+        # Always the primary: callers decide whether to insert today's report on this answer
         async with self.session_factory() as session:
             result = await session.execute(
                 text("""
@@ -63,13 +107,105 @@ class ReportRepository(BaseRepository[Report]):
                 """),
                 {"user_id": user_id, "date": report_date},
             )
-            row = result.mappings().first()
-            if not row:
-                return None
-
-            return Report(
-                id=row["id"],
-                user_id=row["user_id"],
-                date=row["date"],
-                created_at=row["created_at"],
+            row = result.first()
+            return ReportRecord._make(row) if row else None
+
+    async def get_history_page(self, user_id: str, start: date, end: date, after: tuple | None = None,
+                               limit: int = 10) -> list[HistoryReport]:
+        """
+        Fetch one page of a user's reports, newest first, with their items.
+
+        Keyset (seek) pagination on ``(date, id)``: the next page starts right
+        after the last report of the previous one, so deep pages cost the same
+        as the first and no OFFSET scan is needed.
+
+        Args:
+            user_id (str): UUID of the user.
+            start (date): First day, inclusive.
+            end (date): Last day, inclusive.
+            after (tuple | None): ``(date, id)`` of the last report already returned.
+            limit (int): Maximum number of reports.
+
+        Returns:
+            list[HistoryReport]: Reports with their items, in page order.
+        """
+        after_date, after_id = after or (None, None)
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("""
+                    WITH page AS (
+                        SELECT id, date, created_at
+                        FROM reports
+                        WHERE user_id = :user_id
+                          AND date BETWEEN :start AND :end
+                          AND (CAST(:after_date AS date) IS NULL
+                               OR (date, id) < (CAST(:after_date AS date), CAST(:after_id AS uuid)))
+                        ORDER BY date DESC, id DESC
+                        LIMIT :limit
+                    )
+                    SELECT p.id, p.date, p.created_at,
+                           COALESCE(
+                               json_agg(
+                                   json_build_object(
+                                       'product_name', ri.product_name,
+                                       'amount_grams', ri.amount_grams,
+                                       'category_id', ri.category_id
+                                   ) ORDER BY ri.product_name
+                               ) FILTER (WHERE ri.id IS NOT NULL),
+                               '[]'
+                           ) AS items
+                    FROM page AS p
+                    LEFT JOIN report_items AS ri
+                           ON ri.report_id = p.id AND ri.report_date = p.date
+                          AND ri.report_date BETWEEN :start AND :end
+                    GROUP BY p.id, p.date, p.created_at
+                    ORDER BY p.date DESC, p.id DESC
+                """),
+                {
+                    "user_id": user_id,
+                    "start": start,
+                    "end": end,
+                    "after_date": after_date,
+                    "after_id": after_id,
+                    "limit": limit,
+                },
+            )
+            return [
+                HistoryReport(report_id, day, created_at, json.loads(items) if isinstance(items, str) else items)
+                for report_id, day, created_at, items in result.all()
+            ]
+
+    async def get_category_rollup(self, user_id: str, start: date, end: date, bucket: str = "week") -> list[RollupRow]:
+        """
+        Sum a user's eaten grams per category and day/week/month, in the database.
+
+        Args:
+            user_id (str): UUID of the user.
+            start (date): First day, inclusive.
+            end (date): Last day, inclusive.
+            bucket (str): ``"day"``, ``"week"`` (starting Monday) or ``"month"``.
+
+        Returns:
+            list[RollupRow]: ``bucket`` (first day), ``category_id``, ``total_grams`` and
+            ``days`` (days the category was eaten), ordered by bucket.
+        """
+        if bucket not in ("day", "week", "month"):
+            raise ValueError(f"Unknown bucket: {bucket!r}")
+
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("""
+                    SELECT CAST(date_trunc(:bucket, r.date) AS date) AS bucket,
+                           ri.category_id,
+                           SUM(ri.amount_grams) AS total_grams,
+                           COUNT(DISTINCT r.date) AS days
+                    FROM reports AS r
+                    JOIN report_items AS ri ON ri.report_id = r.id AND ri.report_date = r.date
+                    WHERE r.user_id = :user_id AND r.date BETWEEN :start AND :end
+                      AND ri.report_date BETWEEN :start AND :end
+                    GROUP BY 1, 2
+                    ORDER BY 1, 2
+                """),
+                {"user_id": user_id, "start": start, "end": end, "bucket": bucket},
             )
+            return list(map(RollupRow._make, result.all()))
@@ -4,13 +4,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from solomia.models.user import User
 from solomia.repository.base_repository import BaseRepository
+from solomia.repository.records import UserRecord
 
 
 class UserRepository(BaseRepository[User]):
-    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]):
-        super().__init__(session_factory, User)
+    def __init__(self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+                 read_session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]] | None = None):
+        super().__init__(session_factory, User, read_session_factory)
 
-    async def insert_user(self, telegram_id: str, name: str, birth_year: int | None = None) -> User:
+    async def insert_user(self, telegram_id: str, name: str, birth_year: int | None = None) -> UserRecord:
         """
         Create a new user record.
 
@@ -20,9 +22,9 @@ class UserRepository(BaseRepository[User]):
             birth_year (int | None): Optional birth year.
 
         Returns:
-            User: The created User instance.
+            UserRecord: The created user.
         """
-        async with self.session_factory() as session:
+        async with self.write_session() as session:
             result = await session.execute(
                 text("""
                     INSERT INTO users (id, telegram_id, name, birth_year)
@@ -32,15 +34,34 @@ class UserRepository(BaseRepository[User]):
                 {"telegram_id": telegram_id, "name": name, "birth_year": birth_year},
             )
 
-            row = result.mappings().first()
+            row = result.first()
             await session.commit()
+            return UserRecord._make(row)
+
+    async def register_user(self, telegram_id: str, name: str) -> bool:
+        """
+        Create the user unless one with this Telegram ID already exists.
 
-            return User(
-                id=row["id"],
-                telegram_id=row["telegram_id"],
-                name=row["name"],
-                birth_year=row["birth_year"],
+        Args:
+            telegram_id (str): Telegram user ID.
+            name (str): User's name.
+
+        Returns:
+            bool: True if the user was created, False if already registered.
+        """
+        async with self.write_session() as session:
+            result = await session.execute(
+                text("""
+                    INSERT INTO users (id, telegram_id, name)
+                    VALUES (gen_random_uuid(), :telegram_id, :name)
+                    ON CONFLICT (telegram_id) DO NOTHING
+                    RETURNING id
+                """),
+                {"telegram_id": telegram_id, "name": name},
             )
+            created = result.first() is not None
+            await session.commit()
+            return created
 
     async def get_id_by_telegram_id(self, telegram_id: str):
         """
@@ -52,10 +73,27 @@ class UserRepository(BaseRepository[User]):
         Returns:
             str | None: UUID string if found, otherwise None.
         """
-        async with self.session_factory() as session:
+        async with self.read_session() as session:
             result = await session.execute(
                 text("SELECT id FROM users WHERE telegram_id = :telegram_id"),
                 {"telegram_id": telegram_id},
             )
             row = result.first()
             return row[0] if row else None
+
+    async def get_ids_by_telegram_ids(self, telegram_ids: list[str]) -> dict[str, str]:
+        """
+        Fetch the UUIDs of many users in one query.
+
+        Args:
+            telegram_ids (list[str]): Telegram user IDs.
+
+        Returns:
+            dict[str, str]: Telegram ID -> UUID, for the users that exist.
+        """
+        async with self.read_session() as session:
+            result = await session.execute(
+                text("SELECT telegram_id, id FROM users WHERE telegram_id = ANY(:telegram_ids)"),
+                {"telegram_ids": list(telegram_ids)},
+            )
+            return {telegram_id: user_id for telegram_id, user_id in result.all()}
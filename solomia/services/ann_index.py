@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+from solomia.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Below this many vectors a single inverted list (exact search) is fast enough
+MIN_TRAIN_SIZE = 4096
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 32
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def default_n_lists(n_vectors: int) -> int:
+    """Number of inverted lists for ``n_vectors`` (about 4·√N, one list for small sets)."""
+    if n_vectors < MIN_TRAIN_SIZE:
+        return 1
+    return int(4 * np.sqrt(n_vectors))
+
+
+def train_centroids(vectors: np.ndarray, n_lists: int, iterations: int = KMEANS_ITERATIONS,
+                    seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means over normalized vectors (cosine similarity).
+
+    Trains on a random sample of at most ``KMEANS_SAMPLE_PER_LIST * n_lists``
+    vectors; empty clusters are re-seeded from random sample points.
+
+    Args:
+        vectors (np.ndarray): (N, dim) normalized vectors.
+        n_lists (int): Number of centroids.
+        iterations (int): Lloyd iterations.
+        seed (int): RNG seed, so rebuilding the same data gives the same index.
+
+    Returns:
+        np.ndarray: (n_lists, dim) normalized centroids.
+    """
+    rng = np.random.default_rng(seed)
+    n_lists = max(1, min(n_lists, len(vectors)))
+    sample_size = min(len(vectors), KMEANS_SAMPLE_PER_LIST * n_lists)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = IVFIndex._assign(centroids, sample)
+        counts = np.bincount(assignment, minlength=n_lists)
+        order = np.argsort(assignment, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        sums[~empty] = np.add.reduceat(sample[order], starts[~empty], axis=0)
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over normalized embeddings with integer labels.
+
+    Vectors are grouped by their nearest k-means centroid and stored list by
+    list in one contiguous (CSR-style) matrix, so a query scores the centroids,
+    then only the ``n_probe`` closest lists. Inserted vectors go to a small
+    pending buffer that is searched exactly and merged into the lists once it
+    grows past ``merge_threshold``.
+
+    With a single list the index degenerates to exact brute-force search.
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, labels: np.ndarray, offsets: np.ndarray,
+                 n_probe: int = 8, merge_threshold: int = 1024):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.labels = labels
+        self.offsets = offsets
+        self.n_probe = n_probe
+        self.merge_threshold = merge_threshold
+        self.dim = centroids.shape[1]
+        self._pending_vectors: list[np.ndarray] = []
+        self._pending_labels: list[int] = []
+
+    @classmethod
+    def build(cls, vectors, labels, n_lists: int | None = None, n_probe: int = 8, seed: int = 0) -> "IVFIndex":
+        """
+        Train the coarse quantizer and fill the inverted lists.
+
+        Args:
+            vectors: (N, dim) embeddings, normalized here.
+            labels: N integer labels (category ids).
+            n_lists (int | None): Number of lists; :func:`default_n_lists` when None.
+            n_probe (int): Lists scanned per query.
+            seed (int): k-means RNG seed.
+
+        Returns:
+            IVFIndex: The built index.
+        """
+        vectors = _normalize(vectors)
+        labels = np.asarray(labels, dtype=np.int64)
+        if n_lists is None:
+            n_lists = default_n_lists(len(vectors))
+        if n_lists <= 1:
+            centroids = _normalize(vectors.sum(axis=0, keepdims=True))
+        else:
+            centroids = train_centroids(vectors, n_lists, seed=seed)
+        return cls._from_assignment(centroids, vectors, labels, n_probe)
+
+    @classmethod
+    def empty(cls, dim: int, n_probe: int = 8) -> "IVFIndex":
+        return cls(
+            np.zeros((1, dim), dtype=np.float32),
+            np.zeros((0, dim), dtype=np.float32),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(2, dtype=np.int64),
+            n_probe=n_probe,
+        )
+
+    @classmethod
+    def _from_assignment(cls, centroids, vectors, labels, n_probe) -> "IVFIndex":
+        assignment = cls._assign(centroids, vectors)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(centroids))
+        offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(centroids, vectors[order], labels[order], offsets, n_probe=n_probe)
+
+    @staticmethod
+    def _assign(centroids: np.ndarray, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        if len(centroids) == 1:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1) for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.labels) + len(self._pending_labels)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    # ---- updates ----
+    def add(self, vector, label: int):
+        """Insert one vector; it is searchable immediately."""
+        self._pending_vectors.append(_normalize(vector).reshape(self.dim))
+        self._pending_labels.append(int(label))
+        if len(self._pending_labels) >= max(self.merge_threshold, len(self.labels) // 20):
+            self.compact()
+
+    def compact(self):
+        """Merge pending inserts into the inverted lists."""
+        if not self._pending_labels:
+            return
+        vectors = np.concatenate([self.vectors, np.stack(self._pending_vectors)])
+        labels = np.concatenate([self.labels, np.asarray(self._pending_labels, dtype=np.int64)])
+        merged = self._from_assignment(self.centroids, vectors, labels, self.n_probe)
+        self.vectors, self.labels, self.offsets = merged.vectors, merged.labels, merged.offsets
+        self._pending_vectors, self._pending_labels = [], []
+
+    def truncate(self, dim: int) -> "IVFIndex":
+        """
+        The same vectors cut to their first ``dim`` components, renormalized.
+
+        For Matryoshka embeddings the prefix is itself an embedding, so the
+        cut index answers queries of the smaller size. Centroids are cut too
+        and every vector is reassigned to its nearest one.
+        """
+        vectors, labels = self.vectors, self.labels
+        if self._pending_labels:
+            vectors = np.concatenate([vectors, np.stack(self._pending_vectors)])
+            labels = np.concatenate([labels, np.asarray(self._pending_labels, dtype=np.int64)])
+        index = self._from_assignment(_normalize(self.centroids[:, :dim]), _normalize(vectors[:, :dim]), labels,
+                                      self.n_probe)
+        index.merge_threshold = self.merge_threshold
+        return index
+
+    # ---- queries ----
+    def search(self, query, k: int = 10, n_probe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k neighbours of ``query``.
+
+        Args:
+            query: Query embedding (normalized here).
+            k (int): Number of neighbours.
+            n_probe (int | None): Lists to scan, defaults to ``self.n_probe``.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Labels and cosine similarities, best first.
+        """
+        query = _normalize(query).reshape(self.dim)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        if n_probe == self.n_lists:
+            return self.exact_search(query, k)
+        lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+
+        scores, labels = [], []
+        for lst in lists:
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if end > start:
+                scores.append(self.vectors[start:end] @ query)
+                labels.append(self.labels[start:end])
+        if self._pending_labels:
+            scores.append(np.stack(self._pending_vectors) @ query)
+            labels.append(np.asarray(self._pending_labels, dtype=np.int64))
+        if not scores:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        return self._top_k(np.concatenate(scores), np.concatenate(labels), k)
+
+    def exact_search(self, query, k: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """Brute-force top-k over every stored vector (reference for recall measurements)."""
+        query = _normalize(query).reshape(self.dim)
+        scores, labels = self.vectors @ query, self.labels
+        if self._pending_labels:
+            scores = np.concatenate([scores, np.stack(self._pending_vectors) @ query])
+            labels = np.concatenate([labels, np.asarray(self._pending_labels, dtype=np.int64)])
+        return self._top_k(scores, labels, k)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, labels: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, labels = scores[top], labels[top]
+        order = np.argsort(-scores)
+        return labels[order], scores[order]
+
+
+def rank(labels: np.ndarray, scores: np.ndarray) -> list[tuple[int, float]]:
+    """
+    Similarity-weighted k-NN vote, all candidates.
+
+    Args:
+        labels (np.ndarray): Neighbour labels.
+        scores (np.ndarray): Neighbour similarities.
+
+    Returns:
+        list[tuple[int, float]]: (label, best similarity among its neighbours), ordered
+        by vote weight (sum of positive similarities), strongest first.
+    """
+    if not len(labels):
+        return []
+    candidates, inverse = np.unique(labels, return_inverse=True)
+    weights = np.zeros(len(candidates), dtype=np.float64)
+    np.add.at(weights, inverse, np.maximum(scores, 0))
+    best = np.full(len(candidates), -np.inf)
+    np.maximum.at(best, inverse, scores)
+    order = np.argsort(-weights, kind="stable")
+    return [(int(candidates[i]), float(best[i])) for i in order]
+
+
+def vote(labels: np.ndarray, scores: np.ndarray) -> tuple[int | None, float]:
+    """
+    Similarity-weighted k-NN vote.
+
+    Args:
+        labels (np.ndarray): Neighbour labels.
+        scores (np.ndarray): Neighbour similarities.
+
+    Returns:
+        tuple[int | None, float]: Winning label and the best similarity among its
+        neighbours, or (None, -1.0) without neighbours.
+    """
+    ranking = rank(labels, scores)
+    return ranking[0] if ranking else (None, -1.0)
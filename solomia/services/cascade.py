@@ -0,0 +1,99 @@
+"""
+Decision cascade for classifying a product without the LLM.
+
+Stages, cheapest first; the first one that is confident wins:
+
+1. exact    - the product is a known example;
+2. lexical  - it equals a known example up to case, punctuation and word order;
+3. embedding - the best category scores at least ``min_score`` *and* beats the
+   runner-up by ``min_margin`` (or scores ``confident_score`` or more);
+4. llm      - nothing was confident, the caller falls back to the LLM.
+
+Thresholds come from the environment (``CLASSIFY_MIN_SCORE``,
+``CLASSIFY_MIN_MARGIN``, ``CLASSIFY_CONFIDENT_SCORE``, ``CLASSIFY_LEXICAL``)
+and can be tuned offline with ``python -m scripts.evaluate_cascade``.
+
+The same thresholds apply whether the index scores centroids or nearest
+examples (see ``CategoryIndex.search_top``): both are cosine similarities.
+The closest example usually scores higher than a centroid, so re-tune them
+once example embeddings are backfilled.
+"""
+import os
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from solomia.services.category_index import CategoryIndex
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+@dataclass(frozen=True)
+class CascadeConfig:
+    min_score: float = 0.75
+    min_margin: float = 0.0
+    confident_score: float = 1.01  # above 1.0: the margin is always checked
+    lexical: bool = True
+
+    @classmethod
+    def from_env(cls) -> "CascadeConfig":
+        return cls(
+            min_score=_env_float("CLASSIFY_MIN_SCORE", cls.min_score),
+            min_margin=_env_float("CLASSIFY_MIN_MARGIN", cls.min_margin),
+            confident_score=_env_float("CLASSIFY_CONFIDENT_SCORE", cls.confident_score),
+            lexical=os.getenv("CLASSIFY_LEXICAL", "1") != "0",
+        )
+
+    def label(self) -> str:
+        return (
+            f"score≥{self.min_score:g} margin≥{self.min_margin:g}"
+            + (f" confident≥{self.confident_score:g}" if self.confident_score <= 1 else "")
+            + ("" if self.lexical else " no-lexical")
+        )
+
+
+@dataclass
+class Decision:
+    category: str | None
+    score: float
+    source: str  # "exact" | "lexical" | "embedding" | "llm"
+    margin: float | None = None
+
+    @property
+    def resolved(self) -> bool:
+        """True if a local stage decided; False means fall back to the LLM."""
+        return self.source != "llm"
+
+
+async def decide(product_name: str, index: CategoryIndex, embedder: Callable[[str], Awaitable],
+                 config: CascadeConfig) -> Decision:
+    """
+    Run the cascade for one product.
+
+    Args:
+        product_name (str): Product as reported.
+        index (CategoryIndex): Category index to search.
+        embedder (Callable[[str], Awaitable]): Returns the product embedding.
+        config (CascadeConfig): Thresholds.
+
+    Returns:
+        Decision: The decision; ``source == "llm"`` carries the best embedding guess.
+    """
+    match = index.by_example(product_name)
+    if match:
+        return Decision(match[1], 1.0, "exact")
+
+    if config.lexical:
+        match = index.by_lexical(product_name)
+        if match:
+            return Decision(match[1], 1.0, "lexical")
+
+    top = index.search_top(await embedder(product_name), k=2)
+    if not top:
+        return Decision(None, -1.0, "llm")
+
+    category, score = top[0]
+    margin = score - top[1][1] if len(top) > 1 else score
+    confident = score >= config.confident_score or (score >= config.min_score and margin >= config.min_margin)
+    return Decision(category, score, "embedding" if confident else "llm", margin)
@@ -0,0 +1,212 @@
+"""
+Record/replay of Gemini calls ("cassettes") for offline tests and benchmarks.
+
+With ``GEMINI_CASSETTE=path`` and ``GEMINI_CASSETTE_MODE=record`` every call
+made through :mod:`solomia.services.gemini` is also appended to the cassette,
+one JSON line per call: operation, request and its hash, response or error,
+and latency. With ``GEMINI_CASSETTE_MODE=replay`` calls are answered from the
+cassette, with no API key and no network:
+
+    GEMINI_CASSETTE=cassettes/reports.jsonl GEMINI_CASSETTE_MODE=record python -m scripts.classify_report
+    GEMINI_CASSETTE=cassettes/reports.jsonl GEMINI_CASSETTE_MODE=replay python -m scripts.classify_report
+
+Replay is deterministic for a given ``GEMINI_CASSETTE_SEED`` and can shape the
+load it simulates:
+
+* ``GEMINI_CASSETTE_LATENCY``: ``recorded`` (each response's own latency, the
+  default), ``sampled`` (drawn from the operation's recorded latencies) or ``none``;
+* ``GEMINI_CASSETTE_JITTER``: relative jitter on that latency (0.2 = ±20%);
+* ``GEMINI_CASSETTE_ERROR_RATE``: share of calls failed with :class:`InjectedError`.
+
+Requests are matched on operation, model and content. A request recorded
+several times replays its responses in turn; one never recorded raises
+:class:`CassetteMiss`.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+MODES = ("record", "replay")
+LATENCY_MODES = ("recorded", "sampled", "none")
+USAGE_FIELDS = ("prompt_token_count", "candidates_token_count")
+
+
+class ReplayError(RuntimeError):
+    """Raised instead of a Gemini response during replay."""
+
+
+class CassetteMiss(ReplayError):
+    """The request was not recorded."""
+
+
+class InjectedError(ReplayError):
+    """A failure injected by ``error_rate``."""
+
+
+class RecordedError(ReplayError):
+    """The recorded call failed; the message carries the original error type and message."""
+
+
+def request_key(operation: str, request: dict) -> str:
+    payload = json.dumps({"operation": operation, **request}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _dump(result) -> dict:
+    if isinstance(result, dict):  # embed_content
+        return {"dict": result}
+    usage = getattr(result, "usage_metadata", None)
+    return {
+        "text": result.text,
+        "usage": {field: getattr(usage, field, None) for field in USAGE_FIELDS} if usage is not None else None,
+    }
+
+
+def _load(response: dict):
+    if "dict" in response:
+        return response["dict"]
+    usage = response.get("usage")
+    return SimpleNamespace(text=response["text"], usage_metadata=SimpleNamespace(**usage) if usage else None)
+
+
+class Cassette:
+    """One cassette file, either being recorded or replayed."""
+
+    def __init__(self, path: str, mode: str = "replay", latency: str = "recorded", jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"cassette mode must be one of {MODES}, got {mode!r}")
+        if latency not in LATENCY_MODES:
+            raise ValueError(f"cassette latency must be one of {LATENCY_MODES}, got {latency!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._entries: dict[str, list[dict]] = {}
+        self._positions: dict[str, int] = {}
+        self._latencies: dict[str, list[float]] = {}
+        if mode == "replay":
+            self._read()
+
+    @classmethod
+    def from_env(cls, path: str | None = None, mode: str | None = None) -> "Cassette | None":
+        """Cassette configured by the ``GEMINI_CASSETTE*`` settings; ``path`` and ``mode`` override them."""
+        path = path or os.getenv("GEMINI_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=mode or os.getenv("GEMINI_CASSETTE_MODE", "replay"),
+            latency=os.getenv("GEMINI_CASSETTE_LATENCY", "recorded"),
+            jitter=float(os.getenv("GEMINI_CASSETTE_JITTER", "0")),
+            error_rate=float(os.getenv("GEMINI_CASSETTE_ERROR_RATE", "0")),
+            seed=int(os.getenv("GEMINI_CASSETTE_SEED", "0")),
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _read(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], []).append(entry)
+                self._latencies.setdefault(entry["operation"], []).append(entry["latency"])
+
+    def record(self, operation: str, request: dict, latency: float, result=None, error: Exception | None = None):
+        """Append one call to the cassette file."""
+        entry = {
+            "operation": operation,
+            "key": request_key(operation, request),
+            "request": request,
+            "latency": round(latency, 6),
+        }
+        if error is not None:
+            entry["error"] = {"type": type(error).__name__, "message": str(error)}
+        else:
+            entry["response"] = _dump(result)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    async def replay(self, operation: str, request: dict):
+        """
+        Answer a call from the cassette, after the simulated latency.
+
+        Returns:
+            The response in the SDK's shape: a dict for embeddings, an object
+            with ``text`` and ``usage_metadata`` for generations.
+
+        Raises:
+            CassetteMiss: The request was never recorded.
+            InjectedError: The call drew an injected failure.
+            RecordedError: The recorded call failed.
+        """
+        key = request_key(operation, request)
+        entries = self._entries.get(key)
+        if not entries:
+            raise CassetteMiss(f"{operation} request {key[:12]} is not in {self.path}; record it first")
+        position = self._positions.get(key, 0)
+        self._positions[key] = position + 1
+        entry = entries[position % len(entries)]
+
+        delay = self._delay(operation, entry)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise InjectedError(f"{operation}: failure injected by cassette replay")
+        if "error" in entry:
+            raise RecordedError(f"{entry['error']['type']}: {entry['error']['message']}")
+        return _load(entry["response"])
+
+    def _delay(self, operation: str, entry: dict) -> float:
+        if self.latency == "none":
+            return 0.0
+        delay = self._rng.choice(self._latencies[operation]) if self.latency == "sampled" else entry["latency"]
+        if self.jitter:
+            delay *= 1 + self._rng.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+
+# The process-wide cassette, from the environment on first use
+_active: Cassette | None = None
+_loaded = False
+
+
+def active() -> Cassette | None:
+    global _active, _loaded
+    if not _loaded:
+        _active, _loaded = Cassette.from_env(), True
+    return _active
+
+
+def replaying() -> bool:
+    """True if Gemini calls are answered from a cassette."""
+    tape = active()
+    return tape is not None and tape.replaying
+
+
+@contextmanager
+def use(cassette: Cassette | None):
+    """Record or replay with ``cassette`` inside the block (None switches cassettes off)."""
+    global _active, _loaded
+    previous = _active, _loaded
+    _active, _loaded = cassette, True
+    try:
+        yield cassette
+    finally:
+        _active, _loaded = previous
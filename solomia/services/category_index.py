@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Mapping
+
+from solomia.core.lazy import lazy_import
+from solomia.core.singleflight import normalize_key
+from solomia.services import embedding_codec
+from solomia.services.ann_index import IVFIndex, rank
+
+if TYPE_CHECKING:
+    from solomia.repository.category_repository import FoodCategoryRepository
+
+np = lazy_import("numpy")
+
+SNAPSHOT_META = "category_index.json"
+SNAPSHOT_FORMAT = 2
+
+ANN_NEIGHBOURS = int(os.getenv("CATEGORY_ANN_NEIGHBOURS", "10"))
+ANN_PROBES = int(os.getenv("CATEGORY_ANN_PROBES", "8"))
+
+
+def parse_vector(value) -> np.ndarray:
+    """Convert a pgvector value ("[0.1, 0.2, ...]" text or a sequence) to a float32 array."""
+    return embedding_codec.decode(value)
+
+
+def row_vector(row: Mapping) -> np.ndarray | None:
+    """Embedding of a repository row in any storage format (see :mod:`embedding_codec`), or None."""
+    return embedding_codec.decode(row["embedding"], row.get("embedding_codes"), row.get("embedding_scale"))
+
+
+_WORD_RE = re.compile(r"[\w%]+", re.UNICODE)
+
+
+def lexical_key(text: str) -> str:
+    """Case-, punctuation- and word-order-insensitive form of a product name."""
+    return " ".join(sorted(_WORD_RE.findall(normalize_key(text))))
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class CategoryIndex:
+    """
+    In-memory view of ``food_categories`` for classification.
+
+    Holds a row-normalized float32 embedding matrix (cosine similarity is a
+    single matrix-vector product), the name → id cache and the example →
+    category map used for exact matches.
+
+    When per-example embeddings are available they are kept in an IVF index
+    (``ann``) and :meth:`search` scores categories by their nearest examples
+    instead of comparing against one centroid per category.
+    """
+
+    def __init__(self, ids: list[int], names: list[str], examples: list[list[str]], matrix: np.ndarray,
+                 version: str | None = None, normalized: bool = False, ann: IVFIndex | None = None):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.examples = [list(e or ()) for e in examples]
+        # A normalized matrix (e.g. a memory-mapped snapshot) is used as is, without a copy
+        self.matrix = matrix if normalized else _normalize_rows(np.asarray(matrix, dtype=np.float32))
+        self.version = version
+        self.ann = ann
+        self._row_by_id = {category_id: row for row, category_id in enumerate(self.ids)}
+        self._id_by_name = {name: category_id for name, category_id in zip(self.names, self.ids)}
+        self._row_by_example: dict[str, int] = {}
+        for row, category_examples in enumerate(examples):
+            for example in category_examples or ():
+                self._row_by_example.setdefault(example, row)
+        self._row_by_lexical: dict[str, int] | None = None  # built on first lexical lookup
+        self.loaded_at = time.monotonic()
+
+    def touch(self):
+        """Mark the index as fresh after confirming it still matches the table."""
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping], example_rows: Iterable[Mapping] = ()) -> "CategoryIndex":
+        """
+        Build from repository rows.
+
+        Args:
+            rows: ``get_all_with_embeddings`` rows (id, name, examples, embedding).
+            example_rows: ``get_example_embeddings`` rows (category_id, embedding); the
+                ANN index is only built when there are any.
+
+        Embeddings of different sizes (halfway through re-embedding at a new
+        ``EMBEDDING_DIM``) are truncated to the smallest one.
+
+        Returns:
+            CategoryIndex: The index.
+        """
+        ids, names, examples, vectors = [], [], [], []
+        for row in rows:
+            ids.append(row["id"])
+            names.append(row["name"])
+            examples.append(list(row.get("examples") or []))
+            vectors.append(row_vector(row))
+
+        dim = min((len(v) for v in vectors if v is not None), default=0)
+        matrix = np.zeros((len(ids), dim), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            if vector is not None:
+                matrix[i] = embedding_codec.fit(vector, dim)  # categories without an embedding keep a zero row
+
+        example_vectors, example_ids = [], []
+        for row in example_rows:
+            vector = row_vector(row)
+            if vector is not None:
+                example_vectors.append(vector)
+                example_ids.append(row["category_id"])
+        ann = None
+        if example_vectors:
+            example_dim = min(len(v) for v in example_vectors)
+            ann = IVFIndex.build(
+                np.stack([embedding_codec.fit(v, example_dim) for v in example_vectors]),
+                example_ids,
+                n_probe=ANN_PROBES,
+            )
+        return cls(ids, names, examples, matrix, ann=ann)
+
+    @classmethod
+    async def load(cls, repo: FoodCategoryRepository, version: str | None = None) -> "CategoryIndex":
+        index = cls.from_rows(await repo.get_all_with_embeddings(), await repo.get_example_embeddings())
+        index.version = version
+        return index
+
+    # ---- on-disk snapshot ----
+    def _arrays(self) -> dict[str, np.ndarray]:
+        arrays = {"matrix": np.ascontiguousarray(self.matrix, dtype=np.float32)}
+        if self.ann is not None:
+            self.ann.compact()
+            arrays.update(
+                ann_centroids=self.ann.centroids,
+                ann_vectors=self.ann.vectors,
+                ann_labels=self.ann.labels,
+                ann_offsets=self.ann.offsets,
+            )
+        return arrays
+
+    def save(self, directory: str | os.PathLike) -> Path:
+        """
+        Write the index as a versioned snapshot: ``<token>.<array>.npy`` files plus a JSON manifest.
+
+        Every file is written to a temporary name and renamed into place, and the
+        manifest is replaced last, so concurrent readers only ever see a complete
+        snapshot. Arrays of older snapshots are removed; processes that still
+        have them mapped keep reading the unlinked files.
+
+        Args:
+            directory (str | os.PathLike): Snapshot directory, created if missing.
+
+        Returns:
+            Path: Path of the written manifest.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = self._arrays()
+        token = f"{time.time_ns():x}-{os.getpid()}"
+
+        files = {}
+        for key, array in arrays.items():
+            files[key] = f"{token}.{key}.npy"
+            tmp = directory / f".{files[key]}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, directory / files[key])
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": self.version,
+            "files": files,
+            "sha256": hashlib.sha256(arrays["matrix"].tobytes()).hexdigest(),
+            "ids": self.ids,
+            "names": self.names,
+            "examples": self.examples,
+        }
+        meta_path = directory / SNAPSHOT_META
+        tmp = directory / f".{SNAPSHOT_META}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+        for old in directory.glob("*.npy"):
+            if old.name not in files.values():
+                old.unlink(missing_ok=True)
+        return meta_path
+
+    @classmethod
+    def open(cls, directory: str | os.PathLike, verify: bool = False) -> "CategoryIndex | None":
+        """
+        Memory-map a snapshot written by :meth:`save`.
+
+        The arrays are mapped read-only, so every process opening the same
+        snapshot shares one copy through the page cache.
+
+        Args:
+            directory (str | os.PathLike): Snapshot directory.
+            verify (bool): Also check the matrix against the stored SHA-256 (reads the whole file).
+
+        Returns:
+            CategoryIndex | None: The index, or None if the snapshot is missing, of another
+            format, or corrupt.
+        """
+        directory = Path(directory)
+        try:
+            manifest = json.loads((directory / SNAPSHOT_META).read_text(encoding="utf-8"))
+            if manifest.get("format") != SNAPSHOT_FORMAT:
+                return None
+            arrays = {key: np.load(directory / name, mmap_mode="r") for key, name in manifest["files"].items()}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        matrix = arrays["matrix"]
+        if len(manifest["ids"]) != matrix.shape[0]:
+            return None
+        if verify and hashlib.sha256(np.ascontiguousarray(matrix).tobytes()).hexdigest() != manifest["sha256"]:
+            return None
+
+        ann = None
+        if "ann_centroids" in arrays:
+            ann = IVFIndex(
+                arrays["ann_centroids"], arrays["ann_vectors"], arrays["ann_labels"], arrays["ann_offsets"],
+                n_probe=ANN_PROBES,
+            )
+        return cls(
+            manifest["ids"], manifest["names"], manifest["examples"], matrix,
+            version=manifest["version"], normalized=True, ann=ann,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def age(self) -> float:
+        """Seconds since the index was loaded from the database."""
+        return time.monotonic() - self.loaded_at
+
+    def id_by_name(self, name: str) -> int | None:
+        return self._id_by_name.get(name.strip())
+
+    def by_lexical(self, product_name: str) -> tuple[int, str] | None:
+        """Category (id, name) with an example equal to ``product_name`` up to case, punctuation and word order."""
+        if self._row_by_lexical is None:
+            self._row_by_lexical = {}
+            for row, category_examples in enumerate(self.examples):
+                for example in category_examples:
+                    self._row_by_lexical.setdefault(lexical_key(example), row)
+        row = self._row_by_lexical.get(lexical_key(product_name))
+        if row is None:
+            return None
+        return self.ids[row], self.names[row]
+
+    def name_by_id(self, category_id: int) -> str | None:
+        row = self._row_by_id.get(category_id)
+        return None if row is None else self.names[row]
+
+    def catalog(self) -> list[tuple[int, str]]:
+        """(id, name) of every category, for prompts."""
+        return list(zip(self.ids, self.names))
+
+    def by_example(self, product_name: str) -> tuple[int, str] | None:
+        """Category (id, name) that lists ``product_name`` as an example."""
+        row = self._row_by_example.get(product_name)
+        if row is None:
+            return None
+        return self.ids[row], self.names[row]
+
+    def search(self, vector) -> tuple[str | None, float]:
+        """Best category for an embedding; (None, -1.0) for an empty index. See :meth:`search_top`."""
+        top = self.search_top(vector, k=1)
+        return top[0] if top else (None, -1.0)
+
+    def search_top(self, vector, k: int = 2) -> list[tuple[str, float]]:
+        """
+        Up to ``k`` best distinct categories for an embedding, best first.
+
+        Uses the ``CATEGORY_ANN_NEIGHBOURS`` nearest example embeddings when the
+        ANN index has any: a category scores the similarity of its closest
+        example among them, and the similarity-weighted vote only breaks ties.
+        Otherwise it scores the per-category centroid similarity. Either way
+        the list is sorted by the score it reports, so ``top[0] - top[1]`` is a
+        margin in cosine similarity.
+
+        Args:
+            vector: Query embedding; a shorter one cuts the index down to its size (see :meth:`_shrink`).
+            k (int): Number of categories.
+
+        Returns:
+            list[tuple[str, float]]: (category name, score) pairs.
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        self._shrink(len(query))
+        if self.ann is not None and len(self.ann):
+            # rank() orders by vote weight; the stable sort keeps it as the tie-break
+            ranking = sorted((
+                (self.names[self._row_by_id[category_id]], score)
+                for category_id, score in rank(*self.ann.search(embedding_codec.fit(query, self.ann.dim),
+                                                                k=ANN_NEIGHBOURS))
+                if category_id in self._row_by_id
+            ), key=lambda item: -item[1])
+            if ranking:
+                return ranking[:k]
+        if not self.ids or not self.matrix.shape[1]:
+            return []
+        # a longer query (e.g. embedded before EMBEDDING_DIM changed) is cut to the index size
+        scores = self.matrix @ embedding_codec.fit(query / norm, self.matrix.shape[1])
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.names[i], float(scores[i])) for i in top]
+
+    def _shrink(self, dim: int):
+        """
+        Cut the matrix and the ANN index down to ``dim`` components if they are longer.
+
+        Halfway through re-embedding at a smaller ``EMBEDDING_DIM``, queries and
+        new examples arrive shorter than the vectors loaded before. Matryoshka
+        prefixes stay comparable, so the index moves to the smaller size for
+        good; longer vectors are cut to the index size where they are used.
+        """
+        if self.matrix.shape[1] > dim:
+            self.matrix = embedding_codec.fit(self.matrix, dim)
+        if self.ann is not None and self.ann.dim > dim:
+            self.ann = self.ann.truncate(dim)
+
+    # ---- in-place updates after local writes ----
+    def add_example(self, category_id: int, example: str, vector=None):
+        """Register a new example; with its embedding it also becomes a nearest-neighbour candidate."""
+        row = self._row_by_id.get(category_id)
+        if row is None:
+            return
+        self.examples[row].append(example)
+        self._row_by_example.setdefault(example, row)
+        if self._row_by_lexical is not None:
+            self._row_by_lexical.setdefault(lexical_key(example), row)
+        if vector is not None:
+            vector = parse_vector(vector)
+            self._shrink(len(vector))
+            if self.ann is None:
+                self.ann = IVFIndex.empty(len(vector), n_probe=ANN_PROBES)
+            self.ann.add(embedding_codec.fit(vector, self.ann.dim), category_id)
+
+    def set_embedding(self, category_id: int, vector):
+        row = self._row_by_id.get(category_id)
+        if row is not None:
+            vector = parse_vector(vector)
+            self._shrink(len(vector))
+            if not self.matrix.shape[1]:
+                self.matrix = np.zeros((len(self.ids), len(vector)), dtype=np.float32)
+            if not self.matrix.flags.writeable:
+                self.matrix = np.array(self.matrix)  # copy-on-write, the mapped snapshot stays shared
+            vector = embedding_codec.fit(vector, self.matrix.shape[1])
+            self.matrix[row] = _normalize_rows(vector.reshape(1, -1))[0]
@@ -1,36 +1,179 @@
+from __future__ import annotations
+
+import asyncio
 import os
 import traceback
-import asyncio
-import functools
-import re
-from sqlalchemy import text
-import google.generativeai as genai
-import numpy as np
-from solomia.core.db import SessionFactory
-from solomia.repository.category_repository import FoodCategoryRepository
+from collections import OrderedDict
+from dataclasses import replace
+from typing import TYPE_CHECKING
+from solomia.core import admission, metrics, unit_of_work
+from solomia.core.lazy import lazy_import
+from solomia.core.singleflight import NegativeCache, SingleFlight, normalize_key
+from solomia.services import cascade, gemini, prompts
+from solomia.services.category_index import CategoryIndex
 import json
 
-embedding_model = "models/text-embedding-004"
+if TYPE_CHECKING:
+    from solomia.repository.category_repository import FoodCategoryRepository
+
+np = lazy_import("numpy")
+
+embedding_model = gemini.EMBEDDING_MODEL
+EMBEDDING_CACHE_SIZE = 4096
+CATEGORY_INDEX_TTL = float(os.getenv("CATEGORY_INDEX_TTL", "300"))  # seconds
+# Products the LLM could not classify are not sent to it again for this long
+NEGATIVE_CACHE_TTL = float(os.getenv("CLASSIFICATION_NEGATIVE_TTL", "600"))  # seconds
+# Directory of the memory-mapped index snapshot shared by all workers; empty disables it
+CATEGORY_SNAPSHOT_DIR = os.getenv("CATEGORY_SNAPSHOT_DIR", "")
+LLM_BATCH_SIZE = int(os.getenv("CLASSIFY_LLM_BATCH_SIZE", "100"))  # products per classification prompt
+# Products embedded ahead per round of classify_products; stays well below the cache size
+PREFETCH_CHUNK = int(os.getenv("CLASSIFY_PREFETCH_CHUNK", "1000"))
+
+# Thresholds of the local decision cascade (exact → lexical → embedding → LLM)
+cascade_config = cascade.CascadeConfig.from_env()
+
+# Built on first use by get_repo(); tests and benchmarks may assign their own.
+repo: FoodCategoryRepository | None = None
+
+
+def get_repo() -> FoodCategoryRepository:
+    global repo
+    if repo is None:
+        from solomia.core.db import get_read_session_factory, get_session_factory
+        from solomia.repository.category_repository import FoodCategoryRepository
+
+        repo = FoodCategoryRepository(get_session_factory(), get_read_session_factory())
+    return repo
+
+
+_index: CategoryIndex | None = None
+
+
+async def get_index(refresh: bool = False) -> CategoryIndex:
+    """Return the in-memory category index, reloading it when missing or older than the TTL."""
+    global _index
+    if refresh or _index is None or _index.age() > CATEGORY_INDEX_TTL:
+        if CATEGORY_SNAPSHOT_DIR:
+            _index = await _load_via_snapshot(CATEGORY_SNAPSHOT_DIR)
+        else:
+            _index = await CategoryIndex.load(get_repo())
+    return _index
+
+
+async def _load_via_snapshot(directory: str) -> CategoryIndex:
+    """
+    Serve the index from the on-disk snapshot while it matches the table.
+
+    Only the table fingerprint is queried when nothing changed; otherwise the
+    index is loaded from the database, saved as a new snapshot and mapped back
+    so that all workers share the same pages.
+    """
+    repo = get_repo()
+    version = await repo.get_table_version()
+    if _index is not None and _index.version == version:
+        _index.touch()
+        return _index
+
+    snapshot = CategoryIndex.open(directory, verify=_index is None)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    index = await CategoryIndex.load(repo, version=version)
+    try:
+        index.save(directory)
+    except OSError as e:
+        print(f"⚠️ Could not write category snapshot to {directory}: {e}")
+        return index
+    return CategoryIndex.open(directory) or index
+
+
+def invalidate_index():
+    """Drop the in-memory index; the next lookup reloads it."""
+    global _index
+    _index = None
+
+
+async def apply_change(event: dict):
+    """
+    Apply a ``food_categories`` change made by another process to the in-memory index.
+
+    Called by the ``notifications.Listener`` started in the container. A new
+    example or embedding is read by id and patched into the index in place;
+    anything else (new categories, bulk loads, a dropped listener connection)
+    drops the index so the next lookup reloads it.
+    """
+    index = _index
+    if index is None:
+        return
+    kind = event.get("kind")
+    if kind == "example":
+        category_id, example = event["category_id"], event["example"]
+        found = index.by_example(example)
+        if found is not None and found[0] == category_id:
+            return  # already in a reloaded index
+        index.add_example(category_id, example, await get_repo().get_example_embedding(category_id, example))
+    elif kind == "embedding":
+        embedding = await get_repo().get_category_embedding(event["category_id"])
+        if embedding is not None:
+            index.set_embedding(event["category_id"], embedding)
+    else:
+        invalidate_index()
+
+
+# Product name -> embedding. Users report the same products over and over.
+_embedding_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+# Concurrent misses for the same text share one embedding request
+_embedding_flight = SingleFlight()
 
-repo = FoodCategoryRepository(SessionFactory)
 
 async def get_embedding(text: str):
-    api_key = os.getenv("GOOGLE_API_KEY")
-
-    genai.configure(api_key=api_key)
-
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None,
-        functools.partial(
-            genai.embed_content,
-            model=embedding_model,
-            content=text,
-            task_type="retrieval_query",
-        ),
-    )
+    cached = _embedding_cache.get(text)
+    if cached is not None:
+        _embedding_cache.move_to_end(text)
+        metrics.EMBEDDING_CACHE.inc(result="hit")
+        return cached
+    metrics.EMBEDDING_CACHE.inc(result="miss")
+
+    embedding, shared = await _embedding_flight.do(text, lambda: _embed(text))
+    if shared:
+        metrics.DEDUPLICATED.inc(operation="embed", reason="in_flight")
+    return embedding
 
-    return np.array(result["embedding"])
+
+async def _embed(text: str):
+    embedding = np.array(await gemini.embed(text, task_type="retrieval_query"))
+    _remember(text, embedding)
+    return embedding
+
+
+def _remember(text: str, embedding: np.ndarray):
+    _embedding_cache[text] = embedding
+    if len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+        _embedding_cache.popitem(last=False)
+
+
+async def prefetch_embeddings(texts: list[str]) -> int:
+    """
+    Embed the texts missing from the cache with batched requests (``gemini.embed_many``).
+
+    Later :func:`get_embedding` calls for them are cache hits. Keep ``texts``
+    well below ``EMBEDDING_CACHE_SIZE`` so they are not evicted before use.
+
+    Returns:
+        int: Texts embedded.
+    """
+    missing = [text for text in dict.fromkeys(texts) if text not in _embedding_cache]
+    if not missing:
+        return 0
+    metrics.EMBEDDING_CACHE.inc(len(missing), result="miss")
+    for text, vector in zip(missing, await gemini.embed_many(missing, task_type="retrieval_query")):
+        _remember(text, np.array(vector))
+    return len(missing)
+
+
+def category_text(name: str, examples: list[str]) -> str:
+    """Text a category is embedded from."""
+    return f"{name}: {', '.join(examples)}"
 
 
 async def generate_category_embedding(name: str, examples: list[str]) -> np.ndarray:
@@ -47,122 +190,211 @@ async def generate_category_embedding(name: str, examples: list[str]) -> np.ndar
     if not examples:
         raise ValueError(f"Category '{name}' has no examples to embed")
 
-    text_input = f"{name}: {', '.join(examples)}"
-    result = await get_embedding(text_input)
+    result = await get_embedding(category_text(name, examples))
 
     # Convert embedding list → numpy array
     embedding = np.array(result, dtype=np.float32)
     return embedding
 
 
-async def find_best_category(conn, product_name: str, embedder=None, threshold: float = 0.75):
-    if embedder is None:
-        embedder = get_embedding
+async def find_best_category(conn, product_name: str, embedder=None, threshold: float | None = None):
+    """
+    Classify a product locally with the decision cascade.
 
-    # Check if product exists in examples
-    existing_cat = await repo.get_by_example(product_name)
-    if existing_cat:
-        return existing_cat["name"], 1.0, True
+    Args:
+        conn: Unused, kept for existing callers.
+        product_name (str): Product as reported.
+        embedder: Embedding function, ``get_embedding`` by default.
+        threshold (float | None): Overrides ``cascade_config.min_score``.
 
-    # Calculate embeddings
-    rows = await repo.get_all_with_embeddings()
+    Returns:
+        tuple[str | None, float, bool]: Best category, its score, and whether it is
+        confident enough to skip the LLM.
+    """
+    config = cascade_config if threshold is None else replace(cascade_config, min_score=threshold)
+    decision = await cascade.decide(product_name, await get_index(), embedder or get_embedding, config)
+    if decision.resolved:
+        metrics.CLASSIFICATION_SOURCE.inc(source=decision.source)
+    return decision.category, decision.score, decision.resolved
 
-    # Search for category with cosine similarity
-    product_emb = await embedder(product_name)
 
-    best_category, best_score = None, -1
-    for row in rows:
-        category_emb = np.array(eval(row["embedding"]))
-        score = np.dot(product_emb, category_emb) / (
-            np.linalg.norm(product_emb) * np.linalg.norm(category_emb)
-        )
-        if score > best_score:
-            best_category, best_score = row["name"], score
+# Normalized product name -> in-flight LLM classification (resolves to a category name or None)
+_classification_flight = SingleFlight()
+_unclassifiable = NegativeCache(ttl=NEGATIVE_CACHE_TTL)
 
-    is_known = best_score >= threshold
-    return best_category, best_score, is_known
 
-async def classify_with_llm(products: list[str], categories: list[str]) -> str:
+async def classify_with_llm(products: list[str], categories: list[str] | None = None) -> str:
     """
     Uses Gemini to classify a *batch* of product names into given categories.
     Returns JSON string: {"product": "category", ...}
+
+    ``categories`` limits the choice to these names; by default every known
+    category is offered. Products are keyed by normalized name: a product
+    already being classified by a concurrent call is awaited instead of sent
+    again, and products the LLM recently failed to classify are skipped for
+    ``NEGATIVE_CACHE_TTL``.
+
+    Raises:
+        admission.Overloaded: If the LLM budget has no room; nothing is cached then.
     """
 
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    if not gemini.has_credentials():
         raise EnvironmentError("GOOGLE_API_KEY not found in environment variables")
+    if isinstance(products, str):
+        products = [products]
+
+    owned: dict[str, str] = {}
+    waiting: dict[str, asyncio.Future] = {}
+    for product in products:
+        key = normalize_key(product)
+        if not key or key in owned or key in waiting:
+            continue
+        if key in _unclassifiable:
+            metrics.DEDUPLICATED.inc(operation="classify", reason="negative_cache")
+            continue
+        future, owner = _classification_flight.claim(key)
+        if owner:
+            owned[key] = product
+        else:
+            metrics.DEDUPLICATED.inc(operation="classify", reason="in_flight")
+            waiting[key] = future
+
+    resolved: dict[str, str | None] = {}
+    try:
+        if owned:
+            try:
+                classified = await _classify_batch(list(owned.values()), categories)
+            except admission.Overloaded:
+                # Not the products' fault: no negative caching, let the caller degrade
+                raise
+            except Exception as e:
+                print(f"❌ Error during classification: {type(e).__name__}: {e}")
+                print(traceback.format_exc())
+            else:
+                for key in owned:
+                    resolved[key] = classified.get(key)
+                    if resolved[key] is None:
+                        _unclassifiable.add(key)
+    finally:
+        # Always settle owned keys so concurrent callers never hang
+        for key in owned:
+            _classification_flight.resolve(key, resolved.get(key))
+
+    for key, future in waiting.items():
+        resolved[key] = await asyncio.shield(future)
+
+    result = {}
+    for product in products:
+        category = resolved.get(normalize_key(product))
+        if category:
+            result[product] = category
+    return json.dumps(result, ensure_ascii=False, indent=2)
+
+
+async def classify_products(product_names: list[str], use_llm: bool = True,
+                            llm_batch_size: int = LLM_BATCH_SIZE) -> dict[str, str | None]:
+    """
+    Classify many products at once, e.g. for bulk imports.
 
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    Distinct names go through the local cascade ``PREFETCH_CHUNK`` at a time:
+    the embeddings of a chunk's names that are not known examples are fetched
+    first with batched requests, then the cascade reads them from the cache.
+    The rest is sent to the LLM ``llm_batch_size`` products per prompt (and
+    learned as examples).
 
-    categories_str = "\n".join(f"- {cat}" for cat in categories)
-    products_str = "\n".join(f"- {p}" for p in products)
+    Args:
+        product_names (list[str]): Product names, duplicates allowed.
+        use_llm (bool): Leave locally unresolved products unclassified instead.
+        llm_batch_size (int): Products per LLM call.
 
-    prompt = f"""
-    You are a food classification assistant.
+    Returns:
+        dict[str, str | None]: Product name -> category name, None if unresolved.
+    """
+    result, unknown = {}, []
+    names = list(dict.fromkeys(product_names))
+    index = await get_index()
+    for start in range(0, len(names), PREFETCH_CHUNK):
+        chunk = names[start:start + PREFETCH_CHUNK]
+        await prefetch_embeddings([
+            name for name in chunk
+            if not index.by_example(name) and not (cascade_config.lexical and index.by_lexical(name))
+        ])
+        for name in chunk:
+            category, score, is_known = await find_best_category(None, name)
+            if is_known:
+                result[name] = category
+            else:
+                unknown.append(name)
+                result[name] = None
+
+    if use_llm:
+        for start in range(0, len(unknown), llm_batch_size):
+            batch = unknown[start:start + llm_batch_size]
+            predicted = json.loads(await classify_with_llm(batch))
+            result.update({name: predicted[name] for name in batch if name in predicted})
+    return result
+
+
+async def _classify_batch(products: list[str], categories: list[str] | None) -> dict[str, str]:
+    """
+    Ask Gemini for the categories of ``products`` and learn them as examples.
 
-    Given a list of product names, classify each one into exactly one of the following categories.
-    Return ONLY a valid JSON object mapping product names to categories, like this:
+    Returns:
+        dict[str, str]: Normalized product name -> category name, for products
+        that were classified into an existing category.
+    """
+    index = await get_index()
+    catalog = index.catalog()
+    if categories is not None:
+        wanted = {name.strip() for name in categories}
+        catalog = [(category_id, name) for category_id, name in catalog if name in wanted]
+
+    items = await gemini.generate_json(
+        prompts.classification_prompt(products, catalog), prompts.CLASSIFICATION_SCHEMA
+    )
+    print(f"Gemini response: {items}")
+    assigned = prompts.parse_classification(items, products, {category_id for category_id, _ in catalog})
 
-    {{
-        "apple": "Fruits",
-        "chicken breast": "Meat",
-        "milk": "Dairy"
-    }}
+    return await learn_examples(assigned)
 
-    Categories:
-    {categories_str}
 
-    Products:
-    {products_str}
+async def learn_examples(assigned: dict[str, int]) -> dict[str, str]:
     """
+    Store LLM-classified products as category examples.
 
-    try:
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None, functools.partial(model.generate_content, prompt)
-        )
-        response = (result.text or "").strip()
-        print(f"Gemini raw response: {response[:300]}")
-
-        # --- Extract JSON if LLM adds text ---
-        json_match = re.search(r"\{.*\}", response, re.DOTALL)
-        if not json_match:
-            raise ValueError("No JSON object found in LLM response")
-
-        parsed = json.loads(json_match.group(0))
-
-        # --- Validate ---
-        if not isinstance(parsed, dict):
-            raise ValueError("LLM output is not a valid JSON object")
-
-        # --- Update DB for each classification ---
-        async with repo.session_factory() as session:
-            for product_name, category_name in parsed.items():
-                # Skip if empty or weird
-                if not category_name or not isinstance(category_name, str):
-                    continue
-
-                category_id = await repo.get_id_by_name(category_name)
-                if not category_id:
-                    print(f"⚠️ Category '{category_name}' not found for product '{product_name}'")
-                    continue
-
-                # Append example
-                await repo.append_example(category_id, product_name)
-
-                # Regenerate embedding for updated examples
-                examples = await repo.get_examples_by_id(category_id)
-                embedding = await generate_category_embedding(category_name, examples)
-                await repo.update_embedding(category_id, embedding)
-
-                print(f"✅ Added '{product_name}' to category '{category_name}'")
-
-            await session.commit()
-
-        return json.dumps(parsed, ensure_ascii=False, indent=2)
-
-    except Exception as e:
-        print(f"❌ Error during classification: {type(e).__name__}: {e}")
-        print(traceback.format_exc())
-        return "{}"
\ No newline at end of file
+    Appends each product (with its embedding) to its category, updates the
+    in-memory index, and regenerates each touched category's embedding once.
+
+    Args:
+        assigned (dict[str, int]): Product name -> category id.
+
+    Returns:
+        dict[str, str]: Normalized product name -> category name.
+    """
+    repo = get_repo()
+    index = await get_index()
+    classified: dict[str, str] = {}
+    updated_categories: dict[int, str] = {}
+    # The category's examples are read back right after appending: read-your-writes
+    with unit_of_work.unit_of_work():
+        for product_name, category_id in assigned.items():
+            category_name = index.name_by_id(category_id)
+
+            # Append example (usually an embedding cache hit from find_best_category)
+            product_embedding = await get_embedding(product_name)
+            await repo.append_example(category_id, product_name, product_embedding)
+            index.add_example(category_id, product_name, product_embedding)
+            updated_categories[category_id] = category_name
+            classified[normalize_key(product_name)] = category_name
+
+            metrics.CLASSIFICATION_SOURCE.inc(source="llm")
+            print(f"✅ Added '{product_name}' to category '{category_name}'")
+
+        # Regenerate each touched category's embedding once, not once per product
+        for category_id, category_name in updated_categories.items():
+            examples = await repo.get_examples_by_id(category_id)
+            embedding = await generate_category_embedding(category_name, examples)
+            await repo.update_embedding(category_id, embedding)
+            index.set_embedding(category_id, embedding)
+
+    return classified
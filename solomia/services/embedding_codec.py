@@ -0,0 +1,121 @@
+"""
+Embedding size and storage format.
+
+``text-embedding-004`` is trained Matryoshka-style, so a prefix of a vector is
+itself a usable embedding. ``EMBEDDING_DIM`` (e.g. 256) asks Gemini for that
+many dimensions. Longer vectors, such as ones replayed from an older cassette,
+are truncated and renormalized. The default of 0 keeps the model's full 768.
+
+``EMBEDDING_STORAGE`` picks how vectors are kept in Postgres:
+
+* ``vector`` (default): the pgvector ``embedding`` column. It uses 4 bytes
+  per dimension on disk and decimal text on the wire.
+* ``float16``: ``embedding_codes`` holds half floats, 2 bytes per dimension.
+* ``int8``: ``embedding_codes`` holds one signed byte per dimension and
+  ``embedding_scale`` holds the row's scale. Quantization is symmetric:
+  ``value = code * scale``.
+
+Reads accept every format, so the setting can change at any time; existing
+rows are re-encoded by ``python -m scripts.init_project.reembed``. In memory,
+vectors are always float32.
+"""
+import os
+from typing import NamedTuple
+
+from solomia.core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "0"))  # 0: the model's full size
+EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "vector")
+STORAGES = ("vector", "float16", "int8")
+
+
+class Encoded(NamedTuple):
+    """Column values of one stored embedding; exactly one of ``embedding`` and ``codes`` is set."""
+    embedding: str | None
+    codes: bytes | None
+    scale: float | None
+
+
+def fit(vector, dim: int = EMBEDDING_DIM) -> "np.ndarray":
+    """
+    Truncate embeddings to their first ``dim`` components and renormalize them.
+
+    Args:
+        vector: One embedding, or a matrix with one per row.
+        dim (int): Target size; 0 or a size at least the input's leaves vectors as they are.
+
+    Returns:
+        np.ndarray: float32 vector(s).
+    """
+    vector = np.asarray(vector, dtype=np.float32)
+    if not dim or vector.shape[-1] <= dim:
+        return vector
+    vector = vector[..., :dim]
+    norm = np.linalg.norm(vector, axis=-1, keepdims=True)
+    return np.divide(vector, norm, out=np.zeros_like(vector), where=norm > 0)
+
+
+def quantize(matrix, storage: str) -> tuple["np.ndarray", "np.ndarray | None"]:
+    """
+    Encode the rows of a matrix.
+
+    Args:
+        matrix: float vectors, one per row.
+        storage (str): ``"float16"`` or ``"int8"``.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray | None]: Codes (same shape) and, for int8, one scale per row.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if storage == "float16":
+        return matrix.astype(np.float16), None
+    if storage == "int8":
+        scales = np.abs(matrix).max(axis=-1, keepdims=True) / 127
+        scales[scales == 0] = 1.0
+        return np.rint(matrix / scales).astype(np.int8), scales[..., 0]
+    raise ValueError(f"Unknown embedding storage: {storage!r}")
+
+
+def dequantize(codes, scales=None) -> "np.ndarray":
+    """Inverse of :func:`quantize`, as float32."""
+    if scales is None:
+        return np.asarray(codes, dtype=np.float32)
+    return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32)[..., None]
+
+
+def encode(vector, storage: str = EMBEDDING_STORAGE) -> Encoded:
+    """
+    Column values for storing one embedding.
+
+    Raises:
+        ValueError: If ``storage`` is not one of :data:`STORAGES`.
+    """
+    if storage == "vector":
+        return Encoded("[" + ", ".join(str(x) for x in vector) + "]", None, None)
+    codes, scales = quantize(np.asarray(vector).reshape(1, -1), storage)
+    return Encoded(None, codes[0].tobytes(), float(scales[0]) if scales is not None else None)
+
+
+def decode(embedding=None, codes: bytes | None = None, scale: float | None = None) -> "np.ndarray | None":
+    """
+    Stored embedding as a float32 vector.
+
+    Args:
+        embedding: pgvector value ("[0.1, 0.2, ...]" text or a sequence), if set.
+        codes (bytes | None): ``embedding_codes``: int8 when ``scale`` is set, float16 otherwise.
+        scale (float | None): ``embedding_scale``.
+
+    Returns:
+        np.ndarray | None: The vector, or None if nothing is stored.
+    """
+    if embedding is not None:
+        if isinstance(embedding, str):
+            return np.fromstring(embedding.strip()[1:-1], sep=",", dtype=np.float32)
+        return np.asarray(embedding, dtype=np.float32)
+    if codes is None:
+        return None
+    if scale is None:
+        return np.frombuffer(codes, dtype=np.float16).astype(np.float32)
+    return np.frombuffer(codes, dtype=np.int8).astype(np.float32) * np.float32(scale)
@@ -0,0 +1,226 @@
+import os
+import asyncio
+import functools
+import time
+
+from solomia.core import admission, metrics, tracing
+from solomia.core.lazy import lazy_import
+from solomia.services import cassette, embedding_codec, llm_output
+
+genai = lazy_import("google.generativeai")
+
+GENERATION_MODEL = "gemini-2.5-flash"
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_SIZE = 100  # API limit of texts per batch embedding request
+EMBED_CONCURRENCY = int(os.getenv("GEMINI_EMBED_CONCURRENCY", "4"))
+
+
+_models: dict = {}
+
+
+def has_credentials() -> bool:
+    """True if calls can be made: ``GOOGLE_API_KEY`` is set or a cassette is being replayed."""
+    return bool(os.getenv("GOOGLE_API_KEY")) or cassette.replaying()
+
+
+def _configure(required: bool = False):
+    if cassette.replaying():
+        return
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if required and not api_key:
+        raise EnvironmentError("GOOGLE_API_KEY not found in environment variables")
+    genai.configure(api_key=api_key)
+
+
+def get_model(model_name: str = GENERATION_MODEL):
+    """Return a cached ``GenerativeModel`` for the given name."""
+    model = _models.get(model_name)
+    if model is None:
+        model = _models[model_name] = genai.GenerativeModel(model_name)
+    return model
+
+
+def warm_up(model_names: tuple[str, ...] = (GENERATION_MODEL,)):
+    """Import the SDK, configure the API key and build the model objects ahead of the first request."""
+    if cassette.replaying():
+        return
+    _configure()
+    for name in model_names:
+        get_model(name)
+
+
+def _generate_content(model_name: str, prompt: str, **kwargs):
+    return get_model(model_name).generate_content(prompt, **kwargs)
+
+
+def _embed_content(**kwargs):
+    return genai.embed_content(**kwargs)
+
+
+def _embed_request(model_name: str, content, task_type: str, dim: int) -> dict:
+    request = {"model": model_name, "content": content, "task_type": task_type}
+    if dim:
+        request["output_dimensionality"] = dim
+    return request
+
+
+def _fit(vector: list[float], dim: int) -> list[float]:
+    # The API may ignore output_dimensionality (and cassettes may hold full vectors)
+    if not dim or len(vector) <= dim:
+        return vector
+    return embedding_codec.fit(vector, dim).tolist()
+
+
+async def _call(operation: str, fn, request: dict, **attributes):
+    """
+    Run a blocking Gemini SDK call in the default executor, timed and traced.
+
+    ``request`` identifies the call for the active cassette: it is recorded
+    with the response, or the response is replayed from it and ``fn`` is
+    never run (see :mod:`solomia.services.cassette`).
+    """
+    loop = asyncio.get_event_loop()
+    tape = cassette.active()
+    start = time.perf_counter()
+    status = "ok"
+    with tracing.span(f"gemini.{operation}", **attributes) as span:
+        try:
+            if tape is not None and tape.replaying:
+                result = await tape.replay(operation, request)
+            else:
+                try:
+                    result = await loop.run_in_executor(None, fn)
+                except Exception as e:
+                    if tape is not None:
+                        tape.record(operation, request, time.perf_counter() - start, error=e)
+                    raise
+                if tape is not None:
+                    tape.record(operation, request, time.perf_counter() - start, result=result)
+            _record_usage(operation, result, span)
+            return result
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            metrics.GEMINI_LATENCY.observe(time.perf_counter() - start, operation=operation)
+            metrics.GEMINI_REQUESTS.inc(operation=operation, status=status)
+
+
+def _record_usage(operation: str, result, span):
+    """Record prompt/response token counts reported by the API, if any."""
+    usage = getattr(result, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, field in (("prompt", "prompt_token_count"), ("response", "candidates_token_count")):
+        count = getattr(usage, field, None)
+        if count is not None:
+            metrics.GEMINI_TOKENS.observe(count, operation=operation, kind=kind)
+            span.set_attribute(f"gemini.{kind}_tokens", count)
+
+
+async def generate(prompt: str, model_name: str = GENERATION_MODEL, response_schema: dict | None = None) -> str:
+    """
+    Generate a completion for the prompt.
+
+    Args:
+        prompt (str): Full prompt text.
+        model_name (str): Gemini model to use.
+        response_schema (dict | None): If given, constrain the reply to JSON matching this schema.
+
+    Returns:
+        str: Stripped response text ("" if the model returned nothing).
+
+    Raises:
+        admission.Overloaded: If the LLM budget has no room for the call.
+    """
+    _configure(required=True)
+    kwargs = {}
+    if response_schema is not None:
+        kwargs["generation_config"] = {
+            "response_mime_type": "application/json",
+            "response_schema": response_schema,
+        }
+    # Generation is the scarce resource under load: it goes through the in-flight budget
+    async with admission.llm_budget.slot():
+        result = await _call(
+            "generate",
+            functools.partial(_generate_content, model_name, prompt, **kwargs),
+            {"model": model_name, "prompt": prompt, "response_schema": response_schema},
+            model=model_name,
+        )
+    return (result.text or "").strip()
+
+
+async def generate_json(prompt: str, schema: dict, model_name: str = GENERATION_MODEL):
+    """
+    Generate schema-constrained JSON and return it parsed and validated.
+
+    Args:
+        prompt (str): Full prompt text.
+        schema (dict): Response schema (OpenAPI subset, see :mod:`solomia.services.llm_output`).
+        model_name (str): Gemini model to use.
+
+    Returns:
+        Any: The parsed reply.
+
+    Raises:
+        llm_output.LLMOutputError: If the reply is not JSON matching ``schema``.
+    """
+    text = await generate(prompt, model_name, response_schema=schema)
+    return llm_output.validate(llm_output.loads(text), schema)
+
+
+async def embed(text: str, task_type: str = "retrieval_query", model_name: str = EMBEDDING_MODEL,
+                dim: int = embedding_codec.EMBEDDING_DIM) -> list[float]:
+    """
+    Embed a single text.
+
+    Args:
+        text (str): Text to embed.
+        task_type (str): "retrieval_query" for products, "retrieval_document" for categories.
+        model_name (str): Embedding model to use.
+        dim (int): Output dimensionality (Matryoshka truncation); 0 for the model's full size.
+
+    Returns:
+        list[float]: The embedding vector.
+    """
+    _configure()
+    request = _embed_request(model_name, text, task_type, dim)
+    result = await _call("embed", functools.partial(_embed_content, **request), request, model=model_name)
+    return _fit(result["embedding"], dim)
+
+
+async def embed_many(texts: list[str], task_type: str = "retrieval_query", model_name: str = EMBEDDING_MODEL,
+                     batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY,
+                     dim: int = embedding_codec.EMBEDDING_DIM) -> list[list[float]]:
+    """
+    Embed many texts with batch requests, at most ``concurrency`` in flight.
+
+    Args:
+        texts (list[str]): Texts to embed.
+        task_type (str): "retrieval_query" for products, "retrieval_document" for categories.
+        model_name (str): Embedding model to use.
+        batch_size (int): Texts per request (at most ``EMBED_BATCH_SIZE``).
+        concurrency (int): Requests in flight at once.
+        dim (int): Output dimensionality (Matryoshka truncation); 0 for the model's full size.
+
+    Returns:
+        list[list[float]]: One vector per text, in input order.
+    """
+    if not texts:
+        return []
+    _configure()
+    batch_size = min(batch_size, EMBED_BATCH_SIZE)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def embed_batch(batch: list[str]) -> list[list[float]]:
+        request = _embed_request(model_name, batch, task_type, dim)
+        async with semaphore:
+            result = await _call(
+                "embed", functools.partial(_embed_content, **request), request, model=model_name, batch=len(batch)
+            )
+        return [_fit(vector, dim) for vector in result["embedding"]]
+
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+    return [vector for batch in results for vector in batch]
@@ -0,0 +1,111 @@
+"""
+Report history across date ranges, paged by keyset and streamable.
+
+Pages are ordered newest first by ``(date, id)``; each page carries an opaque
+cursor for the next one, so a client (the ``/history`` command, a chart) can
+walk years of reports at constant cost per page and without holding more than
+one page of ``report_items`` in memory. Per-category rollups are summed in the
+database.
+"""
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import AsyncIterator
+
+from solomia.repository.records import HistoryReport
+from solomia.repository.report_repository import ReportRepository
+
+PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "10"))
+MAX_PAGE_SIZE = 100
+
+
+@dataclass
+class HistoryPage:
+    reports: list[HistoryReport]
+    next_cursor: str | None  # None on the last page
+
+
+def encode_cursor(report_date: date, report_id) -> str:
+    """Cursor pointing right after the given report (short enough for Telegram callback data)."""
+    return f"{report_date.isoformat()}_{report_id}"
+
+
+def decode_cursor(cursor: str) -> tuple[date, uuid.UUID]:
+    """
+    Inverse of :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    day, _, report_id = cursor.partition("_")
+    return date.fromisoformat(day), uuid.UUID(report_id)
+
+
+async def get_page(repo: ReportRepository, user_id: str, start: date | None = None, end: date | None = None,
+                   cursor: str | None = None, limit: int = PAGE_SIZE) -> HistoryPage:
+    """
+    One page of a user's reports with their items, newest first.
+
+    Args:
+        repo (ReportRepository): Data source.
+        user_id (str): UUID of the user.
+        start (date | None): First day, inclusive (default: no lower bound).
+        end (date | None): Last day, inclusive (default: no upper bound).
+        cursor (str | None): ``next_cursor`` of the previous page.
+        limit (int): Page size, capped at ``MAX_PAGE_SIZE``.
+
+    Returns:
+        HistoryPage: The reports and the cursor of the next page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor) if cursor else None
+    # One extra row tells whether there is a next page without a COUNT
+    rows = await repo.get_history_page(user_id, start or date.min, end or date.max, after, limit + 1)
+    reports = rows[:limit]
+    next_cursor = encode_cursor(reports[-1].date, reports[-1].id) if len(rows) > limit else None
+    return HistoryPage(reports, next_cursor)
+
+
+async def stream(repo: ReportRepository, user_id: str, start: date | None = None, end: date | None = None,
+                 page_size: int = MAX_PAGE_SIZE) -> AsyncIterator[HistoryReport]:
+    """
+    Yield every report of a user in the range, newest first, one page in memory at a time.
+
+    Args:
+        repo (ReportRepository): Data source.
+        user_id (str): UUID of the user.
+        start (date | None): First day, inclusive.
+        end (date | None): Last day, inclusive.
+        page_size (int): Reports fetched per query.
+    """
+    cursor = None
+    while True:
+        page = await get_page(repo, user_id, start, end, cursor, page_size)
+        for report in page.reports:
+            yield report
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+
+async def rollup(repo: ReportRepository, user_id: str, start: date, end: date,
+                 bucket: str = "week") -> dict[date, dict[int | None, float]]:
+    """
+    Eaten grams per category, summed per day, week or month.
+
+    Args:
+        repo (ReportRepository): Data source.
+        user_id (str): UUID of the user.
+        start (date): First day, inclusive.
+        end (date): Last day, inclusive.
+        bucket (str): ``"day"``, ``"week"`` or ``"month"``.
+
+    Returns:
+        dict[date, dict[int | None, float]]: Bucket start -> category id (None = unclassified)
+        -> grams, in date order.
+    """
+    series: dict[date, dict[int | None, float]] = {}
+    for row in await repo.get_category_rollup(user_id, start, end, bucket):
+        series.setdefault(row.bucket, {})[row.category_id] = float(row.total_grams or 0)
+    return series
@@ -0,0 +1,87 @@
+"""
+Parsing and validation of structured (JSON) LLM output.
+
+Gemini is asked for schema-constrained JSON (``response_schema``), so the
+reply is parsed directly instead of being searched for a JSON-looking
+substring. :func:`validate` checks the parsed value against the same
+OpenAPI-style schema dict that was sent, covering the subset we use
+(object/array/string/integer/number/boolean, ``properties``, ``required``,
+``items``, ``nullable``).
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency, several times faster than json
+    orjson = None
+
+
+class LLMOutputError(ValueError):
+    """The model's reply is not valid JSON or does not match the expected schema."""
+
+
+_PY_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+}
+
+
+def loads(text: str) -> Any:
+    """
+    Parse a JSON reply, tolerating a Markdown code fence around it.
+
+    Raises:
+        LLMOutputError: If the text is not valid JSON.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    try:
+        return orjson.loads(text) if orjson is not None else json.loads(text)
+    except ValueError as e:  # orjson.JSONDecodeError and json.JSONDecodeError are ValueErrors
+        raise LLMOutputError(f"LLM did not return valid JSON: {e}") from e
+
+
+def validate(value: Any, schema: dict, path: str = "$") -> Any:
+    """
+    Check ``value`` against ``schema``.
+
+    Args:
+        value (Any): Parsed JSON.
+        schema (dict): Schema dict as passed to ``response_schema``.
+        path (str): Location used in error messages.
+
+    Returns:
+        Any: ``value`` unchanged.
+
+    Raises:
+        LLMOutputError: On the first mismatch.
+    """
+    if value is None:
+        if schema.get("nullable"):
+            return value
+        raise LLMOutputError(f"{path}: null is not allowed")
+
+    expected = schema.get("type", "").lower()
+    py_type = _PY_TYPES.get(expected)
+    # bool is an int subclass, but not a valid integer/number here
+    if py_type is not None and (not isinstance(value, py_type) or (isinstance(value, bool) and expected != "boolean")):
+        raise LLMOutputError(f"{path}: expected {expected}, got {type(value).__name__}")
+
+    if expected == "object":
+        for name in schema.get("required", ()):
+            if name not in value:
+                raise LLMOutputError(f"{path}: missing '{name}'")
+        for name, sub_schema in schema.get("properties", {}).items():
+            if name in value:
+                validate(value[name], sub_schema, f"{path}.{name}")
+    elif expected == "array" and "items" in schema:
+        for i, item in enumerate(value):
+            validate(item, schema["items"], f"{path}[{i}]")
+    return value
@@ -0,0 +1,239 @@
+"""
+Batched evaluation of eaten food against users' category plans.
+
+A batch of users and a date range is loaded with two set-based queries
+(plans, and eaten grams grouped by user/day/category) into dense arrays:
+
+    eaten    float32 [users, days, categories]
+    planned  float32 [users, categories]       (0 = not in the plan)
+
+Ratios and statuses are computed for the whole batch at once, and
+:meth:`PlanEvaluation.summary` folds the days into weekly or monthly periods.
+Only categories that occur in the batch are materialized, and callers evaluate
+large populations in batches of ``PLAN_EVAL_BATCH_SIZE`` users
+(:func:`iter_evaluations`), which keeps memory bounded.
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import AsyncIterator, Sequence
+
+from solomia.core.lazy import lazy_import
+from solomia.repository.plan_repository import PlanRepository
+
+np = lazy_import("numpy")
+
+LOW_RATIO = float(os.getenv("PLAN_LOW_RATIO", "0.7"))
+HIGH_RATIO = float(os.getenv("PLAN_HIGH_RATIO", "1.2"))
+BATCH_SIZE = int(os.getenv("PLAN_EVAL_BATCH_SIZE", "1000"))
+
+# Status codes stored in PlanEvaluation.status
+UNPLANNED = -1  # eaten, but the category is not in the plan
+UNDER = 0
+BALANCED = 1
+OVER = 2
+
+STATUS_NAMES = {UNPLANNED: "unplanned", UNDER: "under", BALANCED: "balanced", OVER: "over"}
+# How planned statuses are shown to users
+STATUS_TEXT = {"under": "🟠 потрібно більше", "over": "🔴 забагато", "balanced": "🟢 збалансовано"}
+
+
+@dataclass
+class PlanEvaluation:
+    user_ids: list
+    days: list[date]
+    category_ids: "np.ndarray"  # [categories]
+    eaten: "np.ndarray"  # [users, days, categories]
+    planned: "np.ndarray"  # [users, categories]
+    ratio: "np.ndarray"  # [users, days, categories], NaN where not planned
+    status: "np.ndarray"  # int8 [users, days, categories], see the status codes
+
+    def user_index(self, user_id) -> int:
+        return [str(u) for u in self.user_ids].index(str(user_id))
+
+    def day_results(self, user_id, day: date) -> list[dict]:
+        """
+        Per-category results of one user on one day.
+
+        Returns:
+            list[dict]: ``category_id``, ``eaten``, ``planned``, ``ratio`` and ``status``
+            for every planned category and every eaten unplanned one; planned
+            categories first.
+        """
+        u, d = self.user_index(user_id), self.days.index(day)
+        planned = self.planned[u]
+        eaten = self.eaten[u, d]
+        columns = np.concatenate([np.flatnonzero(planned > 0), np.flatnonzero((planned == 0) & (eaten > 0))])
+        return [
+            {
+                "category_id": int(self.category_ids[c]),
+                "eaten": float(eaten[c]),
+                "planned": float(planned[c]),
+                "ratio": None if np.isnan(self.ratio[u, d, c]) else float(self.ratio[u, d, c]),
+                "status": STATUS_NAMES[int(self.status[u, d, c])],
+            }
+            for c in columns
+        ]
+
+    def summary(self, period: str = "week") -> list[dict]:
+        """
+        Fold days into weeks (starting Monday) or calendar months.
+
+        For every user and period: the ratio of total eaten to total planned
+        grams per category, how many planned category-days were under, balanced
+        or over, and ``adherence`` - the share of planned category-days that
+        were balanced.
+
+        Args:
+            period (str): ``"week"`` or ``"month"``.
+
+        Returns:
+            list[dict]: One record per (user, period).
+        """
+        keys = [_period_start(day, period) for day in self.days]
+        # days are consecutive, so each period is one contiguous slice
+        starts = np.flatnonzero(np.r_[True, np.asarray(keys[1:]) != np.asarray(keys[:-1])])
+        n_days = np.diff(np.r_[starts, len(self.days)])
+
+        eaten = np.add.reduceat(self.eaten, starts, axis=1)  # [users, periods, categories]
+        planned = self.planned[:, None, :] * n_days[None, :, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(planned > 0, eaten / planned, np.nan)
+
+        counts = {
+            name: np.add.reduceat((self.status == code).astype(np.int32), starts, axis=1).sum(axis=2)
+            for code, name in ((UNDER, "under"), (BALANCED, "balanced"), (OVER, "over"))
+        }
+        planned_days = counts["under"] + counts["balanced"] + counts["over"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            adherence = np.where(planned_days > 0, counts["balanced"] / planned_days, np.nan)
+
+        records = []
+        for u, user_id in enumerate(self.user_ids):
+            planned_columns = np.flatnonzero(self.planned[u] > 0)
+            for p, start in enumerate(starts):
+                records.append({
+                    "user_id": str(user_id),
+                    "period": period,
+                    "start": keys[start].isoformat(),
+                    "days": int(n_days[p]),
+                    "ratios": {int(self.category_ids[c]): round(float(ratio[u, p, c]), 3) for c in planned_columns},
+                    **{name: int(count[u, p]) for name, count in counts.items()},
+                    "adherence": None if np.isnan(adherence[u, p]) else round(float(adherence[u, p]), 3),
+                })
+        return records
+
+
+def _period_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+def classify_ratios(eaten: "np.ndarray", planned: "np.ndarray", low: float = LOW_RATIO,
+                    high: float = HIGH_RATIO) -> tuple["np.ndarray", "np.ndarray"]:
+    """
+    Vectorized eaten/planned ratio and status.
+
+    Args:
+        eaten (np.ndarray): Eaten grams, ``[..., categories]``.
+        planned (np.ndarray): Planned grams, broadcastable to ``eaten``; 0 = not planned.
+        low (float): Below this ratio the status is UNDER.
+        high (float): Above this ratio the status is OVER.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Ratios (NaN where not planned) and int8 status codes.
+    """
+    planned = np.broadcast_to(planned, eaten.shape)
+    is_planned = planned > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(is_planned, eaten / planned, np.nan).astype(np.float32)
+
+    status = np.full(eaten.shape, BALANCED, dtype=np.int8)
+    status[is_planned & (ratio < low)] = UNDER
+    status[is_planned & (ratio > high)] = OVER
+    status[~is_planned] = UNPLANNED
+    return ratio, status
+
+
+def build(user_ids: Sequence, start: date, end: date, plan_rows: Sequence[tuple],
+          total_rows: Sequence[tuple], low: float = LOW_RATIO, high: float = HIGH_RATIO) -> PlanEvaluation:
+    """
+    Assemble a :class:`PlanEvaluation` from query rows.
+
+    Args:
+        user_ids (Sequence): Users of the batch; rows of other users are ignored.
+        start (date): First day, inclusive.
+        end (date): Last day, inclusive.
+        plan_rows (Sequence[tuple]): ``(user_id, category_id, amount_grams)``.
+        total_rows (Sequence[tuple]): ``(user_id, date, category_id, total_grams)``.
+        low (float): UNDER threshold.
+        high (float): OVER threshold.
+
+    Returns:
+        PlanEvaluation: Arrays for the whole batch.
+    """
+    user_ids = list(user_ids)
+    users = {str(user_id): i for i, user_id in enumerate(user_ids)}
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    plan_rows = [row for row in plan_rows if str(row[0]) in users]
+    total_rows = [row for row in total_rows if str(row[0]) in users and start <= row[1] <= end]
+
+    plan_users = np.fromiter((users[str(row[0])] for row in plan_rows), dtype=np.int64, count=len(plan_rows))
+    plan_categories = np.fromiter((row[1] for row in plan_rows), dtype=np.int64, count=len(plan_rows))
+    plan_grams = np.fromiter((row[2] or 0 for row in plan_rows), dtype=np.float32, count=len(plan_rows))
+
+    total_users = np.fromiter((users[str(row[0])] for row in total_rows), dtype=np.int64, count=len(total_rows))
+    total_days = np.fromiter(((row[1] - start).days for row in total_rows), dtype=np.int64, count=len(total_rows))
+    total_categories = np.fromiter((row[2] for row in total_rows), dtype=np.int64, count=len(total_rows))
+    total_grams = np.fromiter((row[3] or 0 for row in total_rows), dtype=np.float32, count=len(total_rows))
+
+    # Only categories present in this batch get a column
+    category_ids, columns = np.unique(np.concatenate([plan_categories, total_categories]), return_inverse=True)
+    plan_columns, total_columns = columns[:len(plan_rows)], columns[len(plan_rows):]
+
+    planned = np.zeros((len(user_ids), len(category_ids)), dtype=np.float32)
+    planned[plan_users, plan_columns] = plan_grams
+
+    eaten = np.zeros((len(user_ids), len(days), len(category_ids)), dtype=np.float32)
+    np.add.at(eaten, (total_users, total_days, total_columns), total_grams)
+
+    ratio, status = classify_ratios(eaten, planned[:, None, :], low, high)
+    return PlanEvaluation(user_ids, days, category_ids, eaten, planned, ratio, status)
+
+
+async def evaluate(repo: PlanRepository, user_ids: Sequence, start: date, end: date) -> PlanEvaluation:
+    """
+    Evaluate one batch of users over ``start..end`` with two queries.
+
+    Args:
+        repo (PlanRepository): Data source.
+        user_ids (Sequence): User UUIDs.
+        start (date): First day, inclusive.
+        end (date): Last day, inclusive.
+
+    Returns:
+        PlanEvaluation: Results for the batch.
+    """
+    plan_rows = await repo.get_plans(user_ids)
+    total_rows = await repo.get_daily_totals(user_ids, start, end)
+    return build(user_ids, start, end, plan_rows, total_rows)
+
+
+async def iter_evaluations(repo: PlanRepository, start: date, end: date,
+                           batch_size: int = BATCH_SIZE) -> AsyncIterator[PlanEvaluation]:
+    """
+    Evaluate every user with a plan, ``batch_size`` users at a time.
+
+    Three queries per batch: the next page of user ids, plans and totals.
+    """
+    after = None
+    while True:
+        user_ids = await repo.get_planned_user_ids(after, batch_size)
+        if not user_ids:
+            return
+        yield await evaluate(repo, user_ids, start, end)
+        after = user_ids[-1]
@@ -0,0 +1,125 @@
+"""
+Prompt builders and response schemas for the Gemini calls.
+
+Prompts are kept compact: categories are listed once as ``<id>: <name>`` and
+referenced by id, products are numbered and referenced by position, and the
+response shape is enforced by a ``response_schema`` instead of being spelled
+out with examples. The answer to a classification prompt is a short list of
+``{"p": <product number>, "c": <category id>}`` pairs.
+"""
+from typing import Iterable, Sequence
+
+CLASSIFICATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "p": {"type": "integer"},
+            "c": {"type": "integer", "nullable": True},
+        },
+        "required": ["p", "c"],
+    },
+}
+
+REPORT_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "product_name": {"type": "string"},
+            "amount_grams": {"type": "number"},
+        },
+        "required": ["product_name", "amount_grams"],
+    },
+}
+
+REPORT_CLASSIFICATION_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "product_name": {"type": "string"},
+            "amount_grams": {"type": "number"},
+            "category_id": {"type": "integer", "nullable": True},
+        },
+        "required": ["product_name", "amount_grams", "category_id"],
+    },
+}
+
+REPORT_INSTRUCTIONS = (
+    "Extract every food item from this daily nutrition report with its amount in grams. "
+    "product_name: lowercase, without units. "
+    "For pieces or approximate amounts (\"2 eggs\", \"a banana\") estimate typical grams; never null. "
+    "Ignore meal names and commentary."
+)
+
+CLASSIFICATION_INSTRUCTIONS = (
+    "Classify each food product into exactly one category. "
+    "Answer one item per product: p = product number, c = category id, or null if none fits."
+)
+
+
+def _numbered(lines: Iterable[tuple[object, str]]) -> str:
+    return "\n".join(f"{ref}: {text}" for ref, text in lines)
+
+
+def classification_prompt(products: Sequence[str], categories: Iterable[tuple[int, str]]) -> str:
+    """
+    Build the classification prompt.
+
+    Args:
+        products (Sequence[str]): Product names, referenced by position.
+        categories (Iterable[tuple[int, str]]): (id, name) pairs, referenced by id.
+
+    Returns:
+        str: Prompt to send with :data:`CLASSIFICATION_SCHEMA`.
+    """
+    return (
+        f"{CLASSIFICATION_INSTRUCTIONS}\n\n"
+        f"Categories:\n{_numbered(categories)}\n\n"
+        f"Products:\n{_numbered(enumerate(products))}"
+    )
+
+
+def parse_classification(items: list[dict], products: Sequence[str], category_ids: set[int]) -> dict[str, int]:
+    """
+    Map a validated classification answer back to product names.
+
+    Args:
+        items (list[dict]): Answer matching :data:`CLASSIFICATION_SCHEMA`.
+        products (Sequence[str]): Products in prompt order.
+        category_ids (set[int]): Ids that were offered; anything else is ignored.
+
+    Returns:
+        dict[str, int]: Product name -> category id, for products the model could place.
+    """
+    assigned = {}
+    for item in items:
+        position, category_id = item["p"], item["c"]
+        if category_id in category_ids and 0 <= position < len(products):
+            assigned.setdefault(products[position], category_id)
+    return assigned
+
+
+def report_prompt(report_text: str) -> str:
+    """Build the report-parsing prompt, sent with :data:`REPORT_SCHEMA`."""
+    return f"{REPORT_INSTRUCTIONS}\n\nReport:\n{report_text}"
+
+
+def report_classification_prompt(report_text: str, categories: Iterable[tuple[int, str]]) -> str:
+    """
+    Build the one-shot prompt that parses a report and classifies its items together.
+
+    Args:
+        report_text (str): Report as typed by the user.
+        categories (Iterable[tuple[int, str]]): (id, name) pairs, referenced by id.
+
+    Returns:
+        str: Prompt to send with :data:`REPORT_CLASSIFICATION_SCHEMA`.
+    """
+    return (
+        f"{REPORT_INSTRUCTIONS} "
+        "category_id: id of the one category the item belongs to, or null if none fits.\n\n"
+        f"Categories:\n{_numbered(categories)}\n\n"
+        f"Report:\n{report_text}"
+    )
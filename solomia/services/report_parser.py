@@ -0,0 +1,53 @@
+"""
+Cheap local pre-parse of free-text food reports.
+
+Splits a report into candidate items ("вівсянка 40 г", "банан", "2 яйця")
+without calling the LLM, so they can be classified locally first. Only
+explicit weights/volumes are read; piece counts and vague amounts are left
+as ``None`` for the LLM to estimate.
+"""
+import re
+
+# Commas inside numbers ("1,5 кг") are decimal separators, not item separators
+_SPLIT_RE = re.compile(r"[\n;+]|(?<!\d),|,(?!\d)")
+_MEAL_RE = re.compile(
+    r"^\s*(сніданок|обід|вечеря|перекус|полудень|breakfast|lunch|dinner|snack)\s*[:\-—]?\s*", re.IGNORECASE
+)
+_AMOUNT_RE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(кг|kg|грам\w*|гр|г|g|мл|ml|л|l)(?![\w])", re.IGNORECASE
+)
+_UNIT_GRAMS = {"кг": 1000.0, "kg": 1000.0, "л": 1000.0, "l": 1000.0}
+_LEADING_LABEL_RE = re.compile(r"^[\w\s]{1,20}:\s*")
+_PUNCT_RE = re.compile(r"^[\s\-–—•*.:()]+|[\s\-–—•*.:()]+$")
+
+
+def _grams(value: str, unit: str) -> float:
+    return float(value.replace(",", ".")) * _UNIT_GRAMS.get(unit.lower(), 1.0)
+
+
+def pre_parse(report_text: str) -> list[dict]:
+    """
+    Split a report into items with an explicit amount when one is given.
+
+    Args:
+        report_text (str): Report as typed by the user.
+
+    Returns:
+        list[dict]: ``{"product_name": str, "amount_grams": float | None}`` per item,
+        with lowercase names and meal labels removed.
+    """
+    items = []
+    for chunk in _SPLIT_RE.split(report_text):
+        chunk = _MEAL_RE.sub("", chunk)
+        chunk = _LEADING_LABEL_RE.sub("", chunk)
+
+        amount = None
+        match = _AMOUNT_RE.search(chunk)
+        if match:
+            amount = _grams(match.group(1), match.group(2))
+            chunk = chunk[:match.start()] + chunk[match.end():]
+
+        name = _PUNCT_RE.sub("", " ".join(chunk.replace(" - ", " ").replace(" — ", " ").split())).lower()
+        if name:
+            items.append({"product_name": name, "amount_grams": amount})
+    return items
@@ -0,0 +1,254 @@
+import json
+from datetime import date
+from solomia.config import REPORT_PIPELINE
+from solomia.core import admission, metrics, tracing
+from solomia.core.db import get_session_factory
+from solomia.core.singleflight import normalize_key
+from solomia.services.category_service import find_best_category, classify_with_llm, get_index, learn_examples
+from solomia.services.report_parser import pre_parse
+from solomia.repository.user_repository import UserRepository
+from solomia.repository.report_repository import ReportRepository
+from solomia.repository.records import ReportRecord
+from solomia.services import gemini, prompts
+
+UNKNOWN_CATEGORY = "Невідома категорія"
+
+
+async def parse_report_with_llm(report_text: str) -> list[dict]:
+    """
+    Parse a food report and extract structured product data:
+    product name + amount in grams.
+
+    Gemini answers with schema-constrained JSON (``prompts.REPORT_SCHEMA``):
+    [
+        {"product_name": "oatmeal", "amount_grams": 40},
+        {"product_name": "egg", "amount_grams": 120}
+    ]
+
+    Raises:
+        LLMOutputError: If the reply is not JSON matching the schema.
+        admission.Overloaded: If the LLM budget has no room; there is no local fallback for parsing.
+    """
+    # Gemini call runs in a background thread to avoid blocking the event loop
+    parsed = await gemini.generate_json(prompts.report_prompt(report_text), prompts.REPORT_SCHEMA)
+    print("Raw LLM output:", parsed)
+
+    # Normalize
+    cleaned = []
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        name = item.get("product_name") or item.get("name") or ""
+        amount = item.get("amount_grams") or item.get("grams") or None
+        try:
+            amount = float(amount) if amount is not None else None
+        except (ValueError, TypeError):
+            amount = None
+        cleaned.append({"product_name": name.strip().lower(), "amount_grams": amount})
+
+    return cleaned
+
+
+async def classify_report(products: list[dict]) -> list[dict]:
+    """
+    Classify a list of parsed products into food categories.
+
+    Products the local cascade is not sure about go to the LLM; when the LLM
+    budget is exhausted they keep the cascade's best embedding guess instead.
+
+    Args:
+        products (list[dict]): List of dicts, each containing:
+            - "product_name": str
+            - "amount_grams": float | None
+
+    Returns:
+        list[dict]: List of dicts with added "category" field:
+            [
+                {"product_name": "...", "amount_grams": 40.0, "category": "..."},
+                ...
+            ]
+    """
+    if not isinstance(products, list):
+        raise TypeError("Expected a list of dicts (JSON), got something else.")
+
+    if not products:
+        print("❌ Empty product list.")
+        return []
+
+    print(f"🔍 Classifying products: {products}")
+
+    classified = []
+    unknown = []
+    guesses = {}
+
+    # 1️⃣ Try classify via embeddings
+    for product in products:
+        name = product.get("product_name")
+        if not name:
+            continue
+
+        category, score, is_known = await find_best_category(None, name)
+        if is_known:
+            classified.append({
+                "product_name": name,
+                "amount_grams": product.get("amount_grams"),
+                "category": category,
+            })
+            print(f"✅ via embedding: {name} → {category}")
+        else:
+            unknown.append(product)
+            guesses[name] = category
+
+    # 2️⃣ Fallback to LLM classification
+    if unknown:
+        print(f"🧠 Classifying {len(unknown)} unknown products via LLM...")
+        unknown_names = [p["product_name"] for p in unknown]
+        try:
+            predicted_json = await classify_with_llm(unknown_names)
+        except admission.Overloaded:
+            print("🐢 LLM budget exhausted, keeping the embedding guesses")
+            metrics.SHED_REQUESTS.inc(reason="degraded")
+            predicted_json = json.dumps({name: guess for name, guess in guesses.items() if guess})
+
+        try:
+            predicted = json.loads(predicted_json)
+        except json.JSONDecodeError:
+            print("⚠️ JSON parsing failed for LLM output:", predicted_json)
+            predicted = {}
+
+        for product in unknown:
+            name = product["product_name"]
+            if name not in predicted:
+                metrics.CLASSIFICATION_SOURCE.inc(source="unresolved")
+            classified.append({
+                "product_name": name,
+                "amount_grams": product.get("amount_grams"),
+                "category": predicted.get(name, UNKNOWN_CATEGORY),
+            })
+
+    return classified
+
+
+async def parse_and_classify_report(report_text: str) -> list[dict]:
+    """
+    One-shot pipeline: parse and classify a report with at most one LLM call.
+
+    The report is first split locally (``pre_parse``) and every item goes
+    through exact-match and embedding classification. If all items are
+    resolved and have explicit amounts, no LLM call is made. Otherwise one
+    generation returns product_name, amount_grams and category_id for the
+    whole report; locally resolved products keep their local category, and
+    the rest are learned as new examples.
+
+    When the LLM budget is exhausted and every item has an explicit amount,
+    the report is classified by embeddings alone (best guesses included).
+
+    Args:
+        report_text (str): Report as typed by the user.
+
+    Returns:
+        list[dict]: Same shape as :func:`classify_report`, ready for :func:`save_report`.
+
+    Raises:
+        admission.Overloaded: If the report needs the LLM for parsing and the budget has no room.
+    """
+    items = pre_parse(report_text)
+    local, guesses = {}, {}
+    for item in items:
+        category, score, is_known = await find_best_category(None, item["product_name"])
+        key = normalize_key(item["product_name"])
+        guesses[key] = category
+        if is_known:
+            local[key] = category
+            print(f"✅ locally: {item['product_name']} → {category}")
+
+    amounts_known = all(item["amount_grams"] is not None for item in items)
+    if items and len(local) == len(items) and amounts_known:
+        return [{**item, "category": local[normalize_key(item["product_name"])]} for item in items]
+
+    print("🧠 Parsing and classifying the report via LLM...")
+    index = await get_index()
+    try:
+        parsed = await gemini.generate_json(
+            prompts.report_classification_prompt(report_text, index.catalog()),
+            prompts.REPORT_CLASSIFICATION_SCHEMA,
+        )
+    except admission.Overloaded:
+        if not items or not amounts_known:
+            raise
+        print("🐢 LLM budget exhausted, classifying by embeddings only")
+        metrics.SHED_REQUESTS.inc(reason="degraded")
+        return [
+            {**item, "category": guesses[normalize_key(item["product_name"])] or UNKNOWN_CATEGORY}
+            for item in items
+        ]
+
+    classified, to_learn = [], {}
+    for item in parsed:
+        name = item["product_name"].strip().lower()
+        if not name:
+            continue
+        category = local.get(normalize_key(name))
+        if category is None:
+            category = index.name_by_id(item["category_id"]) if item["category_id"] is not None else None
+            if category is None:
+                metrics.CLASSIFICATION_SOURCE.inc(source="unresolved")
+                category = UNKNOWN_CATEGORY
+            else:
+                to_learn[name] = item["category_id"]
+        classified.append({"product_name": name, "amount_grams": float(item["amount_grams"]), "category": category})
+
+    if to_learn:
+        await learn_examples(to_learn)
+    return classified
+
+
+async def process_report(report_text: str) -> list[dict]:
+    """
+    Parse and classify a report with the configured ``REPORT_PIPELINE``.
+
+    Each step runs in a :func:`solomia.core.tracing.stage`, so callers get the
+    ``parse``/``classify`` spans and stage timings without wrapping it themselves.
+    """
+    if REPORT_PIPELINE == "one_shot":
+        with tracing.stage("parse_classify"):
+            return await parse_and_classify_report(report_text)
+    with tracing.stage("parse"):
+        products = await parse_report_with_llm(report_text)
+    with tracing.stage("classify", items=len(products)):
+        return await classify_report(products)
+
+
+async def save_report(products: list[dict], telegram_id: str = "12345678",
+                      user_repo: UserRepository | None = None,
+                      report_repo: ReportRepository | None = None) -> ReportRecord:
+    """
+    Add classified products to the user's report for today.
+
+    The report and all its items are written in one transaction
+    (:meth:`ReportRepository.save_report`).
+
+    Args:
+        products (list[dict]): ``{"product_name", "amount_grams", "category"}`` items.
+        telegram_id (str): Telegram ID of the reporting user.
+        user_repo (UserRepository | None): The container's repository; a new one on the primary when None.
+        report_repo (ReportRepository | None): Likewise.
+
+    Returns:
+        ReportRecord: Today's report.
+
+    Raises:
+        ValueError: If the user is not registered.
+    """
+    user_repo = user_repo or UserRepository(get_session_factory())
+    report_repo = report_repo or ReportRepository(get_session_factory())
+    user_id = await user_repo.get_id_by_telegram_id(telegram_id)
+    if user_id is None:
+        raise ValueError(f"User {telegram_id} is not registered")
+
+    index = await get_index()
+    report = await report_repo.save_report(user_id, date.today(), [
+        (item["product_name"], item["amount_grams"], index.id_by_name(item["category"])) for item in products
+    ])
+    print(f"Report {report.id}: {len(products)} items saved")
+    return report
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from solomia.core import sql_tracker
+
+# solomia.core.db builds its engine URL from these when the engine is first used
+os.environ.setdefault("DB_USER", "test")
+os.environ.setdefault("DB_PASSWORD", "test")
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("DB_NAME", "test")
+
+
+@pytest.fixture
+def statement_budget():
+    """
+    Fail the test when an operation goes over its SQL statement budget.
+
+        with statement_budget("save 20-item report", max_statements=3):
+            await save_report(items)
+    """
+    return sql_tracker.track
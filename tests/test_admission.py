@@ -0,0 +1,139 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from solomia.core import admission, metrics
+from solomia.core.middlewares import AdmissionMiddleware
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_allows_a_burst_then_refills():
+    clock = Clock()
+    limiter = admission.RateLimiter(rate_per_minute=60, burst=2, clock=clock)
+
+    assert [limiter.allow("a") for _ in range(3)] == [True, True, False]
+    assert limiter.allow("b")  # buckets are per key
+    clock.now = 1.0
+    assert limiter.allow("a") and not limiter.allow("a")
+
+
+def test_rate_limiter_forgets_least_recently_seen_keys():
+    limiter = admission.RateLimiter(rate_per_minute=60, burst=1, max_keys=2, clock=Clock())
+    for key in ("a", "b", "c"):
+        assert limiter.allow(key)
+
+    assert limiter.allow("a")  # evicted, starts with a full bucket again
+    assert not limiter.allow("c")
+
+
+@pytest.mark.asyncio
+async def test_budget_rejects_callers_beyond_the_queue():
+    budget = admission.LLMBudget(max_in_flight=1, max_queued=1, max_wait=5)
+    release = asyncio.Event()
+    before = metrics.SHED_REQUESTS.value(reason="llm_queue_full")
+
+    async def call():
+        async with budget.slot():
+            await release.wait()
+
+    running = asyncio.create_task(call())
+    queued = asyncio.create_task(call())
+    await asyncio.sleep(0)
+    assert (budget.in_flight, budget.queued) == (1, 1)
+
+    with pytest.raises(admission.Overloaded) as e:
+        async with budget.slot():
+            pass
+    assert e.value.reason == "llm_queue_full"
+    assert metrics.SHED_REQUESTS.value(reason="llm_queue_full") == before + 1
+
+    release.set()
+    await asyncio.gather(running, queued)
+    assert (budget.in_flight, budget.queued) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_budget_bounds_the_wait_for_a_slot():
+    budget = admission.LLMBudget(max_in_flight=1, max_queued=5, max_wait=0.01)
+
+    async with budget.slot():
+        with pytest.raises(admission.Overloaded) as e:
+            async with budget.slot():
+                pass
+    assert e.value.reason == "llm_wait_timeout"
+    assert budget.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_deferred_jobs_wait_for_a_slot_past_the_limits():
+    budget = admission.LLMBudget(max_in_flight=1, max_queued=0, max_wait=0.01)
+    queue = admission.DeferredQueue(max_queued=1, workers=1)
+    done = asyncio.Event()
+
+    async def job():
+        async with budget.slot():
+            done.set()
+
+    assert not queue.submit(job)  # not started
+    queue.start()
+    try:
+        async with budget.slot():
+            assert queue.submit(job)
+            assert not queue.submit(job)  # full
+            await asyncio.sleep(0.05)  # longer than max_wait: the job is still waiting
+            assert not done.is_set() and budget.queued == 1
+        await asyncio.wait_for(done.wait(), 1)
+    finally:
+        await queue.stop()
+
+
+class FakeMessage:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text):
+        self.answers.append(text)
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_rate_limited_users_and_warns_once():
+    middleware = AdmissionMiddleware(admission.RateLimiter(rate_per_minute=60, burst=1, clock=Clock()))
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    event = FakeMessage()
+    data = {"event_from_user": SimpleNamespace(id=1)}
+    for _ in range(3):
+        await middleware(handler, event, data)
+
+    assert handled == [event]
+    assert event.answers == [AdmissionMiddleware.RATE_LIMITED_TEXT]
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_updates_beyond_the_in_flight_threshold():
+    middleware = AdmissionMiddleware(admission.RateLimiter(rate_per_minute=0), max_in_flight=1)
+    release = asyncio.Event()
+
+    async def handler(event, data):
+        await release.wait()
+
+    first, second = FakeMessage(), FakeMessage()
+    task = asyncio.create_task(middleware(handler, first, {}))
+    await asyncio.sleep(0)
+    await middleware(handler, second, {})
+    release.set()
+    await task
+
+    assert first.answers == [] and second.answers == [AdmissionMiddleware.OVERLOADED_TEXT]
+    assert middleware.in_flight == 0
@@ -0,0 +1,46 @@
+import numpy as np
+
+from solomia.services.ann_index import IVFIndex, vote
+
+
+def clustered(n_categories=50, per_category=200, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_categories, dim))
+    labels = np.repeat(np.arange(n_categories), per_category)
+    vectors = centers[labels] + 0.3 * rng.standard_normal((len(labels), dim))
+    return vectors.astype(np.float32), labels, centers
+
+
+def test_ivf_recall_against_brute_force():
+    vectors, labels, centers = clustered()
+    index = IVFIndex.build(vectors, labels, n_lists=32, n_probe=4)
+    assert index.n_lists == 32 and len(index) == len(vectors)
+
+    rng = np.random.default_rng(1)
+    hits = 0
+    for label in range(len(centers)):
+        query = centers[label] + 0.3 * rng.standard_normal(centers.shape[1])
+        approx, _ = index.search(query, k=10)
+        exact, _ = index.exact_search(query, k=10)
+        hits += vote(approx, np.ones(len(approx)))[0] == vote(exact, np.ones(len(exact)))[0]
+    assert hits / len(centers) >= 0.95
+
+
+def test_incremental_insert_is_searchable_and_merged():
+    vectors, labels, _ = clustered(n_categories=5, per_category=8, dim=8)
+    index = IVFIndex.build(vectors, labels, n_lists=4)
+    index.merge_threshold = 2
+
+    new = np.ones(8, dtype=np.float32) * 10
+    index.add(new, 99)
+    assert index.search(new, k=1)[0].tolist() == [99]
+
+    index.add(-new, 98)  # reaches the threshold and merges into the lists
+    assert len(index._pending_labels) == 0 and len(index) == len(vectors) + 2
+    assert index.search(-new, k=1)[0].tolist() == [98]
+
+
+def test_vote_is_similarity_weighted():
+    label, score = vote(np.array([1, 2, 2]), np.array([0.9, 0.5, 0.5]))
+    assert (label, score) == (2, 0.5)
+    assert vote(np.array([], dtype=int), np.array([])) == (None, -1.0)
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from scripts.evaluate_cascade import evaluate
+from solomia.services import cascade, category_service
+from solomia.services.category_index import CategoryIndex
+
+ROWS = [
+    {"id": 1, "name": "Молочні продукти", "examples": ["Молоко 2,5%"], "embedding": "[1, 0, 0]"},
+    {"id": 2, "name": "Крупи / Зернові", "examples": ["гречка"], "embedding": "[0.8, 0.6, 0]"},
+    {"id": 3, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": "[0, 0, 1]"},
+]
+VECTORS = {
+    "кефір": [1, 0.05, 0],        # close to dairy, far from cereals
+    "йогурт з вівсянкою": [0.95, 0.3, 0],  # close to both: small margin
+}
+
+
+async def embedder(text):
+    return np.array(VECTORS[text], dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_cascade_stages():
+    index = CategoryIndex.from_rows(ROWS)
+    config = cascade.CascadeConfig(min_score=0.75, min_margin=0.05)
+
+    assert (await cascade.decide("гречка", index, embedder, config)).source == "exact"
+    lexical = await cascade.decide("2,5% молоко", index, embedder, config)
+    assert (lexical.category, lexical.source) == ("Молочні продукти", "lexical")
+
+    confident = await cascade.decide("кефір", index, embedder, config)
+    assert (confident.category, confident.source) == ("Молочні продукти", "embedding")
+
+    ambiguous = await cascade.decide("йогурт з вівсянкою", index, embedder, config)
+    assert ambiguous.score > 0.75 and ambiguous.margin < 0.05
+    assert ambiguous.source == "llm" and not ambiguous.resolved
+
+
+@pytest.mark.asyncio
+async def test_evaluate_reports_llm_rate_per_setting(monkeypatch):
+    class Repo:
+        async def get_all_with_embeddings(self):
+            return ROWS
+
+        async def get_example_embeddings(self):
+            return []
+
+    monkeypatch.setattr(category_service, "repo", Repo())
+    monkeypatch.setattr("scripts.evaluate_cascade.get_embedding", embedder)
+    category_service.invalidate_index()
+
+    labeled = [("кефір", "Молочні продукти"), ("йогурт з вівсянкою", "Молочні продукти")]
+    loose, strict = await evaluate(
+        labeled,
+        [cascade.CascadeConfig(min_margin=0.0), cascade.CascadeConfig(min_margin=0.05)],
+        llm_latency_ms=2000, llm_accuracy=1.0,
+    )
+
+    assert (loose["llm_rate"], loose["local_accuracy"]) == (0.0, 1.0)
+    assert (strict["llm_rate"], strict["sources"]) == (0.5, {"embedding": 1, "llm": 1})
+    assert strict["expected_ms"] > loose["expected_ms"]
+    category_service.invalidate_index()
+
+
+@pytest.mark.asyncio
+async def test_nearest_example_ranking_gives_a_non_negative_margin():
+    # "Крупи / Зернові" wins the vote with two fair neighbours, "Молочні продукти" has the closest one
+    examples = [
+        {"category_id": 1, "embedding": "[1, 0, 0]"},
+        {"category_id": 2, "embedding": "[0.8, 0.6, 0]"},
+        {"category_id": 2, "embedding": "[0.8, -0.6, 0]"},
+    ]
+    index = CategoryIndex.from_rows(ROWS, examples)
+
+    top = index.search_top(np.array([1, 0.05, 0]), k=2)
+    assert [name for name, _ in top] == ["Молочні продукти", "Крупи / Зернові"]
+    assert top[0][1] > top[1][1]
+
+    decision = await cascade.decide("кефір", index, embedder, cascade.CascadeConfig(min_score=0.75, min_margin=0.05))
+    assert decision.margin > 0.05 and decision.source == "embedding"
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from benchmarks.synthetic import fake_gemini
+from solomia.services import cassette, gemini
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A cassette recorded against the fake SDK: one generation, one embedding, one batch embedding."""
+    path = str(tmp_path / "tapes" / "gemini.jsonl")
+
+    async def record():
+        with fake_gemini(), cassette.use(cassette.Cassette(path, mode="record")):
+            return (
+                await gemini.generate("Categories:\n1: Category k00001\nProducts:\n1: k00001 oats"),
+                await gemini.embed("k00001 oats"),
+                await gemini.embed_many(["a", "b"]),
+            )
+
+    return path, record
+
+
+@pytest.mark.asyncio
+async def test_replay_answers_recorded_calls_without_the_sdk(recorded, monkeypatch):
+    path, record = recorded
+    originals = await record()
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.setattr(gemini, "genai", None)  # any SDK access would fail
+
+    with cassette.use(cassette.Cassette(path, latency="none")) as tape:
+        assert gemini.has_credentials()
+        replayed = (
+            await gemini.generate("Categories:\n1: Category k00001\nProducts:\n1: k00001 oats"),
+            await gemini.embed("k00001 oats"),
+            await gemini.embed_many(["a", "b"]),
+        )
+        with pytest.raises(cassette.CassetteMiss):
+            await gemini.embed("never recorded")
+
+    assert len(tape) == 3
+    assert replayed == originals
+
+
+@pytest.mark.asyncio
+async def test_replay_sleeps_the_recorded_latency_with_jitter(tmp_path, monkeypatch):
+    path = tmp_path / "gemini.jsonl"
+    tape = cassette.Cassette(str(path), mode="record")
+    for latency in (0.5, 1.5):
+        tape.record("embed", {"content": "x"}, latency, result={"embedding": [1.0]})
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(cassette.asyncio, "sleep", fake_sleep)
+
+    replay = cassette.Cassette(str(path), jitter=0.2, seed=1)
+    for _ in range(4):
+        await replay.replay("embed", {"content": "x"})
+    again = cassette.Cassette(str(path), jitter=0.2, seed=1)
+    for _ in range(4):
+        await again.replay("embed", {"content": "x"})
+
+    # repeated recordings are replayed in turn, each with its own latency ±20%
+    assert 0.4 <= sleeps[0] <= 0.6 and 1.2 <= sleeps[1] <= 1.8 and 0.4 <= sleeps[2] <= 0.6
+    assert sleeps[:4] == sleeps[4:]  # deterministic for a seed
+
+
+@pytest.mark.asyncio
+async def test_replay_injects_and_replays_errors(tmp_path):
+    path = tmp_path / "gemini.jsonl"
+    tape = cassette.Cassette(str(path), mode="record")
+    tape.record("generate", {"prompt": "ok"}, 0.1, result=type("R", (), {"text": "[]", "usage_metadata": None})())
+    tape.record("generate", {"prompt": "quota"}, 0.1, error=RuntimeError("429 Resource exhausted"))
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[1])["error"]["type"] == "RuntimeError"
+
+    flaky = cassette.Cassette(str(path), latency="none", error_rate=1.0)
+    with pytest.raises(cassette.InjectedError):
+        await flaky.replay("generate", {"prompt": "ok"})
+
+    replay = cassette.Cassette(str(path), latency="none")
+    assert (await replay.replay("generate", {"prompt": "ok"})).text == "[]"
+    with pytest.raises(cassette.RecordedError, match="429 Resource exhausted"):
+        await replay.replay("generate", {"prompt": "quota"})
@@ -1,28 +1,110 @@
 import pytest
 import numpy as np
+from solomia.services import category_service
 from solomia.services.category_service import find_best_category
 
+
+class MockRepo:
+    def __init__(self, categories, examples=()):
+        self.categories = categories
+        self.examples = list(examples)
+
+    async def get_all_with_embeddings(self):
+        return self.categories
+
+    async def get_example_embeddings(self):
+        return self.examples
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    category_service.invalidate_index()
+    yield
+    category_service.invalidate_index()
+
+
 @pytest.mark.asyncio
-async def test_find_best_category():
+async def test_find_best_category(monkeypatch):
 
     mock_categories = [
         {"id": 1, "name": "Бобові", "embedding": str([1, 0, 0])},
         {"id": 2, "name": "Фрукти / Ягоди", "embedding": str([0, 1, 0])},
     ]
-
-    class MockConn:
-        async def execute(self, _):
-            class MockRes:
-                async def mappings(self_inner):
-                    for row in mock_categories:
-                        yield row
-            return MockRes()
-
+    monkeypatch.setattr(category_service, "repo", MockRepo(mock_categories))
 
     async def fake_embedder(text):
         return np.array([0.9, 0.1, 0])
 
-    category, score = await find_best_category(MockConn(), "сочевиця", embedder=fake_embedder)
+    category, score, is_known = await find_best_category(None, "сочевиця", embedder=fake_embedder)
 
     assert category == "Бобові"
     assert score > 0.5
+    assert is_known
+
+
+@pytest.mark.asyncio
+async def test_find_best_category_exact_example(monkeypatch):
+    repo = MockRepo([{"id": 1, "name": "Бобові", "examples": ["квасоля", "нут"], "embedding": str([1, 0, 0])}])
+    monkeypatch.setattr(category_service, "repo", repo)
+
+    async def failing_embedder(text):
+        raise AssertionError("exact example match must not embed")
+
+    category, score, is_known = await find_best_category(None, "нут", embedder=failing_embedder)
+
+    assert (category, score, is_known) == ("Бобові", 1.0, True)
+
+
+@pytest.mark.asyncio
+async def test_find_best_category_votes_over_example_embeddings(monkeypatch):
+    # The centroid of "Фрукти / Ягоди" is closer, but two learned examples of "Бобові" are nearest
+    categories = [
+        {"id": 1, "name": "Бобові", "embedding": str([1, 0, 0])},
+        {"id": 2, "name": "Фрукти / Ягоди", "embedding": str([0.2, 1, 0])},
+    ]
+    examples = [
+        {"category_id": 1, "embedding": str([0.3, 1, 0.1])},
+        {"category_id": 1, "embedding": str([0.3, 1, -0.1])},
+        {"category_id": 2, "embedding": str([0, 0, 1])},
+    ]
+    monkeypatch.setattr(category_service, "repo", MockRepo(categories, examples))
+
+    async def fake_embedder(text):
+        return np.array([0.3, 1, 0])
+
+    category, score, is_known = await find_best_category(None, "горох", embedder=fake_embedder)
+
+    assert category == "Бобові"
+    assert score > 0.99
+    assert is_known
+
+
+@pytest.mark.asyncio
+async def test_classify_products_embeds_misses_in_batches(monkeypatch):
+    repo = MockRepo([
+        {"id": 1, "name": "Бобові", "examples": ["нут"], "embedding": str([1, 0, 0])},
+        {"id": 2, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": str([0, 1, 0])},
+    ])
+    monkeypatch.setattr(category_service, "repo", repo)
+    monkeypatch.setattr(category_service, "PREFETCH_CHUNK", 2)
+    monkeypatch.setattr(category_service, "_embedding_cache", category_service.OrderedDict())
+    batches = []
+
+    async def embed_many(texts, task_type="retrieval_query"):
+        batches.append(list(texts))
+        return [[1, 0.1, 0] if "сочевиця" in text else [0.1, 1, 0] for text in texts]
+
+    async def embed(text, task_type="retrieval_query"):
+        raise AssertionError("bulk classification must not embed one product at a time")
+
+    monkeypatch.setattr(category_service.gemini, "embed_many", embed_many)
+    monkeypatch.setattr(category_service.gemini, "embed", embed)
+
+    result = await category_service.classify_products(
+        ["нут", "червона сочевиця", "груша", "нут", "зелена сочевиця"], use_llm=False
+    )
+
+    # known examples are not embedded; the rest go in chunks of PREFETCH_CHUNK
+    assert batches == [["червона сочевиця"], ["груша", "зелена сочевиця"]]
+    assert result == {"нут": "Бобові", "червона сочевиця": "Бобові", "груша": "Фрукти / Ягоди",
+                      "зелена сочевиця": "Бобові"}
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from solomia.services.category_index import CategoryIndex, parse_vector
+
+
+ROWS = [
+    {"id": 1, "name": "Бобові", "examples": ["нут"], "embedding": "[1, 0, 0]"},
+    {"id": 2, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": "[0, 2, 0]"},
+    {"id": 3, "name": "Без вектора", "examples": [], "embedding": None},
+]
+
+
+def test_parse_vector_from_pgvector_text():
+    assert parse_vector("[0.5, -1.25,3]").tolist() == [0.5, -1.25, 3.0]
+
+
+def test_search_exact_and_name_cache():
+    index = CategoryIndex.from_rows(ROWS)
+
+    name, score = index.search(np.array([0.1, 0.9, 0]))
+    assert name == "Фрукти / Ягоди"
+    assert 0.99 < score <= 1.0
+    assert index.by_example("нут") == (1, "Бобові")
+    assert index.id_by_name(" Без вектора ") == 3
+
+
+def test_in_place_updates():
+    index = CategoryIndex.from_rows(ROWS)
+
+    index.add_example(1, "сочевиця")
+    index.set_embedding(3, [0, 0, 5])
+
+    assert index.by_example("сочевиця") == (1, "Бобові")
+    assert index.search([0, 0, 1]) == ("Без вектора", 1.0)
+
+
+def test_snapshot_roundtrip_is_memory_mapped(tmp_path):
+    index = CategoryIndex.from_rows(ROWS)
+    index.version = "3-abc"
+    index.save(tmp_path)
+
+    snapshot = CategoryIndex.open(tmp_path, verify=True)
+
+    assert isinstance(snapshot.matrix, np.memmap)
+    assert snapshot.version == "3-abc"
+    assert snapshot.search([0, 1, 0]) == ("Фрукти / Ягоди", 1.0)
+    assert snapshot.by_example("нут") == (1, "Бобові")
+
+    snapshot.set_embedding(3, [0, 0, 1])  # copy-on-write, the file is untouched
+    assert CategoryIndex.open(tmp_path, verify=True).search([0, 0, 1])[1] == 0.0
+
+
+def test_snapshot_checksum_mismatch(tmp_path):
+    CategoryIndex.from_rows(ROWS).save(tmp_path)
+    matrix_file = next(tmp_path.glob("*.matrix.npy"))
+    data = bytearray(matrix_file.read_bytes())
+    data[-1] ^= 0xFF
+    matrix_file.write_bytes(bytes(data))
+
+    assert CategoryIndex.open(tmp_path) is not None
+    assert CategoryIndex.open(tmp_path, verify=True) is None
+
+
+@pytest.mark.asyncio
+async def test_get_index_rebuilds_stale_snapshot(tmp_path, monkeypatch):
+    from solomia.services import category_service
+
+    class VersionedRepo:
+        def __init__(self):
+            self.version = "v1"
+            self.full_loads = 0
+
+        async def get_table_version(self):
+            return self.version
+
+        async def get_all_with_embeddings(self):
+            self.full_loads += 1
+            return ROWS
+
+        async def get_example_embeddings(self):
+            return []
+
+    repo = VersionedRepo()
+    monkeypatch.setattr(category_service, "repo", repo)
+    monkeypatch.setattr(category_service, "CATEGORY_SNAPSHOT_DIR", str(tmp_path))
+    category_service.invalidate_index()
+
+    assert (await category_service.get_index()).version == "v1"
+    category_service.invalidate_index()  # a fresh worker maps the snapshot instead of loading
+    assert (await category_service.get_index()).version == "v1"
+    assert repo.full_loads == 1
+
+    repo.version = "v2"
+    index = await category_service.get_index(refresh=True)
+    assert index.version == "v2" and isinstance(index.matrix, np.memmap)
+    assert repo.full_loads == 2
+    category_service.invalidate_index()
+
+
+def test_snapshot_keeps_example_index(tmp_path):
+    examples = [{"category_id": 1, "embedding": "[0, 1, 0]"}, {"category_id": 2, "embedding": "[1, 0, 0]"}]
+    index = CategoryIndex.from_rows(ROWS, examples)
+    index.add_example(3, "щось", [0, 0, 1])
+    index.save(tmp_path)
+
+    snapshot = CategoryIndex.open(tmp_path)
+
+    assert len(snapshot.ann) == 3 and isinstance(snapshot.ann.vectors, np.memmap)
+    assert snapshot.search([0.1, 1, 0]) == ("Бобові", pytest.approx(0.995, abs=1e-3))
+    assert snapshot.search([0, 0, 1])[0] == "Без вектора"
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from solomia.services import embedding_codec, gemini
+from solomia.services.category_index import CategoryIndex
+
+
+def test_fit_truncates_and_renormalizes():
+    vector = np.array([3.0, 4.0, 12.0])
+
+    np.testing.assert_allclose(embedding_codec.fit(vector, 2), [0.6, 0.8])
+    np.testing.assert_allclose(embedding_codec.fit(np.stack([vector, -vector]), 2), [[0.6, 0.8], [-0.6, -0.8]])
+    assert embedding_codec.fit(vector, 0).tolist() == [3.0, 4.0, 12.0]
+    assert embedding_codec.fit(vector, 5).dtype == np.float32
+
+
+@pytest.mark.parametrize("storage, tolerance", [("vector", 1e-6), ("float16", 1e-3), ("int8", 1 / 127)])
+def test_encode_decode_roundtrip(storage, tolerance):
+    vector = np.random.default_rng(0).uniform(-1, 1, 256).astype(np.float32)
+
+    encoded = embedding_codec.encode(vector, storage)
+    decoded = embedding_codec.decode(*encoded)
+
+    assert decoded.dtype == np.float32 and decoded.shape == (256,)
+    assert np.abs(decoded - vector).max() <= tolerance * np.abs(vector).max()
+    if storage != "vector":
+        assert encoded.embedding is None and len(encoded.codes) == 256 * (2 if storage == "float16" else 1)
+
+
+def test_int8_scales_are_per_row_and_zero_rows_survive():
+    codes, scales = embedding_codec.quantize([[0.5, -1.0], [0.0, 0.0]], "int8")
+
+    assert codes.tolist() == [[64, -127], [0, 0]]
+    np.testing.assert_allclose(embedding_codec.dequantize(codes, scales), [[0.5039, -1.0], [0.0, 0.0]], atol=1e-4)
+    with pytest.raises(ValueError):
+        embedding_codec.encode([1.0], "bfloat16")
+
+
+def test_index_mixes_storage_formats_and_sizes():
+    int8 = embedding_codec.encode([0.0, 1.0], "int8")
+    rows = [
+        {"id": 1, "name": "Бобові", "examples": ["нут"], "embedding": "[1, 0, 0.5]"},
+        {"id": 2, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": None,
+         "embedding_codes": int8.codes, "embedding_scale": int8.scale},
+    ]
+
+    index = CategoryIndex.from_rows(rows)
+
+    assert index.matrix.shape == (2, 2)
+    name, score = index.search([0.1, 0.9, 0.3])  # a full-size query is cut to the index size
+    assert name == "Фрукти / Ягоди" and score == pytest.approx(0.994, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_embed_asks_for_reduced_dimensions(monkeypatch):
+    requests = []
+
+    async def fake_call(operation, fn, request, **attributes):
+        requests.append(request)
+        return {"embedding": [3.0, 4.0, 12.0]}  # a model that ignores output_dimensionality
+
+    monkeypatch.setattr(gemini, "_configure", lambda: None)
+    monkeypatch.setattr(gemini, "_call", fake_call)
+
+    assert await gemini.embed("гречка", dim=2) == pytest.approx([0.6, 0.8])
+    assert await gemini.embed("гречка", dim=0) == [3.0, 4.0, 12.0]
+    assert requests[0]["output_dimensionality"] == 2 and "output_dimensionality" not in requests[1]
+
+
+def test_shorter_queries_and_examples_shrink_a_full_size_index():
+    rng = np.random.default_rng(0)
+    full = rng.standard_normal((2, 768)).astype(np.float32)
+    rows = [
+        {"id": 1, "name": "Бобові", "examples": ["нут"], "embedding": full[0].tolist()},
+        {"id": 2, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": full[1].tolist()},
+    ]
+    example_rows = [{"category_id": 1, "embedding": full[0].tolist()}, {"category_id": 2, "embedding": full[1].tolist()}]
+    index = CategoryIndex.from_rows(rows, example_rows)
+
+    # re-embedding at EMBEDDING_DIM=256 has started: queries and new examples are 256-d prefixes
+    name, score = index.search(embedding_codec.fit(full[1], 256))
+    assert name == "Фрукти / Ягоди" and score == pytest.approx(1.0, abs=1e-5)
+    assert index.matrix.shape == (2, 256) and index.ann.dim == 256
+
+    index.add_example(1, "сочевиця", embedding_codec.fit(full[0] + 0.1 * full[1], 256))
+    index.set_embedding(2, embedding_codec.fit(full[1], 256))
+    assert len(index.ann) == 3
+    assert index.search(full[0])[0] == "Бобові"  # a full-size query is cut to the new size
@@ -0,0 +1,196 @@
+import argparse
+import csv
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from scripts import food_logs
+from solomia.core import partitions
+from solomia.repository.log_repository import LogRepository
+from solomia.repository.records import LogRecord
+from solomia.services import category_service
+from solomia.services.category_index import CategoryIndex
+
+ROWS = [
+    {"id": 1, "name": "Молочні продукти", "examples": ["кефір"], "embedding": "[1, 0]"},
+    {"id": 2, "name": "Крупи / Зернові", "examples": ["гречка"], "embedding": "[0, 1]"},
+]
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    calls = {"users": 0, "classified": []}
+
+    class Users:
+        def __init__(self, session_factory):
+            pass
+
+        async def get_ids_by_telegram_ids(self, telegram_ids):
+            calls["users"] += 1
+            return {t: f"uuid-{t}" for t in telegram_ids if t != "404"}
+
+    async def classify_products(names, use_llm=True):
+        calls["classified"].append(list(names))
+        return {name: {"кефір": "Молочні продукти", "гречка": "Крупи / Зернові"}.get(name) for name in names}
+
+    async def get_index():
+        return CategoryIndex.from_rows(ROWS)
+
+    monkeypatch.setattr(food_logs, "UserRepository", Users)
+    monkeypatch.setattr(food_logs, "get_session_factory", lambda: None)
+    monkeypatch.setattr(category_service, "classify_products", classify_products)
+    monkeypatch.setattr(category_service, "get_index", get_index)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_import_rows_are_classified_once_and_resolved_in_bulk(tmp_path, fakes):
+    path = tmp_path / "tracker.csv"
+    path.write_text(
+        "Date,Food,Grams,telegram_id\n"
+        "01.02.2024,Кефір,200,1\n"
+        "01.02.2024,гречка,\"80,5\",1\n"
+        "02.02.2024,кефір,,2\n"
+        "not a date,кефір,100,1\n"
+        "03.02.2024,невідоме,50,404\n",
+        encoding="utf-8",
+    )
+    args = argparse.Namespace(telegram_id=None, date_column="Date", product_column="Food", amount_column="Grams",
+                              date_format="%d.%m.%Y", no_llm=True)
+    stats = {"rows": 0, "skipped": 0, "unknown_users": 0, "products": 0}
+
+    batches = [b async for b in food_logs.prepare_batches(food_logs.read_rows(str(path), "csv", 2), args, stats)]
+
+    assert [len(b) for b in batches] == [2, 1, 0]
+    assert batches[0] == [
+        ("uuid-1", date(2024, 2, 1), "кефір", 200.0, 1),
+        ("uuid-1", date(2024, 2, 1), "гречка", 80.5, 2),
+    ]
+    assert batches[1] == [("uuid-2", date(2024, 2, 2), "кефір", None, 1)]
+    assert stats == {"rows": 3, "skipped": 1, "unknown_users": 1, "products": 3}
+    # every distinct product is classified once across batches
+    assert fakes["classified"] == [["кефір", "гречка"], ["невідоме"]]
+
+
+@pytest.mark.asyncio
+async def test_export_writes_streamed_batches(tmp_path, monkeypatch):
+    class Logs:
+        def __init__(self, session_factory, read_session_factory=None):
+            pass
+
+        async def stream_logs(self, start, end, user_id=None, batch_size=5000):
+            for i in range(3):
+                yield [LogRecord("1", date(2024, 1, i + 1), "кефір", 200.0, 1, "Молочні продукти")]
+
+    monkeypatch.setattr(food_logs, "LogRepository", Logs)
+    monkeypatch.setattr(food_logs, "get_session_factory", lambda: None)
+    monkeypatch.setattr(food_logs, "get_read_session_factory", lambda: None)
+    path = tmp_path / "out.csv"
+
+    rows = await food_logs.export_logs(str(path), "csv", date.min, date.max)
+
+    with open(path, encoding="utf-8") as f:
+        exported = list(csv.DictReader(f))
+    assert rows == 3 and [r["date"] for r in exported] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+class Session:
+    """Records the isolation level each statement runs under; AUTOCOMMIT means no transaction."""
+
+    def __init__(self, log):
+        self.log = log
+        self.isolation_level = "AUTOCOMMIT"
+        self.copied = []
+
+    async def connection(self, execution_options=None):
+        if execution_options:
+            self.isolation_level = execution_options["isolation_level"]
+        session = self
+
+        class Raw:
+            async def copy_records_to_table(self, table, records, columns):
+                session.log.append(("COPY " + table, session.isolation_level))
+
+        class Connection:
+            async def get_raw_connection(self):
+                return SimpleNamespace(driver_connection=Raw())
+
+        return Connection()
+
+    async def execute(self, statement, params=None):
+        self.log.append((" ".join(str(statement).split())[:20], self.isolation_level))
+        return SimpleNamespace(all=lambda: [(date(2024, 2, 1),)], rowcount=1)
+
+    async def stream(self, statement, params=None):
+        self.log.append(("SELECT (cursor)", self.isolation_level))
+
+        async def partitions(size):
+            yield [("1", date(2024, 1, 1), "кефір", 200.0, 1, "Молочні продукти")]
+
+        return SimpleNamespace(partitions=partitions)
+
+    async def commit(self):
+        self.log.append(("COMMIT", self.isolation_level))
+
+
+@pytest.fixture
+def session_log(monkeypatch):
+    log = []
+
+    @asynccontextmanager
+    async def factory():
+        yield Session(log)
+
+    async def ensure_months(session, months):
+        await session.execute("CREATE TABLE partitions")
+
+    monkeypatch.setattr(partitions, "ensure_months", ensure_months)
+    return LogRepository(factory), log
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_and_export_run_inside_a_transaction(session_log):
+    repo, log = session_log
+
+    assert await repo.bulk_import([("uuid-1", date(2024, 2, 1), "кефір", 200.0, 1)]) == (1, 1)
+    assert [b async for b in repo.stream_logs(date.min, date.max)][0][0].product_name == "кефір"
+
+    # the temp table, COPY and cursor only work inside a transaction, which commits last
+    assert [sql for sql, _ in log][:2] == ["CREATE TEMP TABLE im", "COPY import_logs"]
+    assert {isolation for _, isolation in log} == {"READ COMMITTED"}
+    assert [sql for sql, _ in log].count("COMMIT") == 2 and log[-1][0] == "COMMIT"
+
+
+@pytest.mark.asyncio
+async def test_import_classifies_each_batch_before_its_transaction(tmp_path, fakes, monkeypatch):
+    events = []
+
+    class Logs:
+        def __init__(self, session_factory):
+            pass
+
+        async def bulk_import(self, rows):
+            events.append(("import", len(rows)))
+            return 1, len(rows)
+
+    original = food_logs.category_service.classify_products
+
+    async def classify_products(names, use_llm=True):
+        events.append(("classify", len(names)))
+        return await original(names, use_llm)
+
+    monkeypatch.setattr(food_logs, "LogRepository", Logs)
+    monkeypatch.setattr(food_logs.category_service, "classify_products", classify_products)
+    path = tmp_path / "tracker.csv"
+    path.write_text("date,product_name,amount_grams\n2024-02-01,кефір,200\n2024-02-01,гречка,80\n2024-02-02,кефір,\n",
+                    encoding="utf-8")
+    args = argparse.Namespace(path=str(path), format=None, batch_size=2, telegram_id="1", date_column="date",
+                              product_column="product_name", amount_column="amount_grams", date_format=None,
+                              no_llm=True)
+
+    result = await food_logs.import_logs(args)
+
+    assert events == [("classify", 2), ("import", 2), ("import", 1)]
+    assert (result["reports_created"], result["items_inserted"]) == (2, 3)
@@ -0,0 +1,153 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from solomia.core.fsm_storage import PostgresStorage
+from solomia.repository.fsm_repository import FsmStateRepository
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+class PlanEntry(StatesGroup):
+    grams = State()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Repo:
+    """fsm_states as a dict, counting round trips."""
+
+    def __init__(self):
+        self.rows = {}
+        self.reads = 0
+        self.flushes = []
+        self.fail = False
+
+    async def get_state(self, key):
+        self.reads += 1
+        return self.rows.get(key)
+
+    async def save_states(self, states):
+        if self.fail:
+            raise ConnectionError("database is down")
+        self.flushes.append(dict(states))
+        for key, (state, data) in states.items():
+            if state is None and not data:
+                self.rows.pop(key, None)
+            else:
+                self.rows[key] = (state, data)
+
+
+@pytest.mark.asyncio
+async def test_reads_are_cached_and_writes_flushed_in_one_batch():
+    repo = Repo()
+    storage = PostgresStorage(repo, flush_interval=60)
+
+    assert await storage.get_state(KEY) is None
+    await storage.set_state(KEY, PlanEntry.grams)
+    await storage.update_data(KEY, {"category": "Крупи / Зернові"})
+    await storage.set_state(StorageKey(bot_id=1, chat_id=20, user_id=20), "other")
+
+    assert await storage.get_state(KEY) == "PlanEntry:grams"
+    assert repo.reads == 2 and repo.rows == {}  # one miss per key, nothing written yet
+
+    assert await storage.flush() == 2
+    assert len(repo.flushes) == 1
+    assert repo.rows["fsm:10:10:default"] == ("PlanEntry:grams", {"category": "Крупи / Зернові"})
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_state_survives_a_restart_and_cleared_state_is_deleted():
+    repo = Repo()
+    first = PostgresStorage(repo, flush_interval=60)
+    await first.set_state(KEY, PlanEntry.grams)
+    await first.set_data(KEY, {"grams": 40})
+    await first.close()
+
+    second = PostgresStorage(repo, flush_interval=60)
+    assert await second.get_state(KEY) == "PlanEntry:grams"
+    assert await second.get_data(KEY) == {"grams": 40}
+
+    await second.set_state(KEY, None)
+    await second.set_data(KEY, {})
+    await second.close()
+    assert repo.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_but_pending_writes_do_not():
+    repo, clock = Repo(), Clock()
+    storage = PostgresStorage(repo, cache_ttl=5, flush_interval=60, clock=clock)
+    await storage.get_state(KEY)
+    repo.rows["fsm:10:10:default"] = ("PlanEntry:grams", {})  # written by another worker
+
+    assert await storage.get_state(KEY) is None
+    clock.now = 10
+    assert await storage.get_state(KEY) == "PlanEntry:grams"
+
+    await storage.set_state(KEY, "done")
+    clock.now = 100
+    reads = repo.reads
+    assert await storage.get_state(KEY) == "done" and repo.reads == reads
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_runs_in_the_background_and_retries_after_a_failure():
+    repo = Repo()
+    storage = PostgresStorage(repo, flush_interval=0.01, flush_batch=2)
+    repo.fail = True
+    await storage.set_state(KEY, "first")
+    await asyncio.sleep(0.05)
+    assert repo.rows == {}
+
+    repo.fail = False
+    await storage.set_state(KEY, "second")
+    await asyncio.sleep(0.05)
+    assert repo.rows["fsm:10:10:default"] == ("second", {})
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_get_data_returns_a_copy():
+    storage = PostgresStorage(Repo(), flush_interval=60)
+    await storage.set_data(KEY, {"items": ["гречка"]})
+    (await storage.get_data(KEY))["items"].append("кефір")
+
+    assert await storage.get_data(KEY) == {"items": ["гречка"]}
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_save_states_upserts_and_deletes_in_one_transaction():
+    log = []
+
+    class Session:
+        isolation_level = "AUTOCOMMIT"
+
+        async def connection(self, execution_options=None):
+            self.isolation_level = execution_options["isolation_level"]
+
+        async def execute(self, statement, params=None):
+            log.append((str(statement).split()[0], self.isolation_level))
+
+        async def commit(self):
+            log.append(("COMMIT", self.isolation_level))
+
+    @asynccontextmanager
+    async def factory():
+        yield Session()
+
+    await FsmStateRepository(factory).save_states({"a": ("PlanEntry:grams", {}), "b": (None, {})})
+
+    assert log == [("INSERT", "READ COMMITTED"), ("DELETE", "READ COMMITTED"), ("COMMIT", "READ COMMITTED")]
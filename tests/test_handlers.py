@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+
+from solomia.core import handlers
+from solomia.services.llm_output import LLMOutputError
+
+
+class Users:
+    def __init__(self):
+        self.ids = {}
+
+    async def register_user(self, telegram_id, name):
+        if telegram_id in self.ids:
+            return False
+        self.ids[telegram_id] = f"uuid-{telegram_id}"
+        return True
+
+    async def get_id_by_telegram_id(self, telegram_id):
+        return self.ids.get(telegram_id)
+
+
+class Message:
+    def __init__(self, text):
+        self.text = text
+        self.from_user = SimpleNamespace(id=42, full_name="Олена")
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+@pytest.mark.asyncio
+async def test_start_registers_the_user_once_and_unlocks_reports(monkeypatch):
+    container = SimpleNamespace(user_repo=Users(), report_repo=object())
+    saved = []
+
+    async def process_report(text):
+        return [{"product_name": "кефір", "amount_grams": 200.0, "category": "Молочні продукти"}]
+
+    async def save_report(products, telegram_id, user_repo, report_repo):
+        assert (user_repo, report_repo) == (container.user_repo, container.report_repo)
+        saved.append(telegram_id)
+
+    monkeypatch.setattr(handlers.report_pipeline, "process_report", process_report)
+    monkeypatch.setattr(handlers.report_pipeline, "save_report", save_report)
+
+    first, again, report = Message("/start"), Message("/start"), Message("200 г кефіру")
+    await handlers.cmd_start(first, container)
+    await handlers.cmd_start(again, container)
+    await handlers.on_report(report, container)
+
+    assert first.answers[0].startswith("Привіт!") and again.answers[0].startswith("З поверненням!")
+    assert saved == ["42"] and report.answers[0].startswith("✅ Записала:")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failing", ["process_report", "save_report"])
+async def test_report_errors_are_answered_and_reraised(monkeypatch, failing):
+    container = SimpleNamespace(user_repo=Users(), report_repo=object())
+    container.user_repo.ids["42"] = "uuid-42"
+
+    async def process_report(text):
+        if failing == "process_report":
+            raise LLMOutputError("$: expected array, got str")
+        return []
+
+    async def save_report(products, telegram_id, user_repo, report_repo):
+        raise ConnectionError("database is down")
+
+    monkeypatch.setattr(handlers.report_pipeline, "process_report", process_report)
+    monkeypatch.setattr(handlers.report_pipeline, "save_report", save_report)
+
+    message = Message("200 г кефіру")
+    with pytest.raises((LLMOutputError, ConnectionError)):
+        await handlers.on_report(message, container)
+
+    assert message.answers == [handlers.REPORT_FAILED_TEXT]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("deferred", [False, True])
+async def test_report_stages_are_timed_on_direct_and_deferred_paths(monkeypatch, deferred):
+    container = SimpleNamespace(user_repo=Users(), report_repo=object())
+    container.user_repo.ids["42"] = "uuid-42"
+    overloaded, jobs = [deferred], []
+
+    async def parse_report_with_llm(text):
+        if overloaded and overloaded.pop():
+            raise handlers.admission.Overloaded("llm_queue_full")
+        return [{"product_name": "кефір", "amount_grams": 200.0}]
+
+    async def classify_report(products):
+        return [{**p, "category": "Молочні продукти"} for p in products]
+
+    async def save_report(products, telegram_id, user_repo, report_repo):
+        pass
+
+    monkeypatch.setattr(handlers.report_pipeline, "REPORT_PIPELINE", "two_step")
+    monkeypatch.setattr(handlers.report_pipeline, "parse_report_with_llm", parse_report_with_llm)
+    monkeypatch.setattr(handlers.report_pipeline, "classify_report", classify_report)
+    monkeypatch.setattr(handlers.report_pipeline, "save_report", save_report)
+    monkeypatch.setattr(handlers.admission.deferred, "submit", lambda job: jobs.append(job) or True)
+
+    stages = ("parse", "classify", "save")
+    before = {s: handlers.metrics.STAGE_LATENCY.count(stage=s) for s in stages}
+    message = Message("200 г кефіру")
+    await handlers.on_report(message, container)
+    for job in jobs:
+        await job()
+
+    assert len(jobs) == int(deferred) and message.answers[-1].startswith("✅ Записала:")
+    # The shed first attempt is timed too, then the deferred job runs every stage once
+    timed = {s: handlers.metrics.STAGE_LATENCY.count(stage=s) - before[s] for s in stages}
+    assert timed == {"parse": 1 + deferred, "classify": 1, "save": 1}
@@ -0,0 +1,67 @@
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from solomia.repository.records import HistoryReport, RollupRow
+from solomia.services import history
+
+USER = "u1"
+REPORTS = [
+    HistoryReport(uuid.UUID(int=i), date(2025, 1, 1) + timedelta(days=i // 2), None,
+                  [{"product_name": "гречка", "amount_grams": 100.0, "category_id": 2}])
+    for i in range(25)  # two reports on most days: the id breaks the tie
+]
+
+
+class Repo:
+    """Keyset semantics of ReportRepository.get_history_page over an in-memory table."""
+
+    def __init__(self):
+        self.queries = []
+
+    async def get_history_page(self, user_id, start, end, after=None, limit=10):
+        self.queries.append(after)
+        rows = sorted(
+            (r for r in REPORTS if start <= r.date <= end and (after is None or (r.date, r.id) < after)),
+            key=lambda r: (r.date, r.id), reverse=True,
+        )
+        return rows[:limit]
+
+    async def get_category_rollup(self, user_id, start, end, bucket="week"):
+        return [
+            RollupRow(date(2025, 1, 1), 2, 500.0, 3),
+            RollupRow(date(2025, 1, 1), None, 20.0, 1),
+            RollupRow(date(2025, 2, 1), 2, 100.0, 1),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_pages_walk_every_report_once():
+    repo = Repo()
+    first = await history.get_page(repo, USER, limit=10)
+    second = await history.get_page(repo, USER, cursor=first.next_cursor, limit=10)
+    last = await history.get_page(repo, USER, cursor=second.next_cursor, limit=10)
+
+    ids = [r.id for page in (first, second, last) for r in page.reports]
+    assert ids == [r.id for r in sorted(REPORTS, key=lambda r: (r.date, r.id), reverse=True)]
+    assert len(last.reports) == 5 and last.next_cursor is None
+    assert len(("history:" + first.next_cursor).encode()) <= 64  # fits Telegram callback data
+
+
+@pytest.mark.asyncio
+async def test_stream_and_date_range():
+    repo = Repo()
+    streamed = [r async for r in history.stream(repo, USER, start=date(2025, 1, 3), end=date(2025, 1, 5), page_size=2)]
+
+    assert [r.date for r in streamed] == [date(2025, 1, 5)] * 2 + [date(2025, 1, 4)] * 2 + [date(2025, 1, 3)] * 2
+    assert len(repo.queries) == 3
+
+
+@pytest.mark.asyncio
+async def test_rollup_and_bad_cursor():
+    series = await history.rollup(Repo(), USER, date(2025, 1, 1), date(2025, 2, 28), "month")
+    assert series == {date(2025, 1, 1): {2: 500.0, None: 20.0}, date(2025, 2, 1): {2: 100.0}}
+
+    with pytest.raises(ValueError):
+        await history.get_page(Repo(), USER, cursor="not-a-cursor")
@@ -0,0 +1,78 @@
+"""
+Cold-start budget for the bot entry point and the CLI scripts.
+
+Each entry point is imported in a fresh interpreter, and heavy dependencies
+that are only needed on first use (NumPy, the Gemini SDKs, the database
+driver) must not be loaded.
+
+The cumulative ``python -X importtime`` budgets are wall-clock figures for a
+developer laptop and flake on loaded machines, so they are opt-in: set
+IMPORT_BUDGET_SCALE (1 for the budgets as written, higher on slow machines).
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "0"))  # 0: timing budgets are not checked
+
+# asyncpg is imported when the engine is built, not when sqlalchemy is
+LAZY = ("numpy", "google.generativeai", "google.genai", "grpc", "asyncpg")
+
+# module -> (budget in ms, modules that must not be imported)
+ENTRY_POINTS = {
+    "main": (6000, LAZY + ("sqlalchemy",)),
+    "solomia.services.category_service": (250, LAZY + ("sqlalchemy",)),
+    "scripts.classify_product": (1000, LAZY),
+    "scripts.classify_report": (1000, LAZY),
+    "scripts.enter_meal_plan": (1000, LAZY),
+    "scripts.evaluate_cascade": (1000, LAZY),
+    "scripts.evaluate_plans": (1000, LAZY),
+    "scripts.food_logs": (1000, LAZY + ("pyarrow",)),
+    "scripts.maintain_partitions": (1000, LAZY),
+    "scripts.init_project.check_connection": (1000, LAZY),
+    "scripts.init_project.db_init": (1000, LAZY),
+    "scripts.init_project.embed_examples": (1000, LAZY),
+    "scripts.init_project.reembed": (1000, LAZY),
+    "scripts.init_project.seed_category": (1000, LAZY),
+}
+
+PROBE = (
+    "import importlib, json, sys, types; importlib.import_module(sys.argv[1]); "
+    "print(json.dumps([m for m in sys.argv[2:] if type(sys.modules.get(m)) is types.ModuleType]))"
+)
+
+
+def _run(*args) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    env.setdefault("BOT_TOKEN", "123456:" + "A" * 35)
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def cumulative_import_ms(module: str) -> float:
+    stderr = _run("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        _, _, rest = line.partition("import time:")
+        parts = [p.strip() for p in rest.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise AssertionError(f"no importtime line for {module}")
+
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_heavy_dependencies_are_lazy(module):
+    _, forbidden = ENTRY_POINTS[module]
+    loaded = json.loads(_run("-c", PROBE, module, *forbidden).stdout.strip().splitlines()[-1])
+    assert loaded == [], f"importing {module} eagerly loads {loaded}"
+
+
+@pytest.mark.skipif(not SCALE, reason="wall-clock budgets are opt-in: set IMPORT_BUDGET_SCALE")
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_import_time_budget(module):
+    budget, _ = ENTRY_POINTS[module]
+    elapsed = cumulative_import_ms(module)
+    assert elapsed <= budget * SCALE, f"{module} imports in {elapsed:.0f} ms, budget {budget * SCALE:.0f} ms"
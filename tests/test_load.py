@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+import pytest
+from aiogram import Bot
+
+from benchmarks.load import CapturingSession, LoadGenerator, parse_mix, within_slo
+from benchmarks.synthetic import ProductSampler, build_taxonomy
+from solomia.core.handlers import build_dispatcher
+
+
+class NoUsers:
+    async def register_user(self, telegram_id, name):
+        return True  # not kept: reports and /status still see an unknown user
+
+    async def get_id_by_telegram_id(self, telegram_id):
+        return None
+
+
+def test_parse_mix_normalizes_weights():
+    assert parse_mix("start=1,report=3") == {"start": 0.25, "report": 0.75}
+
+
+@pytest.mark.asyncio
+async def test_updates_go_through_the_dispatcher_and_replies_are_timed():
+    session = CapturingSession()
+    bot = Bot(token="123456:" + "A" * 35, session=session)
+    dp = build_dispatcher(container=SimpleNamespace(user_repo=NoUsers()))
+    generator = LoadGenerator(
+        dp, bot, ProductSampler(build_taxonomy(10, 100)), n_users=50,
+        mix=parse_mix("start=0.5,report=0.25,status=0.25"), report_size=3,
+    )
+
+    record = await generator.run_step(rate=500, duration=0.2, timeout=5)
+
+    # /start answers, reports and /status ask unknown users to register: one reply per update
+    assert record["sent"] > 10
+    assert record["replied"] == record["sent"] == session.sent
+    assert record["error_rate"] == 0 and record["p99_ms"] is not None
+    assert within_slo(record, slo_ms=10_000, max_error_rate=0)
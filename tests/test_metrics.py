@@ -0,0 +1,25 @@
+from solomia.core import metrics
+
+
+def test_counter_and_histogram_exposition():
+    counter = metrics.Counter("test_requests", "Test counter.", ("status",))
+    histogram = metrics.Histogram("test_latency_seconds", "Test histogram.", buckets=(0.1, 1.0))
+    try:
+        counter.inc(status="ok")
+        counter.inc(2, status="ok")
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = metrics.render()
+
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{status="ok"} 3' in text
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{le="1"} 2' in text
+        assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+        assert "test_latency_seconds_count 3" in text
+    finally:
+        metrics.REGISTRY.remove(counter)
+        metrics.REGISTRY.remove(histogram)
+
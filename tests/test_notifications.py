@@ -0,0 +1,174 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from solomia.core import notifications
+from solomia.repository.category_repository import FoodCategoryRepository
+from solomia.services import category_service
+
+CATEGORIES = [
+    {"id": 1, "name": "Бобові", "examples": ["сочевиця"], "embedding": "[1, 0, 0]"},
+    {"id": 2, "name": "Фрукти / Ягоди", "examples": ["яблуко"], "embedding": "[0, 1, 0]"},
+]
+
+
+class Repo:
+    """The rows another worker has just written."""
+
+    def __init__(self):
+        self.example_embeddings = {(2, "груша"): "[0, 0.9, 0.1]"}
+        self.category_embeddings = {1: "[0, 0, 1]"}
+
+    async def get_all_with_embeddings(self):
+        return CATEGORIES
+
+    async def get_example_embeddings(self):
+        return []
+
+    async def get_example_embedding(self, category_id, example):
+        return self.example_embeddings.get((category_id, example))
+
+    async def get_category_embedding(self, category_id):
+        return self.category_embeddings.get(category_id)
+
+
+@pytest.fixture(autouse=True)
+def repo(monkeypatch):
+    repo = Repo()
+    monkeypatch.setattr(category_service, "repo", repo)
+    category_service.invalidate_index()
+    yield repo
+    category_service.invalidate_index()
+
+
+class Session:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append((str(statement), params))
+
+
+def event(kind, **fields):
+    return json.dumps({"origin": "other-worker", "kind": kind, **fields}, ensure_ascii=False)
+
+
+@pytest.mark.asyncio
+async def test_notify_sends_a_small_json_payload_that_other_processes_accept():
+    session = Session()
+    await notifications.notify(session, notifications.CATEGORY_CHANNEL, "example", category_id=2, example="груша")
+
+    (sql, params), = session.statements
+    assert "pg_notify" in sql and params["channel"] == "food_categories"
+    assert notifications.parse(params["payload"]) is None  # our own event
+    assert notifications.parse(event("example", category_id=2, example="груша"))["example"] == "груша"
+    assert notifications.parse("not json") is None
+
+
+@pytest.mark.asyncio
+async def test_changes_from_other_workers_patch_the_index_in_place():
+    index = await category_service.get_index()
+
+    await category_service.apply_change(notifications.parse(event("example", category_id=2, example="груша")))
+    await category_service.apply_change(notifications.parse(event("embedding", category_id=1)))
+
+    assert await category_service.get_index() is index
+    assert index.by_example("груша") == (2, "Фрукти / Ягоди")
+    assert len(index.ann) == 1
+    np.testing.assert_allclose(index.matrix[0], [0, 0, 1])
+
+
+@pytest.mark.asyncio
+async def test_unknown_and_bulk_changes_drop_the_index():
+    index = await category_service.get_index()
+    await category_service.apply_change({"kind": "reload"})
+
+    assert await category_service.get_index() is not index
+
+
+class Raw:
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def is_closed(self):
+        return self.closed
+
+
+class Engine:
+    def __init__(self):
+        self.raw = Raw()
+
+    def connect(self):
+        engine = self
+
+        class Connection:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def get_raw_connection(self):
+                return SimpleNamespace(driver_connection=engine.raw)
+
+        return Connection()
+
+
+@pytest.mark.asyncio
+async def test_listener_hands_other_processes_events_to_the_handler_in_order():
+    engine, received = Engine(), []
+
+    async def handler(change):
+        received.append(change["kind"])
+
+    listener = notifications.Listener(engine, notifications.CATEGORY_CHANNEL, handler)
+    listener.start()
+    await asyncio.wait_for(listener.connected.wait(), 1)
+
+    callback = engine.raw.listeners["food_categories"]
+    callback(engine.raw, 1, "food_categories", event("example", category_id=2, example="груша"))
+    callback(engine.raw, 1, "food_categories", json.dumps({"origin": notifications.ORIGIN, "kind": "reload"}))
+    callback(engine.raw, 1, "food_categories", event("embedding", category_id=1))
+    await asyncio.sleep(0.01)
+    await listener.stop()
+
+    assert received == ["example", "embedding"]
+    assert engine.raw.listeners == {}
+
+
+@pytest.mark.asyncio
+async def test_category_writes_and_their_event_commit_together():
+    log = []
+
+    class WriteSession(Session):
+        isolation_level = "AUTOCOMMIT"
+
+        async def connection(self, execution_options=None):
+            self.isolation_level = execution_options["isolation_level"]
+
+        async def execute(self, statement, params=None):
+            log.append((str(statement).split()[0], self.isolation_level))
+
+        async def commit(self):
+            log.append(("COMMIT", self.isolation_level))
+
+    @asynccontextmanager
+    async def factory():
+        yield WriteSession()
+
+    await FoodCategoryRepository(factory).append_example(2, "груша", np.array([0, 0.9, 0.1]))
+
+    # the UPDATE of examples, the category_examples row and the NOTIFY are one transaction
+    assert log == [("UPDATE", "READ COMMITTED"), ("INSERT", "READ COMMITTED"),
+                   ("SELECT", "READ COMMITTED"), ("COMMIT", "READ COMMITTED")]
@@ -0,0 +1,106 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from solomia.core import partitions
+
+
+def test_month_arithmetic_and_names():
+    assert partitions.add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+    assert partitions.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert partitions.partition_name("report_items", date(2026, 1, 1)) == "report_items_y2026m01"
+    assert partitions.parse_partition_name("reports", "reports_y2026m01") == date(2026, 1, 1)
+    # the items partitions and the default partition are not months of "reports"
+    assert partitions.parse_partition_name("reports", "report_items_y2026m01") is None
+    assert partitions.parse_partition_name("reports", "reports_default") is None
+    assert partitions.create_partition_sql("reports", date(2025, 12, 1)) == (
+        "CREATE TABLE IF NOT EXISTS reports_y2025m12 PARTITION OF reports "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
+
+
+def test_months_to_create_and_archive():
+    today = date(2025, 11, 16)
+    assert partitions.months_to_create(today, 2) == [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)]
+
+    existing = [date(2024, m, 1) for m in range(1, 13)] + [date(2025, m, 1) for m in range(1, 13)]
+    # keep November 2025 and the 11 months before it
+    assert partitions.months_to_archive(existing, today, 12) == [date(2024, m, 1) for m in range(1, 12)]
+    assert partitions.months_to_archive(existing, today, 0) == []
+
+
+class Result:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def all(self):
+        return self.rows
+
+    def scalar(self):
+        return False
+
+
+class Connection:
+    """Records each statement with the transaction it ran in, like the autocommit engine would."""
+
+    def __init__(self, partitions_by_table):
+        self.partitions_by_table = partitions_by_table
+        self.isolation_level = "AUTOCOMMIT"
+        self.transaction = None
+        self.transactions = 0
+        self.executed = []
+
+    async def execution_options(self, isolation_level=None):
+        self.isolation_level = isolation_level
+        return self
+
+    def begin(self):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                # asyncpg's adapter never starts a transaction in autocommit mode
+                if conn.isolation_level != "AUTOCOMMIT":
+                    conn.transactions += 1
+                    conn.transaction = conn.transactions
+
+            async def __aexit__(self, *exc):
+                conn.transaction = None
+
+        return Transaction()
+
+    async def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.executed.append((sql, self.transaction))
+        if "pg_inherits" in sql:
+            return Result((name,) for name in self.partitions_by_table.get(params["table"], []))
+        return Result()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.mark.asyncio
+async def test_maintenance_runs_each_phase_in_one_real_transaction(monkeypatch):
+    from scripts import maintain_partitions
+
+    conn = Connection({"reports": ["reports_y2024m01"], "report_items": ["report_items_y2024m01"]})
+
+    async def dispose():
+        pass
+
+    monkeypatch.setattr(maintain_partitions, "get_engine", lambda: SimpleNamespace(connect=lambda: conn))
+    monkeypatch.setattr(maintain_partitions, "dispose_engine", dispose)
+
+    await maintain_partitions.main(["--today", "2025-11-16", "--months-ahead", "0", "--retain-months", "12"])
+
+    ddl = [(sql, tx) for sql, tx in conn.executed if sql.startswith(("CREATE", "ALTER", "DROP"))]
+    assert any("DETACH PARTITION report_items_y2024m01" in sql for sql, _ in ddl)
+    assert any("SET SCHEMA archive" in sql for sql, _ in ddl)
+    # creation is one transaction, archival another; nothing autocommits
+    assert {tx for sql, tx in ddl if sql.startswith("CREATE TABLE")} == {1}
+    assert {tx for sql, tx in ddl if not sql.startswith("CREATE TABLE")} == {2}
@@ -0,0 +1,76 @@
+from datetime import date, timedelta
+
+import pytest
+
+from solomia.services import plan_evaluation
+
+MONDAY = date(2025, 11, 10)
+USERS = ["u1", "u2"]
+PLANS = [
+    ("u1", 1, 200.0),  # dairy
+    ("u1", 2, 100.0),  # cereals
+    ("u2", 1, 300.0),
+]
+
+
+def totals(days: int) -> list[tuple]:
+    rows = []
+    for i in range(days):
+        day = MONDAY + timedelta(days=i)
+        rows += [("u1", day, 1, 200.0), ("u1", day, 2, 150.0 if i % 2 else 50.0), ("u2", day, 3, 80.0)]
+    return rows
+
+
+def test_day_results_statuses():
+    evaluation = plan_evaluation.build(USERS, MONDAY, MONDAY, PLANS, totals(1))
+
+    assert evaluation.day_results("u1", MONDAY) == [
+        {"category_id": 1, "eaten": 200.0, "planned": 200.0, "ratio": 1.0, "status": "balanced"},
+        {"category_id": 2, "eaten": 50.0, "planned": 100.0, "ratio": 0.5, "status": "under"},
+    ]
+    # u2 ate nothing planned, and something outside the plan
+    assert [(r["category_id"], r["status"]) for r in evaluation.day_results("u2", MONDAY)] == [
+        (1, "under"), (3, "unplanned"),
+    ]
+
+
+def test_weekly_and_monthly_summary():
+    start, end = MONDAY, MONDAY + timedelta(days=20)  # three full weeks in November
+    evaluation = plan_evaluation.build(USERS, start, end, PLANS, totals(21))
+
+    weekly = [r for r in evaluation.summary("week") if r["user_id"] == "u1"]
+    assert [r["start"] for r in weekly] == ["2025-11-10", "2025-11-17", "2025-11-24"]
+    first = weekly[0]
+    assert first["days"] == 7
+    assert first["ratios"] == {1: 1.0, 2: round((4 * 50 + 3 * 150) / 700, 3)}
+    assert (first["under"], first["balanced"], first["over"]) == (4, 7, 3)
+    assert first["adherence"] == 0.5
+
+    (monthly,) = [r for r in evaluation.summary("month") if r["user_id"] == "u2"]
+    assert (monthly["days"], monthly["ratios"], monthly["under"]) == (21, {1: 0.0}, 21)
+
+
+@pytest.mark.asyncio
+async def test_batches_use_three_queries_each():
+    class Repo:
+        calls = 0
+
+        async def get_planned_user_ids(self, after=None, limit=1000):
+            self.calls += 1
+            ids = sorted({row[0] for row in PLANS})
+            return [u for u in ids if after is None or u > after][:limit]
+
+        async def get_plans(self, user_ids):
+            self.calls += 1
+            return PLANS
+
+        async def get_daily_totals(self, user_ids, start, end):
+            self.calls += 1
+            return totals(7)
+
+    repo = Repo()
+    batches = [e async for e in plan_evaluation.iter_evaluations(repo, MONDAY, MONDAY + timedelta(days=6), 1)]
+
+    assert [e.user_ids for e in batches] == [["u1"], ["u2"]]
+    assert batches[1].category_ids.tolist() == [1, 3]  # only the batch's own categories
+    assert repo.calls == 2 * 3 + 1
@@ -0,0 +1,40 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from solomia.core.profiling import Profiler
+
+
+def busy_wait(seconds):
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_samples_are_attributed_to_the_running_task(tmp_path):
+    profiler = Profiler(enabled=True, interval=0.001, output_dir=str(tmp_path))
+
+    async def update(name, blocking):
+        with profiler.session(name):
+            if blocking:
+                busy_wait(0.05)
+            await asyncio.sleep(0.06)
+
+    await asyncio.gather(update("blocking", True), update("idle", False))
+    profiler.disable()
+
+    summaries = {s["name"]: s for s in (json.loads(p.read_text()) for p in tmp_path.glob("*.json"))}
+    assert summaries["blocking"]["samples"] > 0
+    assert summaries["blocking"]["top_self"][0][0].endswith(":busy_wait")
+    assert summaries["idle"]["samples"] < summaries["blocking"]["samples"]
+    assert len(list(tmp_path.glob("*.collapsed"))) == 2
+
+
+def test_every_nth_update():
+    profiler = Profiler(enabled=True, every=3)
+    assert [profiler.should_sample() for _ in range(6)] == [False, False, True, False, False, True]
+    profiler.disable()
+    assert not profiler.should_sample()
@@ -0,0 +1,36 @@
+import pytest
+
+from solomia.services import prompts
+from solomia.services.llm_output import LLMOutputError, loads, validate
+
+
+def test_classification_prompt_references_ids():
+    prompt = prompts.classification_prompt(["нут", "манго"], [(7, "Бобові"), (9, "Фрукти / Ягоди")])
+
+    assert "7: Бобові\n9: Фрукти / Ягоди" in prompt
+    assert prompt.endswith("Products:\n0: нут\n1: манго")
+
+
+def test_parse_classification_ignores_unknown_references():
+    items = validate(loads('[{"p": 0, "c": 7}, {"p": 1, "c": null}, {"p": 5, "c": 7}, {"p": 1, "c": 3}]'),
+                     prompts.CLASSIFICATION_SCHEMA)
+
+    assert prompts.parse_classification(items, ["нут", "манго"], {7, 9}) == {"нут": 7}
+
+
+def test_loads_tolerates_code_fence():
+    assert loads('```json\n[{"product_name": "яйце", "amount_grams": 120}]\n```') == [
+        {"product_name": "яйце", "amount_grams": 120}
+    ]
+
+
+@pytest.mark.parametrize("reply", [
+    '{"product_name": "яйце"}',                          # not an array
+    '[{"product_name": "яйце"}]',                        # missing amount
+    '[{"product_name": "яйце", "amount_grams": null}]',  # null amount
+    '[{"product_name": "яйце", "amount_grams": "120"}]', # wrong type
+    'Sure! Here is the JSON',
+])
+def test_report_schema_rejects_malformed_replies(reply):
+    with pytest.raises(LLMOutputError):
+        validate(loads(reply), prompts.REPORT_SCHEMA)
@@ -0,0 +1,97 @@
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import text
+
+from solomia.core.unit_of_work import unit_of_work
+from solomia.repository.user_repository import UserRepository
+
+
+def factory(name, log):
+    @asynccontextmanager
+    async def session():
+        log.append(name)
+        yield None
+
+    return session
+
+
+@pytest.fixture
+def routed():
+    log = []
+    return UserRepository(factory("primary", log), factory("replica", log)), log
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_the_replica_outside_a_unit_of_work(routed):
+    repo, log = routed
+
+    async with repo.read_session():
+        pass
+    async with repo.write_session():
+        pass
+    async with repo.read_session():
+        pass
+
+    assert log == ["replica", "primary", "replica"]
+
+
+@pytest.mark.asyncio
+async def test_reads_follow_writes_to_the_primary_inside_a_unit_of_work(routed):
+    repo, log = routed
+
+    with unit_of_work():
+        async with repo.read_session():
+            pass
+        with unit_of_work():  # nested blocks join the outer unit
+            async with repo.write_session():
+                pass
+        async with repo.read_session():
+            pass
+    async with repo.read_session():
+        pass
+
+    assert log == ["replica", "primary", "primary", "replica"]
+
+
+@pytest.mark.asyncio
+async def test_without_a_replica_reads_use_the_primary():
+    log = []
+    repo = UserRepository(factory("primary", log))
+
+    async with repo.read_session():
+        pass
+
+    assert log == ["primary"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(
+    not (os.getenv("TEST_PRIMARY_URL") and os.getenv("TEST_REPLICA_URL")),
+    reason="needs two Postgres instances: TEST_PRIMARY_URL and TEST_REPLICA_URL (postgresql+asyncpg://...)",
+)
+async def test_routing_against_two_postgres_instances():
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from solomia.core.db import build_session_factory
+
+    primary = create_async_engine(os.environ["TEST_PRIMARY_URL"])
+    replica = create_async_engine(os.environ["TEST_REPLICA_URL"])
+    repo = UserRepository(build_session_factory(primary), build_session_factory(replica))
+
+    async def server(session_cm) -> tuple:
+        async with session_cm as session:
+            row = (await session.execute(text("SELECT inet_server_port(), current_setting('cluster_name')"))).one()
+            return tuple(row)
+
+    try:
+        primary_server, replica_server = await server(repo.write_session()), await server(repo.read_session())
+        assert primary_server != replica_server
+        with unit_of_work():
+            assert await server(repo.read_session()) == replica_server
+            await server(repo.write_session())
+            assert await server(repo.read_session()) == primary_server
+    finally:
+        await primary.dispose()
+        await replica.dispose()
@@ -0,0 +1,24 @@
+from datetime import date
+
+from solomia.repository.log_repository import EXPORT_COLUMNS
+from solomia.repository.records import LogRecord, ReportRecord, to_columns
+
+
+def test_records_are_built_from_row_tuples():
+    report = ReportRecord._make(("r1", "u1", date(2025, 1, 1), None))
+
+    assert report.id == "r1" and report.date == date(2025, 1, 1)
+    assert not hasattr(report, "__dict__")
+
+
+def test_to_columns_transposes_rows():
+    rows = [
+        LogRecord("1", date(2024, 1, 1), "кефір", 200.0, 1, "Молочні продукти"),
+        LogRecord("1", date(2024, 1, 2), "гречка", None, None, None),
+    ]
+
+    columns = to_columns(rows, EXPORT_COLUMNS)
+
+    assert list(columns) == EXPORT_COLUMNS
+    assert columns["product_name"] == ["кефір", "гречка"] and columns["amount_grams"] == [200.0, None]
+    assert to_columns([], EXPORT_COLUMNS) == {column: [] for column in EXPORT_COLUMNS}
@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+import pytest
+
+from scripts import classify_report
+from solomia.core import admission
+from solomia.services import category_service, gemini
+from solomia.services.report_parser import pre_parse
+
+
+def test_pre_parse_reads_explicit_amounts():
+    items = pre_parse("Сніданок: вівсянка 40 г, 2 яйця\nОбід: борщ - 350г; хліб 1,5 кг")
+
+    assert items == [
+        {"product_name": "вівсянка", "amount_grams": 40.0},
+        {"product_name": "2 яйця", "amount_grams": None},
+        {"product_name": "борщ", "amount_grams": 350.0},
+        {"product_name": "хліб", "amount_grams": 1500.0},
+    ]
+
+
+class ExampleRepo:
+    def __init__(self):
+        self.appended = []
+
+    async def get_all_with_embeddings(self):
+        return [
+            {"id": 1, "name": "Крупи / Зернові", "examples": ["вівсянка"], "embedding": "[1, 0]"},
+            {"id": 2, "name": "Білкові продукти (мʼясо, риба, яйця)", "examples": ["курка"], "embedding": "[0, 1]"},
+        ]
+
+    async def get_example_embeddings(self):
+        return []
+
+    async def append_example(self, category_id, example, embedding=None):
+        self.appended.append((category_id, example))
+
+    async def get_examples_by_id(self, category_id):
+        return [example for cid, example in self.appended if cid == category_id]
+
+    async def update_embedding(self, category_id, embedding):
+        pass
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    calls = []
+
+    async def fake_generate(prompt, model_name=None, response_schema=None):
+        calls.append(prompt)
+        return json.dumps([
+            {"product_name": "вівсянка", "amount_grams": 40, "category_id": 2},
+            {"product_name": "яйце", "amount_grams": 120, "category_id": 2},
+        ])
+
+    async def orthogonal_embedding(text):
+        return np.array([0.7, -0.7])  # nothing is close by embedding
+
+    repo = ExampleRepo()
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setattr(gemini, "generate", fake_generate)
+    monkeypatch.setattr(category_service, "get_embedding", orthogonal_embedding)
+    monkeypatch.setattr(category_service, "repo", repo)
+    category_service.invalidate_index()
+    yield calls, repo
+    category_service.invalidate_index()
+
+
+@pytest.mark.asyncio
+async def test_fully_local_report_makes_no_llm_call(pipeline):
+    calls, _ = pipeline
+
+    report = await classify_report.parse_and_classify_report("вівсянка 40 г")
+
+    assert report == [{"product_name": "вівсянка", "amount_grams": 40.0, "category": "Крупи / Зернові"}]
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_unresolved_items_use_one_combined_call(pipeline):
+    calls, repo = pipeline
+
+    report = await classify_report.parse_and_classify_report("вівсянка 40 г, 2 яйця")
+
+    assert len(calls) == 1
+    assert "Categories:\n1: Крупи / Зернові" in calls[0]
+    assert report == [
+        # the exact local match wins over the model's answer
+        {"product_name": "вівсянка", "amount_grams": 40.0, "category": "Крупи / Зернові"},
+        {"product_name": "яйце", "amount_grams": 120.0, "category": "Білкові продукти (мʼясо, риба, яйця)"},
+    ]
+    assert repo.appended == [(2, "яйце")]
+
+
+@pytest.fixture
+def overloaded(pipeline, monkeypatch):
+    async def no_budget(prompt, model_name=None, response_schema=None):
+        raise admission.Overloaded("llm_queue_full")
+
+    monkeypatch.setattr(gemini, "generate", no_budget)
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_overload_falls_back_to_embedding_guesses(overloaded):
+    _, repo = overloaded
+
+    report = await classify_report.parse_and_classify_report("вівсянка 40 г, курка 100 г, щось 10 г")
+
+    assert [item["category"] for item in report] == [
+        # "щось" is only a guess: the closest category by embedding, below the confidence threshold
+        "Крупи / Зернові", "Білкові продукти (мʼясо, риба, яйця)", "Крупи / Зернові",
+    ]
+    assert repo.appended == []  # guesses are not learned
+
+
+@pytest.mark.asyncio
+async def test_overload_without_amounts_is_left_to_the_caller(overloaded):
+    with pytest.raises(admission.Overloaded):
+        await classify_report.parse_and_classify_report("вівсянка 40 г, 2 яйця")
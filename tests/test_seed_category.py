@@ -0,0 +1,78 @@
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import fake_gemini
+from scripts.init_project import seed_category
+from solomia.core import metrics
+from solomia.repository.category_repository import FoodCategoryRepository
+from solomia.services import gemini
+
+
+def test_load_taxonomy_formats(tmp_path):
+    long_csv = tmp_path / "long.csv"
+    long_csv.write_text("name,example\nФрукти,яблуко\nФрукти,груша\nФрукти,яблуко\nОвочі,огірок\n", encoding="utf-8")
+    wide_csv = tmp_path / "wide.csv"
+    wide_csv.write_text("name,examples\nФрукти,яблуко|груша\nОвочі,огірок; капуста\n", encoding="utf-8")
+    as_json = tmp_path / "taxonomy.json"
+    as_json.write_text('[{"name": "Фрукти", "examples": ["яблуко", "груша"]}]', encoding="utf-8")
+
+    assert seed_category.load_taxonomy(str(long_csv)) == {"Фрукти": ["яблуко", "груша"], "Овочі": ["огірок"]}
+    assert seed_category.load_taxonomy(str(wide_csv)) == {"Фрукти": ["яблуко", "груша"], "Овочі": ["огірок", "капуста"]}
+    assert seed_category.load_taxonomy(str(as_json)) == {"Фрукти": ["яблуко", "груша"]}
+
+
+def test_diff_keeps_learned_examples_and_skips_unchanged():
+    existing = {
+        "Фрукти": (["яблуко", "манго"], True),  # "манго" was learned at runtime
+        "Овочі": (["огірок"], True),
+        "Горіхи": (["мигдаль"], False),  # no embedding yet
+    }
+    wanted = {"Фрукти": ["яблуко", "груша"], "Овочі": ["огірок"], "Горіхи": ["мигдаль"], "Бобові": ["нут"]}
+
+    assert seed_category.diff_taxonomy(wanted, existing) == {
+        "Фрукти": ["яблуко", "манго", "груша"],
+        "Горіхи": ["мигдаль"],
+        "Бобові": ["нут"],
+    }
+    assert seed_category.diff_taxonomy(wanted, existing, replace=True)["Фрукти"] == ["яблуко", "груша"]
+
+
+@pytest.mark.asyncio
+async def test_embed_many_batches_requests_in_order():
+    texts = [f"продукт {i}" for i in range(250)]
+    before = metrics.GEMINI_REQUESTS.value(operation="embed", status="ok")
+    with fake_gemini():
+        vectors = await gemini.embed_many(texts, concurrency=2)
+        single = await gemini.embed(texts[123])
+
+    assert len(vectors) == 250 and vectors[123] == single
+    assert metrics.GEMINI_REQUESTS.value(operation="embed", status="ok") - before == 3 + 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_chunks_and_notify_commit_together():
+    log = []
+
+    class Session:
+        isolation_level = "AUTOCOMMIT"
+
+        async def connection(self, execution_options=None):
+            self.isolation_level = execution_options["isolation_level"]
+
+        async def execute(self, statement, params=None):
+            log.append((str(statement).split()[1], self.isolation_level))
+
+        async def commit(self):
+            log.append(("COMMIT", self.isolation_level))
+
+    @asynccontextmanager
+    async def factory():
+        yield Session()
+
+    rows = [(f"Категорія {i}", ["приклад"], np.ones(3)) for i in range(3)]
+    assert await FoodCategoryRepository(factory).upsert_categories(rows, chunk_size=2) == 3
+
+    # two chunks and the notification, none of them autocommitted
+    assert log == [("INTO", "READ COMMITTED")] * 2 + [("pg_notify(:channel,", "READ COMMITTED"), ("COMMIT", "READ COMMITTED")]
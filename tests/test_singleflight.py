@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from solomia.core.singleflight import NegativeCache, SingleFlight, normalize_key
+from solomia.services import category_service, gemini
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert [r for r, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert len(flight) == 0
+
+
+def test_negative_cache_expires(monkeypatch):
+    cache = NegativeCache(ttl=10)
+    now = [100.0]
+    monkeypatch.setattr("solomia.core.singleflight.time.monotonic", lambda: now[0])
+
+    cache.add(normalize_key("  Bubble   TEA "))
+    assert "bubble tea" in cache
+    now[0] += 11
+    assert "bubble tea" not in cache
+
+
+class LearningRepo:
+    def __init__(self):
+        self.appended = []
+        self.embedding_updates = 0
+
+    async def get_all_with_embeddings(self):
+        return [{"id": 1, "name": "Напої", "examples": ["чай"], "embedding": "[1, 0]"}]
+
+    async def get_example_embeddings(self):
+        return []
+
+    async def append_example(self, category_id, example, embedding=None):
+        self.appended.append(example)
+
+    async def get_examples_by_id(self, category_id):
+        return ["чай", *self.appended]
+
+    async def update_embedding(self, category_id, embedding):
+        self.embedding_updates += 1
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    prompts = []
+
+    async def fake_generate(prompt, model_name=None, response_schema=None):
+        prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        products = prompt.split("Products:\n", 1)[1].splitlines()
+        return json.dumps([
+            {"p": position, "c": None if "дивне" in line else 1} for position, line in enumerate(products)
+        ])
+
+    async def fake_embedding(text):
+        return np.array([1.0, 0.0])
+
+    repo = LearningRepo()
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    monkeypatch.setattr(gemini, "generate", fake_generate)
+    monkeypatch.setattr(category_service, "get_embedding", fake_embedding)
+    monkeypatch.setattr(category_service, "repo", repo)
+    monkeypatch.setattr(category_service, "_unclassifiable", NegativeCache(ttl=60))
+    category_service.invalidate_index()
+    yield prompts, repo
+    category_service.invalidate_index()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_products_use_one_llm_call(llm):
+    prompts, repo = llm
+
+    answers = await asyncio.gather(*(
+        category_service.classify_with_llm(["Bubble Tea", "комбуча"]) for _ in range(4)
+    ))
+
+    assert len(prompts) == 1
+    assert repo.appended == ["Bubble Tea", "комбуча"]
+    assert repo.embedding_updates == 1  # one re-embed per touched category
+    assert all(json.loads(a) == {"Bubble Tea": "Напої", "комбуча": "Напої"} for a in answers)
+
+
+@pytest.mark.asyncio
+async def test_unclassifiable_products_are_negatively_cached(llm):
+    prompts, _ = llm
+
+    assert json.loads(await category_service.classify_with_llm(["щось дивне"], ["Напої"])) == {}
+    assert json.loads(await category_service.classify_with_llm(["Щось  дивне"], ["Напої"])) == {}
+    assert len(prompts) == 1
@@ -0,0 +1,134 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from solomia.core import sql_tracker
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    sql_tracker.install(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+    yield engine
+    engine.dispose()
+
+
+def test_counts_statements_and_nested_operations(engine):
+    with sql_tracker.track("outer") as outer:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (name) VALUES ('a')"))
+            with sql_tracker.track("inner") as inner:
+                conn.execute(text("SELECT * FROM items"))
+
+    assert inner.statements == 1
+    assert outer.statements == 2
+    assert outer.round_trips == 2
+
+
+def test_executemany_is_one_round_trip(engine):
+    with sql_tracker.track("bulk insert") as stats:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (name) VALUES (:name)"), [{"name": str(i)} for i in range(20)])
+
+    assert stats.round_trips == 1
+    assert stats.statements == 20
+
+
+def test_budget_exceeded_reports_n_plus_one(engine, statement_budget):
+    with pytest.raises(sql_tracker.StatementBudgetExceeded, match="N\\+1") as exc:
+        with statement_budget("insert 20 items one by one", max_statements=5, n_plus_one_threshold=5):
+            with engine.begin() as conn:
+                for i in range(20):
+                    conn.execute(text("INSERT INTO items (name) VALUES (:name)"), {"name": str(i)})
+
+    assert "20 statements > budget 5" in str(exc.value)
+
+
+def test_within_budget_passes(engine, statement_budget):
+    with statement_budget("single insert", max_statements=1) as stats:
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (name) VALUES ('a')"))
+
+    assert stats.statements == 1
+
+
+class SyncSession:
+    """Runs repository SQL on a tracked sync SQLite connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def execute(self, statement, params=None):
+        return self.conn.execute(statement, params)
+
+    async def connection(self, execution_options=None):
+        return self.conn
+
+    async def commit(self):
+        self.conn.commit()
+
+
+@pytest.fixture
+def report_db(monkeypatch):
+    from contextlib import asynccontextmanager
+    from datetime import datetime
+    from types import SimpleNamespace
+    from uuid import uuid4
+
+    from sqlalchemy import event
+
+    from solomia.services import report_pipeline
+
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def postgres_functions(dbapi_connection, record):
+        dbapi_connection.create_function("gen_random_uuid", 0, lambda: str(uuid4()))
+        dbapi_connection.create_function("now", 0, lambda: datetime.now().isoformat())
+
+    sql_tracker.install(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id TEXT PRIMARY KEY, telegram_id TEXT)"))
+        conn.execute(text("CREATE TABLE reports (id TEXT, user_id TEXT, date DATE, created_at TEXT, UNIQUE (user_id, date))"))
+        conn.execute(text("""
+            CREATE TABLE report_items (id TEXT, report_id TEXT, report_date DATE, category_id INTEGER,
+                                       product_name TEXT, amount_grams REAL)
+        """))
+        conn.execute(text("INSERT INTO users VALUES ('u1', '42')"))
+
+    @asynccontextmanager
+    async def session():
+        with engine.connect() as conn:
+            yield SyncSession(conn)
+
+    async def get_index():
+        return SimpleNamespace(id_by_name=lambda name: 1)
+
+    monkeypatch.setattr(report_pipeline, "get_session_factory", lambda: session)
+    monkeypatch.setattr(report_pipeline, "get_index", get_index)
+    yield engine
+    engine.dispose()
+
+
+# User lookup, report upsert, one multi-row insert for the items: flat in the item count
+SAVE_REPORT_BUDGET = 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("n_items", [1, 20, 100])
+async def test_save_report_statement_budget(report_db, statement_budget, n_items):
+    from solomia.services.report_pipeline import save_report
+
+    items = [{"product_name": f"продукт {i}", "amount_grams": 100.0, "category": "Фрукти / Ягоди"}
+             for i in range(n_items)]
+
+    with statement_budget(f"save {n_items}-item report", max_statements=SAVE_REPORT_BUDGET) as stats:
+        await save_report(items, "42")
+
+    assert stats.statements <= SAVE_REPORT_BUDGET
+    assert stats.repeated(threshold=2) == []  # nothing runs once per item
+    await save_report(items[:2], "42")  # a second report the same day joins the first
+    with report_db.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM reports")).scalar() == 1
+        assert conn.execute(text("SELECT count(*) FROM report_items")).scalar() == n_items + min(n_items, 2)